@@ -0,0 +1,136 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <boost/assign/list_of.hpp>
+#include <boost/bind.hpp>
+
+#include "clock.hh"
+#include "time.hh"
+
+namespace command
+{
+  namespace clock
+  {
+    SetSimulated::SetSimulated (Clock& entity, const std::string& docstring)
+      : Command (entity, boost::assign::list_of (Value::DOUBLE), docstring)
+    {}
+
+    Value
+    SetSimulated::doExecute ()
+    {
+      Clock& entity = static_cast<Clock&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      double timeStep = values[0].value ();
+      entity.setSimulated (timeStep);
+      return Value ();
+    }
+
+    SetWallClock::SetWallClock (Clock& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    SetWallClock::doExecute ()
+    {
+      Clock& entity = static_cast<Clock&> (owner ());
+      entity.setWallClock ();
+      return Value ();
+    }
+
+    IsSimulated::IsSimulated (Clock& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    IsSimulated::doExecute ()
+    {
+      Clock& entity = static_cast<Clock&> (owner ());
+      return Value (entity.isSimulated ());
+    }
+  } // end of namespace clock.
+} // end of namespace command.
+
+Clock::Clock (const std::string& name)
+  : dg::Entity (name),
+    timeOut_
+    (boost::bind (&Clock::updateTime, this, _1, _2),
+     dg::sotNOSIGNAL,
+     MAKE_SIGNAL_STRING (name, false, "Vector", "time"))
+{
+  signalRegistration (timeOut_);
+  timeOut_.setNeedUpdateFromAllChildren (true);
+
+  std::string docstring;
+
+  docstring =
+    "    \n"
+    "    Use a simulated time\n"
+    "    \n"
+    "      The time starts from the wall-clock time at the next\n"
+    "      iteration and increases by the time step at each iteration.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a double: control period in seconds.\n"
+    "    \n";
+  addCommand ("setSimulated",
+	      new command::clock::SetSimulated (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Use the wall-clock time\n"
+    "    \n";
+  addCommand ("setWallClock",
+	      new command::clock::SetWallClock (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Check if the time is simulated\n"
+    "    \n"
+    "      Return:\n"
+    "        - a boolean.\n"
+    "    \n";
+  addCommand ("isSimulated",
+	      new command::clock::IsSimulated (*this, docstring));
+}
+
+Clock::~Clock ()
+{}
+
+void
+Clock::setSimulated (double timeStep)
+{
+  sot::motionPlanner::SharedClock::instance ().setSimulated (timeStep);
+}
+
+void
+Clock::setWallClock ()
+{
+  sot::motionPlanner::SharedClock::instance ().setWallClock ();
+}
+
+bool
+Clock::isSimulated () const
+{
+  return sot::motionPlanner::SharedClock::instance ().isSimulated ();
+}
+
+ml::Vector&
+Clock::updateTime (ml::Vector& res, int t)
+{
+  sot::motionPlanner::timestamp (res, t);
+  return res;
+}
+
+DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (Clock, "Clock");
@@ -0,0 +1,95 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef SOT_MOTION_PLANNER_CLOCK_HH
+# define SOT_MOTION_PLANNER_CLOCK_HH
+# include <string>
+
+# include <jrl/mal/boost.hh>
+
+# include <dynamic-graph/command.h>
+# include <dynamic-graph/entity.h>
+# include <dynamic-graph/factory.h>
+# include <dynamic-graph/signal-time-dependent.h>
+
+# include "common.hh"
+
+class Clock;
+
+namespace command
+{
+  namespace clock
+  {
+    using ::dynamicgraph::command::Command;
+    using ::dynamicgraph::command::Value;
+
+    class SetSimulated : public Command
+    {
+    public:
+      SetSimulated (Clock& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class SetWallClock : public Command
+    {
+    public:
+      SetWallClock (Clock& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class IsSimulated : public Command
+    {
+    public:
+      IsSimulated (Clock& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+  } // end of namespace clock.
+} // end of namespace command.
+
+/// \brief Expose and configure the clock shared by the entities.
+///
+/// The time signal provides the time of the current iteration as a
+/// (seconds, microseconds) vector, i.e. the timestamp format of the
+/// sensors. It is sampled once per iteration by
+/// sot::motionPlanner::SharedClock, which also timestamps the
+/// virtual sensor, the error estimation and the sensor stand-in.
+///
+/// All Clock entities control the same clock: switching one of them
+/// to simulated time switches the whole plug-in.
+class Clock : public dg::Entity
+{
+  DYNAMIC_GRAPH_ENTITY_DECL ();
+public:
+  /// \brief Output vector signal.
+  typedef dg::SignalTimeDependent<ml::Vector, int> signalVectorOut_t;
+
+  /// \name Constructor and destructor.
+  /// \{
+  explicit Clock (const std::string& name);
+  virtual ~Clock ();
+  /// \}
+
+  void setSimulated (double timeStep);
+  void setWallClock ();
+  bool isSimulated () const;
+
+protected:
+  ml::Vector& updateTime (ml::Vector& res, int t);
+
+private:
+  signalVectorOut_t timeOut_;
+};
+
+#endif //! SOT_MOTION_PLANNER_CLOCK_HH
@@ -0,0 +1,280 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <limits>
+#include <sstream>
+#include <stdexcept>
+
+#include <boost/assign/list_of.hpp>
+#include <boost/bind.hpp>
+#include <boost/numeric/ublas/vector.hpp>
+
+#include <dynamic-graph/command-getter.h>
+#include <dynamic-graph/command-setter.h>
+
+#include "convergence-monitor.hh"
+#include "event-log.hh"
+
+namespace ublas = boost::numeric::ublas;
+
+namespace command
+{
+  namespace convergenceMonitor
+  {
+    Add::Add (ConvergenceMonitor& entity, const std::string& docstring)
+      : Command
+	(entity,
+	 boost::assign::list_of (Value::STRING) (Value::DOUBLE),
+	 docstring)
+    {}
+
+    Value
+    Add::doExecute ()
+    {
+      ConvergenceMonitor& entity =
+	static_cast<ConvergenceMonitor&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      std::string name = values[0].value ();
+      double threshold = values[1].value ();
+      entity.add (name, threshold);
+      return Value ();
+    }
+
+    Reset::Reset (ConvergenceMonitor& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    Reset::doExecute ()
+    {
+      ConvergenceMonitor& entity =
+	static_cast<ConvergenceMonitor&> (owner ());
+      entity.reset ();
+      return Value ();
+    }
+
+    Report::Report (ConvergenceMonitor& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    Report::doExecute ()
+    {
+      ConvergenceMonitor& entity =
+	static_cast<ConvergenceMonitor&> (owner ());
+      return Value (entity.report ());
+    }
+  } // end of namespace convergenceMonitor.
+} // end of namespace command.
+
+ConvergenceMonitor::ConvergenceMonitor (const std::string& name)
+  : dg::Entity (name),
+    errors_ (),
+    normsOut_ (INIT_SIGNAL_OUT
+	       ("norms", ConvergenceMonitor::updateNorms, "Vector")),
+    statusOut_ (boost::bind (&ConvergenceMonitor::updateStatus, this, _1, _2),
+		normsOut_,
+		MAKE_SIGNAL_STRING (name, false, "int", "status")),
+    timeout_ (0),
+    startTime_ (0),
+    started_ (false),
+    converged_ (false),
+    timedOut_ (false)
+{
+  signalRegistration (normsOut_ << statusOut_);
+  normsOut_.setNeedUpdateFromAllChildren (true);
+  statusOut_.setNeedUpdateFromAllChildren (true);
+
+  std::string docstring;
+
+  docstring =
+    "    \n"
+    "    Monitor a new error\n"
+    "    \n"
+    "      The error_<name> input signal is created.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: error name,\n"
+    "        - a double: threshold on the infinity norm of the error.\n"
+    "    \n";
+  addCommand ("add", new command::convergenceMonitor::Add (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Restart monitoring\n"
+    "    \n"
+    "      The timeout is counted again from the next evaluation.\n"
+    "    \n";
+  addCommand ("reset",
+	      new command::convergenceMonitor::Reset (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Describe the errors which have not converged\n"
+    "    \n"
+    "      Return a string, one error per line.\n"
+    "    \n";
+  addCommand ("report",
+	      new command::convergenceMonitor::Report (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the timeout\n"
+    "    \n"
+    "      Input:\n"
+    "        - an integer: number of control iterations (zero disables\n"
+    "          the timeout).\n"
+    "    \n";
+  addCommand ("setTimeout",
+	      new dg::command::Setter<ConvergenceMonitor, int>
+	      (*this, &ConvergenceMonitor::setTimeout, docstring));
+
+  docstring =
+    "    \n"
+    "    Get the timeout (in control iterations)\n"
+    "    \n";
+  addCommand ("getTimeout",
+	      new dg::command::Getter<ConvergenceMonitor, int>
+	      (*this, &ConvergenceMonitor::getTimeout, docstring));
+}
+
+ConvergenceMonitor::~ConvergenceMonitor ()
+{}
+
+void
+ConvergenceMonitor::add (const std::string& name, double threshold)
+{
+  for (unsigned i = 0; i < errors_.size (); ++i)
+    if (errors_[i].name == name)
+      throw std::runtime_error ("error '" + name + "' is already monitored");
+  if (threshold < 0.)
+    throw std::runtime_error ("threshold must be positive");
+
+  MonitoredError error;
+  error.name = name;
+  error.threshold = threshold;
+  error.timeoutMessage = "timeout: " + name + " did not converge";
+  error.error.reset
+    (new signalVectorIn_t
+     (dg::nullptr,
+      MAKE_SIGNAL_STRING (getName (), true, "Vector", "error_" + name)));
+
+  errors_.push_back (error);
+  signalRegistration (*error.error);
+  normsOut_.addDependency (*error.error);
+}
+
+void
+ConvergenceMonitor::reset ()
+{
+  started_ = false;
+  converged_ = false;
+  timedOut_ = false;
+}
+
+unsigned
+ConvergenceMonitor::firstNotConverged (const ml::Vector& norms) const
+{
+  for (unsigned i = 0; i < errors_.size (); ++i)
+    if (norms (i) > errors_[i].threshold)
+      return i;
+  return errors_.size ();
+}
+
+std::string
+ConvergenceMonitor::report ()
+{
+  const ml::Vector& norms = normsOut_.accessCopy ();
+  std::ostringstream stream;
+  for (unsigned i = 0; i < errors_.size (); ++i)
+    {
+      if (!errors_[i].error->isPlugged ())
+	stream << errors_[i].name << ": not plugged\n";
+      else if (i >= norms.size ())
+	stream << errors_[i].name << ": not evaluated\n";
+      else if (norms (i) > errors_[i].threshold)
+	stream << errors_[i].name << ": " << norms (i)
+	       << " > " << errors_[i].threshold << "\n";
+    }
+  return stream.str ();
+}
+
+ml::Vector&
+ConvergenceMonitor::updateNorms (ml::Vector& res, int t)
+{
+  if (res.size () != errors_.size ())
+    res.resize (errors_.size ());
+
+  for (unsigned i = 0; i < errors_.size (); ++i)
+    {
+      if (!errors_[i].error->isPlugged ())
+	{
+	  res (i) = std::numeric_limits<double>::infinity ();
+	  continue;
+	}
+      res (i) =
+	ublas::norm_inf ((*errors_[i].error) (t).accessToMotherLib ());
+    }
+  return res;
+}
+
+int&
+ConvergenceMonitor::updateStatus (int& res, int t)
+{
+  const ml::Vector& norms = normsOut_ (t);
+
+  if (!started_)
+    {
+      started_ = true;
+      startTime_ = t;
+    }
+
+  if (timedOut_)
+    {
+      res = STATUS_TIMEOUT;
+      return res;
+    }
+
+  const unsigned first = firstNotConverged (norms);
+  if (first == errors_.size ())
+    {
+      if (!converged_)
+	{
+	  converged_ = true;
+	  double data = t - startTime_;
+	  sot::motionPlanner::EventLog::instance ().push
+	    (t, sot::motionPlanner::EVENT_CONVERGENCE, getName (),
+	     "ready (iterations)", &data, 1);
+	}
+      res = STATUS_READY;
+      return res;
+    }
+
+  if (!converged_ && timeout_ > 0 && t - startTime_ >= timeout_)
+    {
+      timedOut_ = true;
+      double data[2] = {norms (first), errors_[first].threshold};
+      sot::motionPlanner::EventLog::instance ().push
+	(t, sot::motionPlanner::EVENT_CONVERGENCE, getName (),
+	 errors_[first].timeoutMessage.c_str (), data, 2);
+      res = STATUS_TIMEOUT;
+      return res;
+    }
+
+  res = STATUS_WAITING;
+  return res;
+}
+
+DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (ConvergenceMonitor, "ConvergenceMonitor");
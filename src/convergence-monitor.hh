@@ -0,0 +1,161 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef SOT_MOTION_PLANNER_CONVERGENCE_MONITOR_HH
+# define SOT_MOTION_PLANNER_CONVERGENCE_MONITOR_HH
+# include <string>
+# include <vector>
+# include <boost/shared_ptr.hpp>
+
+# include <jrl/mal/boost.hh>
+
+# include <dynamic-graph/command.h>
+# include <dynamic-graph/entity.h>
+# include <dynamic-graph/factory.h>
+# include <dynamic-graph/null-ptr.hh>
+# include <dynamic-graph/signal-time-dependent.h>
+# include <dynamic-graph/signal-ptr.h>
+
+# include "common.hh"
+
+class ConvergenceMonitor;
+
+namespace command
+{
+  namespace convergenceMonitor
+  {
+    using ::dynamicgraph::command::Command;
+    using ::dynamicgraph::command::Value;
+
+    class Add : public Command
+    {
+    public:
+      Add (ConvergenceMonitor& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class Reset : public Command
+    {
+    public:
+      Reset (ConvergenceMonitor& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class Report : public Command
+    {
+    public:
+      Report (ConvergenceMonitor& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+  } // end of namespace convergenceMonitor.
+} // end of namespace command.
+
+/// \brief Wait for a set of task errors to converge.
+///
+/// Each monitored error is plugged into an error_<name> input signal
+/// and is considered as converged when its infinity norm is below its
+/// threshold.
+///
+/// The status signal is:
+/// - STATUS_READY when all the errors have converged,
+/// - STATUS_WAITING otherwise,
+/// - STATUS_TIMEOUT when the errors did not converge before the
+///   timeout (expressed in control iterations, zero disables it).
+///
+/// The timeout is counted from the first evaluation of the status
+/// signal, it only applies until the errors converge once and the
+/// timeout status is kept until reset is called. Both the readiness
+/// and the timeout are reported once into the event log, the timeout
+/// event names the first error which has not converged.
+///
+/// The norms signal contains the current norm of each error, in the
+/// order in which they have been added.
+class ConvergenceMonitor : public dg::Entity
+{
+  DYNAMIC_GRAPH_ENTITY_DECL ();
+ public:
+  /// \brief Input vector signal.
+  typedef dg::SignalPtr<ml::Vector, int> signalVectorIn_t;
+  /// \brief Output vector signal.
+  typedef dg::SignalTimeDependent<ml::Vector, int> signalVectorOut_t;
+  /// \brief Output status signal.
+  typedef dg::SignalTimeDependent<int, int> signalStatusOut_t;
+
+  static const int STATUS_TIMEOUT = -1;
+  static const int STATUS_WAITING = 0;
+  static const int STATUS_READY = 1;
+
+  /// \brief Error monitored by the entity.
+  struct MonitoredError
+  {
+    std::string name;
+    boost::shared_ptr<signalVectorIn_t> error;
+    double threshold;
+    /// \brief Event message, built once to avoid allocating in the
+    ///        control loop.
+    std::string timeoutMessage;
+  };
+
+  /// \name Constructor and destructor.
+  /// \{
+  explicit ConvergenceMonitor (const std::string& name);
+  virtual ~ConvergenceMonitor ();
+  /// \}
+
+  /// \brief Monitor a new error.
+  void add (const std::string& name, double threshold);
+
+  /// \brief Restart monitoring (timeout and readiness event).
+  void reset ();
+
+  /// \brief Describe the errors which have not converged.
+  std::string report ();
+
+  void setTimeout (const int& timeout)
+  {
+    timeout_ = timeout;
+  }
+
+  int getTimeout () const
+  {
+    return timeout_;
+  }
+
+protected:
+  /// \brief Update the norms signal.
+  ml::Vector& updateNorms (ml::Vector& res, int);
+  /// \brief Update the status signal.
+  int& updateStatus (int& res, int);
+
+private:
+  /// \brief Index of the first error which has not converged, or
+  ///        the number of errors if they all converged.
+  unsigned firstNotConverged (const ml::Vector& norms) const;
+
+  std::vector<MonitoredError> errors_;
+
+  signalVectorOut_t normsOut_;
+  signalStatusOut_t statusOut_;
+
+  int timeout_;
+  /// \brief Time of the first evaluation since the last reset.
+  int startTime_;
+  bool started_;
+  /// \brief Did the errors converge once since the last reset?
+  bool converged_;
+  bool timedOut_;
+};
+
+#endif //! SOT_MOTION_PLANNER_CONVERGENCE_MONITOR_HH
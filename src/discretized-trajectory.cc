@@ -13,9 +13,11 @@
 // received a copy of the GNU Lesser General Public License along with
 // sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
 
+#include <algorithm>
 #include <cassert>
 #include <cmath>
 #include <fstream>
+#include <stdexcept>
 #include <vector>
 
 #include <boost/foreach.hpp>
@@ -30,6 +32,141 @@ namespace fs = boost::filesystem;
 
 typedef boost::numeric::converter<unsigned, double> Double2Unsigned;
 
+namespace
+{
+  typedef sot::Trajectory::vector_t vector_t;
+  typedef sot::Trajectory::value_type value_type;
+
+  /// \brief Maximum number of control steps between two samples
+  ///        kept by the compression.
+  static const size_t MAX_COMPRESSED_GAP = 200;
+
+  bool isHomogeneousMatrix (const vector_t& v)
+  {
+    return v.size () == 16
+      && std::fabs (v[12]) < 1e-9 && std::fabs (v[13]) < 1e-9
+      && std::fabs (v[14]) < 1e-9 && std::fabs (v[15] - 1.) < 1e-9;
+  }
+
+  bool isRotationIndex (size_t i)
+  {
+    return i < 12 && i % 4 != 3;
+  }
+
+  /// \brief Convert the rotation of a row-major homogeneous matrix
+  ///        into a unit quaternion (w, x, y, z).
+  void rotationToQuaternion (const vector_t& m, double q[4])
+  {
+    const double trace = m[0] + m[5] + m[10];
+    if (trace > 0.)
+      {
+	const double s = 2. * std::sqrt (trace + 1.);
+	q[0] = .25 * s;
+	q[1] = (m[9] - m[6]) / s;
+	q[2] = (m[2] - m[8]) / s;
+	q[3] = (m[4] - m[1]) / s;
+      }
+    else if (m[0] > m[5] && m[0] > m[10])
+      {
+	const double s = 2. * std::sqrt (1. + m[0] - m[5] - m[10]);
+	q[0] = (m[9] - m[6]) / s;
+	q[1] = .25 * s;
+	q[2] = (m[1] + m[4]) / s;
+	q[3] = (m[2] + m[8]) / s;
+      }
+    else if (m[5] > m[10])
+      {
+	const double s = 2. * std::sqrt (1. + m[5] - m[0] - m[10]);
+	q[0] = (m[2] - m[8]) / s;
+	q[1] = (m[1] + m[4]) / s;
+	q[2] = .25 * s;
+	q[3] = (m[6] + m[9]) / s;
+      }
+    else
+      {
+	const double s = 2. * std::sqrt (1. + m[10] - m[0] - m[5]);
+	q[0] = (m[4] - m[1]) / s;
+	q[1] = (m[2] + m[8]) / s;
+	q[2] = (m[6] + m[9]) / s;
+	q[3] = .25 * s;
+      }
+  }
+
+  /// \brief Write the rotation matrix of a unit quaternion into a
+  ///        row-major homogeneous matrix.
+  void quaternionToRotation (const double q[4], vector_t& m)
+  {
+    const double w = q[0], x = q[1], y = q[2], z = q[3];
+    m[0] = 1. - 2. * (y * y + z * z);
+    m[1] = 2. * (x * y - z * w);
+    m[2] = 2. * (x * z + y * w);
+    m[4] = 2. * (x * y + z * w);
+    m[5] = 1. - 2. * (x * x + z * z);
+    m[6] = 2. * (y * z - x * w);
+    m[8] = 2. * (x * z - y * w);
+    m[9] = 2. * (y * z + x * w);
+    m[10] = 1. - 2. * (x * x + y * y);
+  }
+
+  /// \brief Interpolate the rotations of two homogeneous matrices
+  ///        (SLERP) and write it into result.
+  void slerpRotation (vector_t& result,
+		      const vector_t& a, const vector_t& b,
+		      const value_type& u)
+  {
+    double qa[4];
+    double qb[4];
+    rotationToQuaternion (a, qa);
+    rotationToQuaternion (b, qb);
+
+    double cosTheta = 0.;
+    for (unsigned i = 0; i < 4; ++i)
+      cosTheta += qa[i] * qb[i];
+
+    // Take the shortest path.
+    if (cosTheta < 0.)
+      {
+	cosTheta = -cosTheta;
+	for (unsigned i = 0; i < 4; ++i)
+	  qb[i] = -qb[i];
+      }
+
+    double wa = 1. - u;
+    double wb = u;
+    if (cosTheta < 1. - 1e-6)
+      {
+	const double theta = std::acos (cosTheta);
+	const double sinTheta = std::sin (theta);
+	wa = std::sin ((1. - u) * theta) / sinTheta;
+	wb = std::sin (u * theta) / sinTheta;
+      }
+
+    double q[4];
+    double norm = 0.;
+    for (unsigned i = 0; i < 4; ++i)
+      {
+	q[i] = wa * qa[i] + wb * qb[i];
+	norm += q[i] * q[i];
+      }
+    norm = std::sqrt (norm);
+    for (unsigned i = 0; i < 4; ++i)
+      q[i] /= norm;
+
+    quaternionToRotation (q, result);
+  }
+
+  void linearInterpolation (vector_t& result,
+			    const vector_t& a, const vector_t& b,
+			    const value_type& u, bool homogeneous)
+  {
+    for (size_t i = 0; i < a.size (); ++i)
+      if (!homogeneous || !isRotationIndex (i))
+	result[i] = (1. - u) * a[i] + u * b[i];
+    if (homogeneous)
+      slerpRotation (result, a, b, u);
+  }
+} // end of anonymous namespace.
+
 namespace sot
 {
   DiscretizedTrajectory::DiscretizedTrajectory
@@ -38,8 +175,15 @@ namespace sot
    std::string name) throw ()
     : Trajectory (data.empty () ? 0 : data[0].size (), name),
       range_ (range),
-      discretizedData_ (data)
+      discretizedData_ (data),
+      times_ (),
+      size_ (data.size ()),
+      interpolation_ (INTERPOLATION_NEAREST),
+      homogeneous_ (!data.empty ())
   {
+    for (size_t i = 0; homogeneous_ && i < data.size (); ++i)
+      homogeneous_ = isHomogeneousMatrix (data[i]);
+
     assert (getStep (range_) > 0.);
     assert (getUpperBound (range) >= getLowerBound (range));
 
@@ -56,7 +200,11 @@ namespace sot
   (const DiscretizedTrajectory& traj) throw ()
     : Trajectory (traj.outputSize (), traj.getName ()),
       range_ (traj.range_),
-      discretizedData_ (traj.discretizedData_)
+      discretizedData_ (traj.discretizedData_),
+      times_ (traj.times_),
+      size_ (traj.size_),
+      interpolation_ (traj.interpolation_),
+      homogeneous_ (traj.homogeneous_)
   {}
 
   DiscretizedTrajectory
@@ -123,6 +271,123 @@ namespace sot
   DiscretizedTrajectory::~DiscretizedTrajectory () throw ()
   {}
 
+  DiscretizedTrajectory::Interpolation
+  DiscretizedTrajectory::stringToInterpolation (const std::string& str)
+  {
+    if (str == "nearest")
+      return INTERPOLATION_NEAREST;
+    if (str == "linear")
+      return INTERPOLATION_LINEAR;
+    if (str == "cubic")
+      return INTERPOLATION_CUBIC;
+    throw std::runtime_error ("invalid interpolation: " + str);
+  }
+
+  void
+  DiscretizedTrajectory::compress (const value_type& tolerance)
+  {
+    const size_t n = discretizedData_.size ();
+    if (n < 3)
+      return;
+
+    std::vector<size_t> kept;
+    kept.push_back (0);
+
+    vector_t interpolated (outputSize ());
+    size_t start = 0;
+    for (size_t end = 2; end < n; ++end)
+      {
+	bool valid = end - start <= MAX_COMPRESSED_GAP;
+
+	const value_type t0 = sampleTime (start);
+	const value_type dt = sampleTime (end) - t0;
+	for (size_t k = start + 1; valid && k < end; ++k)
+	  {
+	    linearInterpolation (interpolated,
+				 discretizedData_[start], discretizedData_[end],
+				 (sampleTime (k) - t0) / dt, homogeneous_);
+	    for (size_t i = 0; valid && i < interpolated.size (); ++i)
+	      valid = std::fabs (interpolated[i] - discretizedData_[k][i])
+		<= tolerance;
+	  }
+
+	if (!valid)
+	  {
+	    start = end - 1;
+	    kept.push_back (start);
+	  }
+      }
+    kept.push_back (n - 1);
+
+    discretizedData_t data;
+    times_t times;
+    data.reserve (kept.size ());
+    times.reserve (kept.size ());
+    for (size_t i = 0; i < kept.size (); ++i)
+      {
+	data.push_back (discretizedData_[kept[i]]);
+	times.push_back (sampleTime (kept[i]));
+      }
+    discretizedData_.swap (data);
+    times_.swap (times);
+
+    // The nearest sample is meaningless once samples have been dropped.
+    if (interpolation_ == INTERPOLATION_NEAREST)
+      interpolation_ = INTERPOLATION_LINEAR;
+  }
+
+  DiscretizedTrajectory::value_type
+  DiscretizedTrajectory::sampleTime (size_t i) const
+  {
+    if (times_.empty ())
+      return getLowerBound (range_) + i * getStep (range_);
+    return times_[i];
+  }
+
+  void
+  DiscretizedTrajectory::interpolate (result_t& result, size_t i,
+				      const value_type& u,
+				      Interpolation interpolation) const
+  {
+    const vector_t& a = discretizedData_[i];
+    const vector_t& b = discretizedData_[i + 1];
+
+    if (interpolation == INTERPOLATION_NEAREST)
+      {
+	result = u < .5 ? a : b;
+	return;
+      }
+    if (interpolation == INTERPOLATION_LINEAR)
+      {
+	linearInterpolation (result, a, b, u, homogeneous_);
+	return;
+      }
+
+    // Catmull-Rom spline, the tangents are given by the neighbours.
+    const size_t previous = i > 0 ? i - 1 : i;
+    const size_t next = i + 2 < discretizedData_.size () ? i + 2 : i + 1;
+    const vector_t& p0 = discretizedData_[previous];
+    const vector_t& p3 = discretizedData_[next];
+
+    const value_type dt = sampleTime (i + 1) - sampleTime (i);
+    const value_type s0 = dt / (sampleTime (i + 1) - sampleTime (previous));
+    const value_type s1 = dt / (sampleTime (next) - sampleTime (i));
+
+    const value_type u2 = u * u;
+    const value_type u3 = u2 * u;
+    const value_type h00 = 2. * u3 - 3. * u2 + 1.;
+    const value_type h10 = u3 - 2. * u2 + u;
+    const value_type h01 = -2. * u3 + 3. * u2;
+    const value_type h11 = u3 - u2;
+
+    for (size_t k = 0; k < a.size (); ++k)
+      if (!homogeneous_ || !isRotationIndex (k))
+	result[k] = h00 * a[k] + h01 * b[k]
+	  + h10 * s0 * (b[k] - p0[k]) + h11 * s1 * (p3[k] - a[k]);
+    if (homogeneous_)
+      slerpRotation (result, a, b, u);
+  }
+
   void
   DiscretizedTrajectory::impl_compute (result_t& result,
 				       const value_type& t)
@@ -131,8 +396,34 @@ namespace sot
     assert (t >= getLowerBound (range_));
     assert (t <= getUpperBound (range_));
 
-    unsigned idx = Double2Unsigned::convert (round (t / getStep(range_)));
+    const size_t n = discretizedData_.size ();
+    const value_type lower = getLowerBound (range_);
+    const value_type step = getStep (range_);
+
+    if (times_.empty () && interpolation_ == INTERPOLATION_NEAREST)
+      {
+	unsigned idx =
+	  Double2Unsigned::convert (round ((t - lower) / step));
+	result = discretizedData_[std::min<size_t> (idx, n - 1)];
+	return;
+      }
+
+    // Find the sample i such as t(i) <= t < t(i + 1).
+    size_t i = 0;
+    if (times_.empty ())
+      i = Double2Unsigned::convert (std::floor ((t - lower) / step));
+    else
+      i = std::upper_bound (times_.begin (), times_.end (), t)
+	- times_.begin () - 1;
+
+    if (i + 1 >= n)
+      {
+	result = discretizedData_[n - 1];
+	return;
+      }
 
-    result = discretizedData_[idx];
+    const value_type t0 = sampleTime (i);
+    const value_type u = (t - t0) / (sampleTime (i + 1) - t0);
+    interpolate (result, i, u, interpolation_);
   }
 } // end of namespace sot.
@@ -15,16 +15,37 @@
 
 #ifndef SOT_MOTION_PLANNER_DISCRETIZED_TRAJECTORY_HH
 # define SOT_MOTION_PLANNER_DISCRETIZED_TRAJECTORY_HH
+# include <vector>
 # include <boost/filesystem.hpp>
 
 # include "trajectory.hh"
 
 namespace sot
 {
+  /// \brief Trajectory defined by samples.
+  ///
+  /// By default, the trajectory is evaluated by taking the nearest
+  /// sample. Linear and cubic (Catmull-Rom) interpolations are also
+  /// available. Samples of size 16 whose last row is (0, 0, 0, 1)
+  /// are considered as homogeneous matrices (row-major): their
+  /// rotation is interpolated by SLERP and their translation as any
+  /// other vector.
+  ///
+  /// The samples may be compressed: a sample is dropped when the
+  /// linear interpolation of the kept neighbours reproduces it within
+  /// the tolerance. Kept samples then store their time explicitly.
   class DiscretizedTrajectory : public Trajectory
   {
   public:
     typedef std::vector<vector_t> discretizedData_t;
+    typedef std::vector<value_type> times_t;
+
+    enum Interpolation
+      {
+	INTERPOLATION_NEAREST,
+	INTERPOLATION_LINEAR,
+	INTERPOLATION_CUBIC
+      };
 
     DiscretizedTrajectory (const discreteInterval_t& range,
 			   const std::vector<vector_t>& data,
@@ -46,17 +67,65 @@ namespace sot
       return range_;
     }
 
+    /// \brief Number of control steps covered by the trajectory.
     size_t trajectorySize () const
+    {
+      return size_;
+    }
+
+    /// \brief Number of stored samples.
+    size_t sampleCount () const
     {
       return discretizedData_.size ();
     }
 
+    Interpolation interpolation () const
+    {
+      return interpolation_;
+    }
+
+    void setInterpolation (Interpolation interpolation)
+    {
+      interpolation_ = interpolation;
+    }
+
+    /// \brief Are the samples homogeneous matrices?
+    bool isHomogeneous () const
+    {
+      return homogeneous_;
+    }
+
+    /// \brief Drop the samples which can be linearly interpolated
+    ///        from their neighbours.
+    ///
+    /// \param tolerance maximum distance (infinity norm) between a
+    ///        dropped sample and its interpolation.
+    void compress (const value_type& tolerance);
+
+    /// \brief Convert a string (nearest, linear or cubic) into an
+    ///        interpolation mode.
+    static Interpolation stringToInterpolation (const std::string& str);
+
   private:
     virtual void impl_compute (result_t& result, const value_type& t)
       const throw ();
 
+    /// \brief Time of the i-th stored sample.
+    value_type sampleTime (size_t i) const;
+
+    /// \brief Interpolate between the samples i and i + 1.
+    ///
+    /// \param u normalized time in [0, 1].
+    void interpolate (result_t& result, size_t i, const value_type& u,
+		      Interpolation interpolation) const;
+
     discreteInterval_t range_;
     discretizedData_t discretizedData_;
+    /// \brief Sample times, empty if the samples are regularly spaced.
+    times_t times_;
+    size_t size_;
+    Interpolation interpolation_;
+    bool homogeneous_;
   };
 
 } // end of namespace sot.
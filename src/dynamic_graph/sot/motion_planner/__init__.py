@@ -23,4 +23,6 @@ from feet_follower import \
     FeetFollowerFromFile, FeetFollowerAnalyticalPg, PostureError, \
     FeetFollowerWithCorrection, Randomizer, ErrorEstimator, ErrorMerger, \
     WaistYaw, VirtualSensor, RobotPositionFromVisp, VispPointProjection, \
-    Supervisor, LegsFollower, LegsError, WaistError
+    VispPointsProjection, Supervisor, LegsFollower, LegsError, WaistError, \
+    EventLogger, ConvergenceMonitor, SensorRecorder, SensorReplay, \
+    SensorStandIn, Clock
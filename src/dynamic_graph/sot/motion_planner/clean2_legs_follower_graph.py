@@ -197,8 +197,8 @@ class LegsFollowerGraph(object):
     
     def canStart(self):
         securityThreshold = 1e-3
-        return (self.postureTask.error.value <=
-                (securityThreshold,) * len(self.postureTask.error.value))
+        return (max(map(abs, self.postureTask.error.value))
+                <= securityThreshold)
 
     def setupTrace(self):
 	self.trace = TracerRealTime('trace')
@@ -196,11 +196,25 @@ class RandomErrorEstimationStrategy(ErrorEstimationStrategy):
     Compute an error randomly.
     """
 
-    def __init__(self, feetFollowerWithCorrection):
-        ErrorEstimatorStrategy.__init__(self, feetFollowerWithCorrection)
+    """
+    Body whose planned position is corrected.
+    """
+    localizationPlannedBody = 'waist'
+
+    """
+    Seed of the random error, a given seed always generates the same
+    error sequence.
+    """
+    seed = 0
+
+    def __init__(self, feetFollowerWithCorrection, robot, corba = None):
+        ErrorEstimationStrategy.__init__(self,
+                                         robot, feetFollowerWithCorrection)
 
-        self.errorEstimator = Randomizer('r')
+        self.errorEstimator = Randomizer(
+            feetFollowerWithCorrection.entityName('randomizer'))
         self.errorEstimator.addSignal('error', 3)
+        self.errorEstimator.setSeed('error', self.seed)
 
     def start(self):
         return True
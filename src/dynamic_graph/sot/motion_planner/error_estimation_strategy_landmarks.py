@@ -16,54 +16,157 @@
 # dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import print_function
+import numpy as np
+
 from dynamic_graph.sot.motion_planner import Localizer
+from dynamic_graph.sot.motion_planner.math import matrixToTuple
 
-from dynamic_graph.sot.motion_planner.error_estimator_strategy \
+from dynamic_graph.sot.motion_planner.error_estimation_strategy \
     import ErrorEstimationStrategy
 
-class MotionCaptureErrorEstimationStrategy(ErrorEstimationStrategy):
+class LandmarkErrorEstimationStrategy(ErrorEstimationStrategy):
     """
     Use a landmark based localization system to estimate the error.
+
+    Landmark observations are handled by groups. A group of N
+    observations is registered in one call and all its signals are
+    then refreshed in bulk: one localizer command per signal kind
+    instead of one signal write per observation.
+
+    Arrays follow the conventions below (N is the number of
+    observations of the group, d the feature dimension, s the sensor
+    position dimension and q the configuration dimension):
+
+    - feature positions and weights: (N, d),
+    - feature Jacobians: (N, d, s),
+    - sensor Jacobians: (N, s, q) or (s, q) if shared by all
+      observations,
+    - corrected DoFs: (N, q) or (q,) if shared by all observations.
+
+    The localizer error signal is the (x, y, theta) error expected
+    by the feet follower, it requires the corrected DoFs to be x, y
+    and yaw.
+    """
+
+    """
+    Body whose planned position is corrected.
     """
+    localizationPlannedBody = 'waist'
 
     """
-    CORBA server used to received the perceived positions.
+    Default corrected DoFs: x, y and yaw only.
     """
-    corba = None
+    correctedDofs = (1., 1., 0., 0., 0., 1.) + 30 * (0.,)
 
-    def __init__(self, feetFollowerWithCorrection, robot, corba = None):
+    def __init__(self, feetFollowerWithCorrection, robot,
+                 name = 'localizer'):
         ErrorEstimationStrategy.__init__(self,
                                          robot, feetFollowerWithCorrection)
 
-        # Create CORBA server if required.
-        if not corba:
-            corba = CorbaServer('corba_server')
-        self.corba = corba
-
-        # Select, X Y, yaw only!
-        correctedDofs = (1., 1., 0., 0., 0., 1.) + 30 * (0.,)
-
-        self.errorEstimator = Localizer('localizer')
-
-        #self.errorEstimator.add_landmark_observation(obsName+str(i))
-        #self.errorEstimator.signal(obsName + '_JfeatureReferencePosition').value = 
-        #self.errorEstimator.signal(obsName + '_JsensorPosition').value = 
-        #self.errorEstimator.signal(obsName + '_weight').value =
-
-        #self.errorEstimator.signal(obsName + '_featureObservedPosition').value =
-        #self.errorEstimator.signal(obsName + '_featureReferencePosition').value =
+        self.errorEstimator = Localizer(
+            feetFollowerWithCorrection.entityName(name))
 
-        # Select (x, y, yaw) only!
-        #self.errorEstimator.signal(obsName + '_correctedDofs').value = correctedDofs
+        """
+        Registered groups: prefix -> number of observations.
+        """
+        self.groups = {}
 
     def __str__(self):
-        return "error estimation using landmarks"
+        return "error estimation using landmarks ({0} observation(s))".format(
+            sum(self.groups.values()))
+
+    @staticmethod
+    def tile(a, size, ndim):
+        """Repeat an array shared by all the observations."""
+        a = np.asarray(a, dtype = float)
+        if a.ndim == ndim - 1:
+            a = np.tile(a, (size,) + (1,) * a.ndim)
+        if a.ndim != ndim or a.shape[0] != size:
+            raise RuntimeError('invalid array shape {0}'.format(a.shape))
+        return a
+
+    def setVectors(self, prefix, signal, values):
+        values = self.tile(values, self.groups[prefix], 2)
+        self.errorEstimator.set_landmark_vectors(
+            prefix, signal, matrixToTuple(values))
+
+    def setMatrices(self, prefix, signal, values):
+        values = self.tile(values, self.groups[prefix], 3)
+        (n, rows, cols) = values.shape
+        self.errorEstimator.set_landmark_matrices(
+            prefix, signal, matrixToTuple(values.reshape(n * rows, cols)))
+
+    def addLandmarks(self, prefix,
+                     featureReferencePositions,
+                     JfeatureReferencePositions,
+                     JsensorPositions,
+                     weights = None,
+                     correctedDofs = None):
+        """
+        Register a group of landmark observations.
+
+        Observed positions are initialized to the reference positions
+        so that the initial error is null.
+        """
+        if prefix in self.groups:
+            raise RuntimeError(
+                'landmark group \'{0}\' already exists'.format(prefix))
+        featureReferencePositions = \
+            np.asarray(featureReferencePositions, dtype = float)
+        size = featureReferencePositions.shape[0]
+
+        if weights is None:
+            weights = np.ones(featureReferencePositions.shape)
+        if correctedDofs is None:
+            correctedDofs = self.correctedDofs
+
+        self.errorEstimator.add_landmark_observations(prefix, size)
+        self.groups[prefix] = size
+
+        self.setMatrices(prefix, 'JsensorPosition', JsensorPositions)
+        self.setMatrices(prefix, 'JfeatureReferencePosition',
+                         JfeatureReferencePositions)
+        self.setVectors(prefix, 'weight', weights)
+        self.setVectors(prefix, 'correctedDofs', correctedDofs)
+        self.setVectors(prefix, 'featureReferencePosition',
+                        featureReferencePositions)
+        self.setVectors(prefix, 'featureObservedPosition',
+                        featureReferencePositions)
+
+    def update(self, prefix,
+               featureObservedPositions,
+               featureReferencePositions = None,
+               JfeatureReferencePositions = None,
+               JsensorPositions = None,
+               weights = None):
+        """
+        Refresh a group of landmark observations.
+
+        Only the provided arrays are sent to the localizer, the other
+        signals keep their previous values.
+        """
+        if not prefix in self.groups:
+            raise RuntimeError(
+                'unknown landmark group \'{0}\''.format(prefix))
+
+        self.setVectors(prefix, 'featureObservedPosition',
+                        featureObservedPositions)
+        if featureReferencePositions is not None:
+            self.setVectors(prefix, 'featureReferencePosition',
+                            featureReferencePositions)
+        if JfeatureReferencePositions is not None:
+            self.setMatrices(prefix, 'JfeatureReferencePosition',
+                             JfeatureReferencePositions)
+        if JsensorPositions is not None:
+            self.setMatrices(prefix, 'JsensorPosition', JsensorPositions)
+        if weights is not None:
+            self.setVectors(prefix, 'weight', weights)
 
     def start(self):
-        pass
+        return len(self.groups) > 0
 
     def interactiveStart(self):
-        pass
+        return self.start()
 
 
-__all__ = ["MotionCaptureErrorEstimationStrategy"]
+__all__ = ["LandmarkErrorEstimationStrategy"]
@@ -105,6 +105,8 @@ class FeetFollowerGraphWithCorrection(FeetFollowerGraph):
         self.postureTask = feetFollowerGraph.postureTask
         self.postureFeature = feetFollowerGraph.postureFeature
         self.trace = feetFollowerGraph.trace
+        self.convergenceMonitor = feetFollowerGraph.convergenceMonitor
+        self.namespace = feetFollowerGraph.namespace
 
         self.solver = solver
         self.robot = robot
@@ -120,7 +122,8 @@ class FeetFollowerGraphWithCorrection(FeetFollowerGraph):
         self.referenceTrajectory = self.feetFollower
 
         # Create the correction entity.
-        self.feetFollower = FeetFollowerWithCorrection('correction')
+        self.feetFollower = FeetFollowerWithCorrection(
+            self.entityName('correction'))
 
         # Set the reference trajectory.
         self.feetFollower.setReferenceTrajectory(self.referenceTrajectory.name)
@@ -181,7 +184,7 @@ class FeetFollowerGraphWithCorrection(FeetFollowerGraph):
         self.feetFollowerGraph.setupTrace()
         for s in self.tracedSignals['FeetFollower']:
             addTrace(self.robot, self.trace, self.referenceTrajectory.name, s)
-        for s in self.tracedSignals['FeetFollower'] + ['offset']:
+        for s in self.tracedSignals['FeetFollower'] + ['offset', 'phase']:
             addTrace(self.robot, self.trace, self.feetFollower.name, s)
         for s in ['error']:
             addTrace(self.robot, self.trace,
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of dynamic-graph.
+# dynamic-graph is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# dynamic-graph is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import SocketServer
+import threading
+
+class FootstepStream(object):
+    """
+    Append footsteps to a walk generated by windows.
+
+    The feet follower must be a FeetFollowerAnalyticalPg entity whose
+    window size has been set. Steps can be given as 7-tuples (see
+    FeetFollowerAnalyticalPg.pushStep) or as dictionaries using the
+    motion plan footstep format.
+    """
+
+    """
+    Default step parameters, used for missing dictionary keys.
+    """
+    defaultSlides = (-1.52, -0.76)
+    defaultHorizontalDistance = 0.24
+    defaultHeight = 0.25
+
+    def __init__(self, feetFollower):
+        self.feetFollower = feetFollower
+
+    def __str__(self):
+        return "footstep stream ({0} pending step(s))".format(self.pending())
+
+    def makeStep(self, step):
+        if not isinstance(step, dict):
+            if len(step) != 7:
+                raise RuntimeError('invalid step {0}'.format(step))
+            return tuple(float(v) for v in step)
+        return (step.get('slide1', self.defaultSlides[0]),
+                step.get('horizontal-distance',
+                         self.defaultHorizontalDistance),
+                step.get('height', self.defaultHeight),
+                step.get('slide2', self.defaultSlides[1]),
+                step.get('x', 0.), step.get('y', 0.),
+                step.get('theta', 0.))
+
+    def push(self, step):
+        self.feetFollower.pushStep(self.makeStep(step))
+
+    def extend(self, steps):
+        for step in steps:
+            self.push(step)
+
+    def flush(self):
+        """
+        Generate the remaining steps, the walk stops after them.
+        """
+        self.feetFollower.flushSteps()
+
+    def pending(self):
+        return self.feetFollower.getPendingSteps()
+
+class FootstepRequestHandler(SocketServer.StreamRequestHandler):
+    """
+    Read one step per line.
+
+    A line contains either the seven step parameters or only x, y
+    and theta. The 'flush' line ends the walk.
+    """
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line == 'flush':
+                self.server.stream.flush()
+                continue
+            try:
+                values = [float(v) for v in line.split()]
+                if len(values) == 3:
+                    values = {'x': values[0],
+                              'y': values[1],
+                              'theta': values[2]}
+                self.server.stream.push(values)
+            except (ValueError, RuntimeError) as e:
+                self.wfile.write('error: {0}\n'.format(e))
+
+class FootstepServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    """
+    Local stand-in for an external footstep planner.
+
+    Steps sent to the socket are appended to the stream. The server
+    runs in a daemon thread.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, stream, port, host = 'localhost'):
+        SocketServer.TCPServer.__init__(self, (host, port),
+                                        FootstepRequestHandler)
+        self.stream = stream
+        self.thread = threading.Thread(target = self.serve_forever)
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+__all__ = ["FootstepStream", "FootstepServer"]
@@ -23,7 +23,7 @@ import numpy as np
 from dynamic_graph import plug
 from dynamic_graph.ros import RosExport
 from dynamic_graph.sot.motion_planner.feet_follower import \
-    Supervisor
+    EventLogger, SensorRecorder, SensorReplay, Supervisor
 from dynamic_graph.sot.motion_planner.feet_follower_graph_with_correction \
     import FeetFollowerGraphWithCorrection
 
@@ -34,7 +34,10 @@ from dynamic_graph.corba_server import CorbaServer
 from dynamic_graph.sot.motion_planner.motion_plan.control import *
 from dynamic_graph.sot.motion_planner.motion_plan.environment import *
 from dynamic_graph.sot.motion_planner.motion_plan.error_strategy import *
+from dynamic_graph.sot.motion_planner.motion_plan.footstep_compiler import *
 from dynamic_graph.sot.motion_planner.motion_plan.motion import *
+from dynamic_graph.sot.motion_planner.motion_plan.spatial_index import *
+from dynamic_graph.sot.motion_planner.motion_plan.stand_in import *
 from dynamic_graph.sot.motion_planner.motion_plan.tools import *
 
 def initializeLogging():
@@ -56,6 +59,56 @@ def initializeLogging():
     logger.addHandler(ch)
     return logger
 
+# The real-time event log is a single-consumer ring (see EventLog): it
+# is drained by one event logger shared by all the plans of the
+# process. Drained events are dispatched to the plans whose namespace
+# prefixes their source, see subscribeEvents.
+_eventLogger = None
+_eventSubscribers = []
+
+def dispatchEvents():
+    """
+    Move the events drained by the shared event logger to the pending
+    events of the subscribed plans.
+    """
+    if not _eventLogger:
+        return
+    for line in _eventLogger.fetch().splitlines():
+        # Events are formatted as 'time type source ...'.
+        fields = line.split(' ', 3)
+        source = fields[2] if len(fields) > 2 else ''
+        for plan in _eventSubscribers:
+            if source.startswith(plan.entityName('')):
+                plan.pendingEvents.append(line)
+
+def subscribeEvents(plan):
+    """
+    Start forwarding the real-time events to a plan.
+
+    The first subscriber opens the shared event logger on its event
+    log file, the next ones share this file.
+    """
+    global _eventLogger
+    if not _eventSubscribers:
+        if not _eventLogger:
+            _eventLogger = EventLogger('event_logger')
+        _eventLogger.open(plan.eventLogFile)
+    plan.pendingEvents = []
+    _eventSubscribers.append(plan)
+    return _eventLogger
+
+def unsubscribeEvents(plan):
+    """
+    Stop forwarding the real-time events to a plan, the shared event
+    logger is closed when the last subscriber leaves.
+    """
+    if not plan in _eventSubscribers:
+        return
+    if len(_eventSubscribers) == 1:
+        _eventLogger.close()
+    dispatchEvents()
+    _eventSubscribers.remove(plan)
+
 
 class MotionPlan(object):
     robot = None
@@ -75,18 +128,72 @@ class MotionPlan(object):
 
     trace = None
 
+    """
+    Event logger shared by all the plans (see subscribeEvents). Its
+    log file is the one of the first plan, pendingEvents are the
+    events of this plan not forwarded yet (see flushEvents).
+    """
+    eventLogger = None
+    eventLogFile = '/tmp/motion-plan-events.log'
+    pendingEvents = []
+
+    sensorRecorder = None
+    sensorRecordFile = None
+    sensorReplay = None
+    sensorStandIn = None
+
     started = False
 
+    """
+    Index of the environment used to check the footsteps clearance
+    (see checkClearance), None if the plan has no environment.
+    """
+    spatialIndex = None
+    clearanceMargin = 0.02
+    swingSamples = 5
+    footstepModel = 'left-footstep.py'
+    clearanceFootsteps = None
+    clearanceCollisions = []
+
+    """
+    Prefix of the entities names (see prefixEntityName).
+    """
+    namespace = ''
+
     maxX = FeetFollowerGraphWithCorrection.maxX
     maxY = FeetFollowerGraphWithCorrection.maxY
     maxTheta = FeetFollowerGraphWithCorrection.maxTheta
 
     def __init__(self, filename, robot, solver, defaultDirectories,
-                 logger = None):
+                 logger = None, recordSensors = None, replaySensors = None,
+                 standIn = None, namespace = None):
+        """
+        If namespace is set, the name of every entity created by the
+        plan is prefixed by it so that several plans can coexist in
+        the same process (see teardown).
+
+        If recordSensors is set, the sensor streams used by the
+        control elements are recorded into this file (see
+        dumpSensors). If replaySensors is set, they are read from a
+        previous recording instead of the middlewares.
+
+        If standIn is set, the streams defined by this scenario file
+        are simulated instead of being read from the middlewares
+        (see SensorStandInScenario).
+        """
         if not logger:
             logger = initializeLogging()
 
         self.defaultDirectories = defaultDirectories
+        if namespace:
+            self.namespace = namespace
+            self.eventLogFile = \
+                '/tmp/{0}-motion-plan-events.log'.format(namespace)
+
+        self.motion = []
+        self.control = []
+        self.footsteps = []
+        self.environment = {}
 
         self.robot = robot
         self.solver = solver
@@ -99,23 +206,48 @@ class MotionPlan(object):
         self.duration = float(self.plan['duration'])
 
         # Middleware proxies.
-        self.corba = CorbaServer('corba_server')
-        self.ros = RosExport('rosExport')
+        self.corba = CorbaServer(self.entityName('corba_server'))
+        self.ros = RosExport(self.entityName('rosExport'))
+
+        # Real-time events are drained by a background thread and
+        # forwarded to the Python logger by flushEvents.
+        self.eventLogger = subscribeEvents(self)
+
+        # Sensor streams, see sensorSignal.
+        self.sensorStreams = {}
+        if replaySensors and recordSensors:
+            raise RuntimeError('cannot record sensors while replaying them')
+        if replaySensors:
+            self.logger.info(
+                'replaying sensors from \'{0}\''.format(replaySensors))
+            self.sensorReplay = SensorReplay(self.entityName('sensor_replay'))
+            self.sensorReplay.load(replaySensors)
+        if recordSensors:
+            self.sensorRecorder = SensorRecorder(
+                self.entityName('sensor_recorder'))
+            self.sensorRecordFile = recordSensors
+            self.robot.device.after.addSignal(
+                self.sensorRecorder.name + '.trigger')
 
         # Supervisor.
-        self.supervisor = Supervisor('supervisor')
+        self.supervisor = Supervisor(self.entityName('supervisor'))
         self.robot.device.after.addSignal(self.supervisor.name + '.trigger')
         self.supervisor.setSolver(self.solver.sot.name)
 
         # Load plan.
         self.logger.debug('loading environment')
         self.loadEnvironment()
+        if standIn:
+            self.logger.info(
+                'simulating sensors using \'{0}\''.format(standIn))
+            self.sensorStandIn = SensorStandInScenario(
+                self, standIn, defaultDirectories)
         self.logger.debug('loading motion elements')
         self.loadMotion()
         self.logger.debug('loading control elements')
         self.loadControl()
 
-        # For now, only 1 feet follower is allowed (must start at t=0).
+        # All the walks share the feet follower of the first one.
         feetFollowerElement = find(lambda e: type(e) == MotionWalk, self.motion)
         hasControl = len(self.control) > 0
 
@@ -126,10 +258,17 @@ class MotionPlan(object):
         for m in self.motion:
             if type(m) == MotionVisualPoint:
                 # FIXME: this is so wrong.
-                plug(self.ros.signal(m.objectName),
+                plug(self.sensorSignal(self.ros, 'matrixHomo', m.objectName),
                      m.vispPointProjection.cMo)
-                plug(self.ros.signal(m.objectName + 'Timestamp'),
+                plug(self.sensorSignal(self.ros, 'timestamp',
+                                       m.objectName + 'Timestamp'),
                      m.vispPointProjection.cMoTimestamp)
+            if type(m) == MotionVisualPoints:
+                plug(self.sensorSignal(self.ros, 'matrixHomo', m.objectName),
+                     m.projection.cMo)
+                plug(self.sensorSignal(self.ros, 'timestamp',
+                                       m.objectName + 'Timestamp'),
+                     m.projection.cMoTimestamp)
 
         if hasControl and feetFollowerElement:
             self.feetFollower = FeetFollowerGraphWithCorrection(
@@ -146,8 +285,18 @@ class MotionPlan(object):
         else:
             self.feetFollower = None
 
+        if self.feetFollower and 'convergence-timeout' in self.plan:
+            self.feetFollower.setConvergenceTimeout(
+                float(self.plan['convergence-timeout']))
+
+        self.logger.debug('loading spatial index')
+        self.loadSpatialIndex()
+
         self.logger.debug('motion plan created with success')
 
+    def entityName(self, name):
+        return prefixEntityName(self.namespace, name)
+
     def loadEnvironment(self):
         if not 'environment' in self.plan:
             return
@@ -159,6 +308,72 @@ class MotionPlan(object):
                 EnvironmentObject(self, obj['object'])
             self.logger.debug('adding object \'{0}\''.format(obj['object']['name']))
 
+    def loadSpatialIndex(self):
+        """
+        Index the environment and check the planned footsteps.
+
+        The optional clearance key of the plan sets the safety margin
+        around the feet, the number of points checked along each
+        swing, the size of the grid cells and whether a collision
+        makes the loading fail (strict) or is only reported.
+        """
+        if not self.environment or not self.feetFollower:
+            return
+        clearance = self.plan.get('clearance') or {}
+        self.clearanceMargin = float(
+            clearance.get('margin', self.clearanceMargin))
+        self.swingSamples = int(
+            clearance.get('swing-samples', self.swingSamples))
+
+        radius = footRadius(
+            searchFile(self.footstepModel, self.defaultDirectories))
+        self.spatialIndex = SpatialIndex.fromEnvironment(
+            self.environment, self.defaultDirectories,
+            radius + self.clearanceMargin, clearance.get('cell-size'))
+
+        self.clearanceFootsteps = None
+        self.clearanceCollisions = []
+        collisions = self.checkClearance(makeFootsteps(self.footsteps))
+        if collisions and clearance.get('strict', False):
+            raise RuntimeError('planned footsteps collide with the environment')
+
+    def checkClearance(self, footsteps = None):
+        """
+        Check the footsteps and the swing ankle paths against the
+        environment and return the collisions (see
+        SpatialIndex.checkFootsteps).
+
+        By default, the footsteps currently followed are checked,
+        i.e. the corrected ones when the walk is corrected. The check
+        only runs again when they change, hence this can be called at
+        each iteration to check each online correction. New
+        collisions are reported by the logger.
+        """
+        if not self.spatialIndex:
+            return []
+        if footsteps is None:
+            footsteps = makeFootsteps(self.footsteps)
+            if type(self.feetFollower) == FeetFollowerGraphWithCorrection:
+                signal = self.feetFollower.feetFollower.dbgFootsteps
+                signal.recompute(signal.time + 1)
+                footsteps = signal.value
+        footsteps = tuple(footsteps)
+        if footsteps == self.clearanceFootsteps:
+            return self.clearanceCollisions
+
+        start = self.robot.dynamic.signal('right-ankle').value
+        (x, y, z, theta) = HomogeneousMatrixToXYZTheta(start)
+        collisions = self.spatialIndex.checkFootsteps(
+            footsteps, (x, y, theta), self.swingSamples)
+        for collision in collisions:
+            if not collision in self.clearanceCollisions:
+                self.logger.warning(
+                    'step {0} collides with \'{1}\' ({2})'.format(
+                        *collision))
+        self.clearanceFootsteps = footsteps
+        self.clearanceCollisions = collisions
+        return collisions
+
     def loadMotion(self):
         if not 'motion' in self.plan or not self.plan['motion']:
             return
@@ -168,7 +383,8 @@ class MotionPlan(object):
             self.maxY = self.plan['maximum-correction-per-step']['y']
             self.maxTheta = self.plan['maximum-correction-per-step']['theta']
 
-        motionClasses = [MotionWalk, MotionJoint, MotionTask, MotionVisualPoint]
+        motionClasses = [MotionWalk, MotionJoint, MotionTask, MotionVisualPoint,
+                         MotionVisualPoints]
 
         for motion in self.plan['motion']:
             if len(motion.items()) != 1:
@@ -180,6 +396,9 @@ class MotionPlan(object):
                 raise RuntimeError('invalid motion element')
             self.motion.append(cls(self, data, self.defaultDirectories))
             self.logger.debug('adding motion element \'{0}\''.format(tag))
+            if cls == MotionWalk:
+                self.logger.info(
+                    'footsteps: {0}'.format(self.motion[-1].footstepReport))
 
         if self.trace:
             for motion in self.motion:
@@ -191,7 +410,7 @@ class MotionPlan(object):
             return
 
         controlClasses = [ControlConstant, ControlMocap, ControlViSP,
-                          ControlHueblob, ControlVirtualSensor]
+                          ControlHueblob, ControlVirtualSensor, ControlRandom]
 
         for control in self.plan['control']:
             if len(control.items()) != 1:
@@ -225,10 +444,18 @@ class MotionPlan(object):
             return
         if not self.canStart():
             self.logger.info('failed to start')
+            report = self.convergenceReport()
+            if report:
+                self.logger.info(report)
             return
         self.started = True
         self.logger.info('execution starts')
 
+        if self.sensorRecorder:
+            self.sensorRecorder.start()
+        if self.sensorReplay:
+            self.sensorReplay.start()
+
         if self.feetFollower:
             self.feetFollower.start()
 
@@ -238,6 +465,248 @@ class MotionPlan(object):
         tOrigin = self.feetFollower.feetFollower.getStartTime()
         self.supervisor.setOrigin(max(0., tOrigin))
 
+    def teardown(self):
+        """
+        Detach the plan from the control loop.
+
+        The signals recomputed at each iteration are removed, tracing
+        stops, the footstep servers are stopped and the plan stops
+        receiving the real-time events (see unsubscribeEvents).
+
+        Entities cannot be destroyed from Python and remain in the
+        pool: a plan rebuilt in the same process must use another
+        namespace. The task and feature entities of the motion
+        elements are removed from the solver stack, then given back to
+        the entity pool and reused by the next plans, whatever their
+        namespace (see acquireEntities). The other tasks are left in
+        the solver stack.
+        """
+        after = self.robot.device.after
+        # Stop the supervisor first so that it does not push again
+        # the tasks removed by the motion elements.
+        after.rmSignal(self.supervisor.name + '.trigger')
+        for m in self.motion:
+            m.teardown()
+        if self.feetFollower:
+            self.feetFollower.teardown()
+        if self.sensorStandIn:
+            self.sensorStandIn.teardown()
+        if self.sensorRecorder:
+            after.rmSignal(self.sensorRecorder.name + '.trigger')
+        unsubscribeEvents(self)
+        self.started = False
+        self.logger.debug('motion plan detached')
+
+    """
+    Plan keys which can be changed by reload, besides the motion and
+    control elements.
+    """
+    reloadableKeys = ['duration', 'maximum-correction-per-step',
+                      'convergence-timeout', 'clearance', 'footstep-limits']
+
+    def diffElements(self, key, elements, plan):
+        """
+        Return the (element, new description) pairs of the elements of
+        a plan section (motion or control) whose description changed.
+
+        Raise if the elements cannot be updated in place.
+        """
+        old = self.plan.get(key) or []
+        new = plan.get(key) or []
+        if len(old) != len(new):
+            raise RuntimeError(
+                'cannot add or remove {0} elements'.format(key))
+
+        res = []
+        for (element, o, n) in zip(elements, old, new):
+            if len(n.items()) != 1:
+                raise RuntimeError(
+                    'each {0} should have only one type'.format(key))
+            ((oldTag, oldData), (newTag, newData)) = \
+                (o.items()[0], n.items()[0])
+            if oldTag != newTag:
+                raise RuntimeError(
+                    'cannot change the type of a {0} element'.format(key))
+            if oldData == newData:
+                continue
+            for k in set(oldData.keys()) | set(newData.keys()):
+                if oldData.get(k) != newData.get(k) \
+                        and not k in element.reloadableKeys:
+                    raise RuntimeError(
+                        'cannot reload \'{0}\' of {1} element \'{2}\''.format(
+                            k, key, newTag))
+            res.append((element, newData))
+        return res
+
+    def reload(self, filename):
+        """
+        Update the plan from a modified plan file.
+
+        The new plan is compared to the current one and only the
+        elements whose description changed are updated: entities and
+        their plugs are kept, hence the robot does not have to
+        converge again. Task gains and references, control weights
+        and constant errors, the maximum correction per step and the
+        footsteps (before the walk starts) can be changed this way.
+
+        Other changes would require new entities and are rejected: the
+        plan is then left untouched.
+        """
+        self.logger.info('reloading motion plan file \'{0}\''.format(filename))
+        plan = yaml.load(
+            open(searchFile(filename, self.defaultDirectories), "r"))
+
+        # Check every change before updating anything.
+        for key in set(self.plan.keys()) | set(plan.keys()):
+            if key in ['motion', 'control'] or key in self.reloadableKeys:
+                continue
+            if self.plan.get(key) != plan.get(key):
+                raise RuntimeError('cannot reload \'{0}\''.format(key))
+        motionChanges = self.diffElements('motion', self.motion, plan)
+        controlChanges = self.diffElements('control', self.control, plan)
+
+        # The footstep limits only matter if the plan walks.
+        walks = [m for m in self.motion if type(m) == MotionWalk]
+        walksChanged = len(walks) > 0 and (
+            any([type(m) == MotionWalk for (m, data) in motionChanges])
+            or self.plan.get('footstep-limits') != plan.get('footstep-limits'))
+        if walksChanged and self.started:
+            raise RuntimeError('footsteps cannot be reloaded while walking')
+        if walksChanged and walks[0].footstepStream:
+            raise RuntimeError(
+                'streamed footsteps cannot be reloaded, push them instead')
+
+        # All the walks are checked again as the footstep limits may
+        # have changed.
+        descriptions = [m.items()[0][1] for m in plan['motion']
+                        if m.items()[0][0] == MotionWalk.yaml_tag]
+        if walksChanged:
+            limits = FootstepLimits(plan.get('footstep-limits'))
+            for (walk, data) in zip(walks, descriptions):
+                walk.compile(data['footsteps'], walk.firstSide, limits)
+
+        # Update.
+        self.plan = plan
+        self.duration = float(self.plan['duration'])
+        if 'maximum-correction-per-step' in self.plan:
+            self.maxX = self.plan['maximum-correction-per-step']['x']
+            self.maxY = self.plan['maximum-correction-per-step']['y']
+            self.maxTheta = self.plan['maximum-correction-per-step']['theta']
+        if type(self.feetFollower) == FeetFollowerGraphWithCorrection:
+            self.feetFollower.feetFollower.setSafetyLimits(
+                self.maxX, self.maxY, self.maxTheta)
+        if self.feetFollower and 'convergence-timeout' in self.plan:
+            self.feetFollower.setConvergenceTimeout(
+                float(self.plan['convergence-timeout']))
+
+        for (motion, data) in motionChanges:
+            if type(motion) == MotionWalk:
+                continue
+            motion.reload(self, data)
+            self.logger.info('motion element reloaded: {0}'.format(motion))
+        for (control, data) in controlChanges:
+            control.reload(data)
+            self.logger.info('control element reloaded: {0}'.format(control))
+
+        if walksChanged:
+            for (walk, data) in zip(walks, descriptions):
+                walk.reload(self, data)
+            self.generateWalk(walks)
+            self.logger.info('walk generated again')
+        self.loadSpatialIndex()
+
+    def generateWalk(self, walks):
+        """
+        Push the footsteps of the walk elements into the feet
+        follower shared by the walks and generate the trajectory.
+        """
+        if not walks:
+            return
+        # Same order as when the walks are loaded: the first segment
+        # is generated at once, the next ones by the worker thread.
+        feetFollower = walks[0].feetFollower.feetFollower
+        feetFollower.clearSteps()
+        for walk in walks:
+            if walk != walks[0] or walk.interval[0]:
+                feetFollower.startSegment(walk.interval[0])
+            for step in walk.footsteps.tolist():
+                feetFollower.pushStep(step)
+            if walk == walks[0]:
+                feetFollower.generateTrajectory()
+
+        self.footsteps = np.concatenate([walk.footsteps for walk in walks])
+        if type(self.feetFollower) == FeetFollowerGraphWithCorrection:
+            self.feetFollower.feetFollower.setFootsteps(
+                2., makeFootsteps(self.footsteps))
+
+    def sensorOverride(self, name):
+        """
+        Return the object providing a sensor stream instead of the
+        middlewares (stand-in or replay), or None.
+        """
+        if self.sensorStandIn and self.sensorStandIn.hasStream(name):
+            return self.sensorStandIn
+        if self.sensorReplay:
+            return self.sensorReplay
+        return None
+
+    def sensorSignal(self, middleware, streamType, name):
+        """
+        Return the signal providing a sensor stream.
+
+        The stream is read from the middleware entity (CORBA server
+        or ROS export) unless it is simulated or replayed (see
+        sensorOverride). When sensors are recorded, the stream is
+        recorded as well.
+
+        streamType is 'vector', 'matrixHomo' or 'timestamp'.
+        """
+        if name in self.sensorStreams:
+            return self.sensorStreams[name]
+
+        override = self.sensorOverride(name)
+        if override and not override.hasStream(name):
+            raise RuntimeError(
+                'sensor stream \'{0}\' has not been recorded'.format(name))
+        if override:
+            signal = override.signal(name)
+        else:
+            signal = middleware.signal(name)
+        if self.sensorRecorder:
+            self.sensorRecorder.add(streamType, name)
+            plug(signal, self.sensorRecorder.signal(name))
+        self.sensorStreams[name] = signal
+        return signal
+
+    def sensorSource(self, middleware, name):
+        """
+        Return the entity providing a sensor stream, for tracing.
+        """
+        override = self.sensorOverride(name)
+        if override == self.sensorStandIn:
+            return self.sensorStandIn.entity
+        if override:
+            return override
+        return middleware
+
+    def dumpSensors(self):
+        if not self.sensorRecorder:
+            return
+        self.sensorRecorder.stop()
+        self.sensorRecorder.dump(self.sensorRecordFile)
+        self.logger.info(
+            'sensors recorded into \'{0}\''.format(self.sensorRecordFile))
+
+    def flushEvents(self):
+        """Forward the events emitted by the control loop to the logger.
+
+        This must not be called from the control loop as it reads
+        the events drained by the event logger thread."""
+        dispatchEvents()
+        for line in self.pendingEvents:
+            self.logger.debug('event: {0}'.format(line))
+        self.pendingEvents = []
+
     def canStart(self):
         canStart = reduce(lambda acc, c: c.canStart() and acc,
                           self.control, True)
@@ -248,3 +717,13 @@ class MotionPlan(object):
             return self.feetFollower.canStart()
         else:
             return True
+
+    def hasTimedOut(self):
+        if self.feetFollower:
+            return self.feetFollower.hasTimedOut()
+        return False
+
+    def convergenceReport(self):
+        if self.feetFollower:
+            return self.feetFollower.convergenceReport()
+        return ''
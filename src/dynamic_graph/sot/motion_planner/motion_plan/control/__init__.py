@@ -20,5 +20,6 @@ from dynamic_graph.sot.motion_planner.motion_plan.control.abstract import *
 from dynamic_graph.sot.motion_planner.motion_plan.control.constant import *
 from dynamic_graph.sot.motion_planner.motion_plan.control.hueblob import *
 from dynamic_graph.sot.motion_planner.motion_plan.control.mocap import *
+from dynamic_graph.sot.motion_planner.motion_plan.control.random_error import *
 from dynamic_graph.sot.motion_planner.motion_plan.control.virtual_sensor import *
 from dynamic_graph.sot.motion_planner.motion_plan.control.visp import *
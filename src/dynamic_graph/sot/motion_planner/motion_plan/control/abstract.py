@@ -19,13 +19,63 @@ from __future__ import print_function
 from dynamic_graph.sot.motion_planner.motion_plan.tools import *
 
 class Control(object):
+    """
+    Keys of the element description which can be changed without
+    rebuilding the element, see reload.
+    """
+    reloadableKeys = ['weight', 'covariance']
+
+    """
+    Error merger and name of the source fed by the element, set by
+    the error estimation strategy when the control starts.
+    """
+    errorMerger = None
+    sourceName = None
+
     def __init__(self, motion, yamlData):
-        checkDict('weight', yamlData)
-        self.weight = yamlData['weight']
+        self.configure(yamlData)
 
         self.robot = motion.robot
         self.trace = motion.trace
 
+    def configure(self, yamlData):
+        checkDict('weight', yamlData)
+        self.weight = yamlData['weight']
+
+        # Optional error covariance: either the three diagonal
+        # elements (x, y, theta) or the full 3x3 matrix.
+        self.covariance = None
+        if 'covariance' in yamlData:
+            covariance = yamlData['covariance']
+            if len(covariance) == 3 and \
+                    not isinstance(covariance[0], (list, tuple)):
+                covariance = ((covariance[0], 0., 0.),
+                              (0., covariance[1], 0.),
+                              (0., 0., covariance[2]))
+            self.covariance = tuple(map(tuple, covariance))
+
+    def reload(self, yamlData):
+        """
+        Update the element from a modified description where only
+        reloadableKeys changed, see MotionPlan.reload.
+
+        Once started, the new weight and covariance are set on the
+        error merger. A removed covariance is reset to the identity,
+        the merger default.
+        """
+        self.configure(yamlData)
+        if not self.sourceName:
+            return
+        self.errorMerger.signal('weight_' + self.sourceName).value = \
+            (self.weight,)
+        covariance = self.covariance
+        if not covariance:
+            covariance = ((1., 0., 0.), (0., 1., 0.), (0., 0., 1.))
+        self.errorMerger.signal('covariance_' + self.sourceName).value = \
+            covariance
+        # The merger only checks which signals are set here.
+        self.errorMerger.resolvePlugging()
+
     def start(self, name, feetFollowerWithCorrection):
         raise NotImplementedError
 
@@ -23,6 +23,8 @@ from dynamic_graph.sot.motion_planner.motion_plan.control.abstract import Contro
 class ControlConstant(Control):
     yaml_tag = u'constant'
 
+    reloadableKeys = Control.reloadableKeys + ['error']
+
     def __init__(self, motion, yamlData):
         checkDict('error', yamlData)
 
@@ -37,6 +39,16 @@ class ControlConstant(Control):
     def interactiveStart(self, name, feetFollowerWithCorrection):
         return self.start(name, feetFollowerWithCorrection)
 
+    def reload(self, yamlData):
+        checkDict('error', yamlData)
+        self.error = (yamlData['error']['x'],
+                      yamlData['error']['y'],
+                      yamlData['error']['theta'])
+        Control.reload(self, yamlData)
+        if self.sourceName:
+            self.errorMerger.signal('error_' + self.sourceName).value = \
+                self.error
+
     def __str__(self):
         return "constant error control element" + \
             " (error: {0})".format(self.error)
@@ -38,11 +38,32 @@ class ControlMocap(Control):
         checkDict('perceived-body', yamlData)
         Control.__init__(self, motion, yamlData)
 
+        self.motion = motion
         self.corba = motion.corba
         self.robot = motion.robot
         self.trackedBody = yamlData['tracked-body']
         self.perceivedBody = yamlData['perceived-body']
 
+    def isSimulated(self):
+        """
+        Are the motion capture data simulated or replayed?
+        """
+        return self.motion.sensorOverride(self.perceivedBody) is not None
+
+    def isTracked(self):
+        signal = self.positionSignal()
+        if self.isSimulated():
+            signal.recompute(signal.time + 1)
+        return len(signal.value) == 3
+
+    def positionSignal(self):
+        return self.motion.sensorSignal(
+            self.corba, 'vector', self.perceivedBody)
+
+    def timestampSignal(self):
+        return self.motion.sensorSignal(
+            self.corba, 'timestamp', self.perceivedBody + 'Timestamp')
+
     def computeWorldTransformationFromFoot(self):
         """
         This methods makes the assumption that the robot is placed
@@ -52,14 +73,12 @@ class ControlMocap(Control):
         position of the tracked body, it deduces the transformation
         between the motion capture system and the control framework.
         """
-        self.corba.signal(self.perceivedBody).recompute(
-            self.corba.signal(self.perceivedBody).time + 1)
+        self.positionSignal().recompute(self.positionSignal().time + 1)
         self.robot.dynamic.signal(
             self.trackedBody).recompute(self.robot.dynamic.signal(
                 self.trackedBody).time + 1)
 
-        mocapMfoot = XYThetaToHomogeneousMatrix(
-            self.corba.signal(self.perceivedBody).value)
+        mocapMfoot = XYThetaToHomogeneousMatrix(self.positionSignal().value)
         sotMfoot = np.matrix(self.robot.dynamic.signal(
                 self.trackedBody).value)
 
@@ -79,10 +98,10 @@ class ControlMocap(Control):
         plug(feetFollowerWithCorrection.referenceTrajectory.signal(
                 self.trackedBody), self.estimator.planned)
 
-        if len(self.corba.signals()) == 3:
+        if not self.isSimulated() and len(self.corba.signals()) == 3:
             print ("evart-to-client not launched, abandon.")
             return False
-        if len(self.corba.signal(self.perceivedBody).value) != 3:
+        if not self.isTracked():
             print ("{0} not tracked, abandon.".format(self.perceivedBody))
             return False
 
@@ -101,34 +120,31 @@ class ControlMocap(Control):
         else:
             self.estimator.realCommand.value = self.robot.device.robotState.value
 
-        plug(self.corba.signal(self.perceivedBody),
-             self.estimator.position)
-        plug(self.corba.signal(
-                self.perceivedBody + 'Timestamp'),
-             self.estimator.positionTimestamp)
+        plug(self.positionSignal(), self.estimator.position)
+        plug(self.timestampSignal(), self.estimator.positionTimestamp)
         self.setupTrace(self.estimator)
         return self.estimator
 
     def interactiveStart(self, name, feetFollowerWithCorrection):
-        while len(self.corba.signals()) == 3:
+        while not self.isSimulated() and len(self.corba.signals()) == 3:
             raw_input("Press enter after starting evart-to-corba.")
-        while len(self.corba.signal(self.perceivedBody).value) != 3:
+        while not self.isTracked():
             raw_input("Body not tracked...")
         return self.start(name, feetFollowerWithCorrection)
 
     def canStart(self):
-        if not self.corba:
-            return False
-        if len(self.corba.signals()) == 3:
-            return False
-        if len(self.corba.signal(self.perceivedBody).value) != 3:
-            return False
-        return True
+        if not self.isSimulated():
+            if not self.corba:
+                return False
+            if len(self.corba.signals()) == 3:
+                return False
+        return self.isTracked()
 
     def setupTrace(self, errorEstimator):
         self.setupTraceErrorEstimator(self.estimator)
         for s in [self.perceivedBody, self.perceivedBody + 'Timestamp']:
-            addTrace(self.robot, self.trace, self.corba.name, s)
+            addTrace(self.robot, self.trace,
+                     self.motion.sensorSource(self.corba, s).name, s)
 
     def __str__(self):
         return "motion capture control element" + \
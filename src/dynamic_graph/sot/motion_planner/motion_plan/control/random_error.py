@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of dynamic-graph.
+# dynamic-graph is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# dynamic-graph is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from dynamic_graph.sot.motion_planner.feet_follower import Randomizer
+from dynamic_graph.sot.motion_planner.motion_plan.tools import *
+from dynamic_graph.sot.motion_planner.motion_plan.control.abstract import Control
+
+
+class ControlRandom(Control):
+    """
+    Simulate a localization error with a Randomizer entity.
+
+    The error (x, y, theta) is the sum of the configured noise models:
+
+    - gaussian: {mean: m, stddev: s} (disabled by default),
+    - bias: [x, y, theta],
+    - random-walk: standard deviation of the increments,
+    - uniform: half width of the interval.
+
+    Each sample is dropped with the dropout probability, the previous
+    error being kept instead. For a given seed, the error only depends
+    on the number of control iterations.
+    """
+    yaml_tag = u'random'
+
+    def __init__(self, motion, yamlData):
+        Control.__init__(self, motion, yamlData)
+
+        self.seed = int(yamlData.get('seed', 0))
+        gaussian = yamlData.get('gaussian', {})
+        self.mean = float(gaussian.get('mean', 0.))
+        self.stddev = float(gaussian.get('stddev', 0.))
+        self.bias = tuple(map(float, yamlData.get('bias', (0., 0., 0.))))
+        if len(self.bias) != 3:
+            raise RuntimeError('invalid bias for random control element')
+        self.randomWalk = float(yamlData.get('random-walk', 0.))
+        self.uniform = float(yamlData.get('uniform', 0.))
+        self.dropout = float(yamlData.get('dropout', 0.))
+
+        self.randomizer = None
+
+    def start(self, name, feetFollowerWithCorrection):
+        self.randomizer = Randomizer(name)
+        self.randomizer.addSignal('error', 3)
+        self.randomizer.setSeed('error', self.seed)
+        self.randomizer.setGaussian('error', self.mean, self.stddev)
+        self.randomizer.setBias('error', self.bias)
+        self.randomizer.setRandomWalk('error', self.randomWalk)
+        self.randomizer.setUniform('error', self.uniform)
+        self.randomizer.setDropout('error', self.dropout)
+        return self.randomizer
+
+    def interactiveStart(self, name, feetFollowerWithCorrection):
+        return self.start(name, feetFollowerWithCorrection)
+
+    def __str__(self):
+        return "random error control element" + \
+            " (seed: {0}, gaussian: ({1}, {2}), bias: {3}, " \
+            "random walk: {4}, uniform: {5}, dropout: {6})".format(
+            self.seed, self.mean, self.stddev, self.bias,
+            self.randomWalk, self.uniform, self.dropout)
@@ -31,6 +31,11 @@ from dynamic_graph.sot.motion_planner.motion_plan.control.abstract import Contro
 class ControlVirtualSensor(Control):
     yaml_tag = u'virtual-sensor'
 
+    """
+    Control period, used to convert the latency into iterations.
+    """
+    timeStep = 5e-3
+
     def __init__(self, motion, yamlData):
         checkDict('object-name', yamlData)
         checkDict('position', yamlData)
@@ -41,9 +46,14 @@ class ControlVirtualSensor(Control):
 
         self.objectName = yamlData['object-name']
         self.position = Pose6d(yamlData['position'])
+        # Measurement latency in seconds.
+        self.latency = float(yamlData.get('latency', 0.))
+        if self.latency < 0.:
+            raise RuntimeError('invalid latency for virtual sensor')
 
         self.virtualSensor = VirtualSensor(
-            'virtualSensor' + str(id(yamlData)))
+            motion.entityName('virtualSensor' + str(id(yamlData))))
+        self.virtualSensor.setDelay(int(round(self.latency / self.timeStep)))
 
         #FIXME: should be more generic.
         feetFollower = find(lambda e: type(e) == MotionWalk, motion.motion)
@@ -96,5 +106,5 @@ class ControlVirtualSensor(Control):
 
     def __str__(self):
         return "virtual sensor control element" + \
-            " (object: {0}, position: {1})".format(
-            self.objectName, self.position)
+            " (object: {0}, position: {1}, latency: {2})".format(
+            self.objectName, self.position, self.latency)
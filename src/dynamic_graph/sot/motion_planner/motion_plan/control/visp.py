@@ -37,24 +37,31 @@ from dynamic_graph.ros import RosExport
 class ControlViSP(Control):
     yaml_tag = u'visp'
 
+    """
+    Compute and trace the debug signals of RobotPositionFromVisp.
+    """
+    debug = True
+
     def __init__(self, motion, yamlData):
         checkDict('object-name', yamlData)
         checkDict('position', yamlData)
 
         Control.__init__(self, motion, yamlData)
 
+        self.motion = motion
         self.robot = motion.robot
 
         self.objectName = yamlData['object-name']
         self.frameName = yamlData['frame-name']
         self.position = yamlData['position']
+        self.debug = yamlData.get('debug', self.debug)
 
         obj = motion.environment.get(self.objectName)
         if not obj:
             raise RuntimeError('object does not exist')
 
         self.robotPositionFromVisp = RobotPositionFromVisp(
-            'robotPositionFromViSP' + str(id(yamlData)))
+            motion.entityName('robotPositionFromViSP' + str(id(yamlData))))
 
         # Convert ViSP frame into usual dynamic-graph frame.
         self.robotPositionFromVisp.setSensorTransformation(
@@ -63,19 +70,22 @@ class ControlViSP(Control):
              (-1.,  0., 0., 0.),
              ( 0.,  0., 0., 1.))
             )
+        self.robotPositionFromVisp.setDebug(self.debug)
 
         if motion.ros:
             self.ros = motion.ros
         else:
-            self.ros = RosExport('rosExport')
-        self.ros.add('matrixHomoStamped', self.objectName, self.position)
+            self.ros = RosExport(motion.entityName('rosExport'))
+        if not self.isSimulated():
+            self.ros.add('matrixHomoStamped', self.objectName, self.position)
 
         self.robotPositionFromVisp.plannedObjectPosition.value = \
             obj.plannedPosition.dgRotationMatrix()
 
-        plug(self.ros.signal(self.objectName),
+        plug(motion.sensorSignal(self.ros, 'matrixHomo', self.objectName),
              self.robotPositionFromVisp.cMo)
-        plug(self.ros.signal(self.objectName + 'Timestamp'),
+        plug(motion.sensorSignal(self.ros, 'timestamp',
+                                 self.objectName + 'Timestamp'),
              self.robotPositionFromVisp.cMoTimestamp)
 
         # Plug wMc/wMr to robotPositionFromVisp
@@ -85,6 +95,19 @@ class ControlViSP(Control):
 
 
 
+    def isSimulated(self):
+        """
+        Is the tracker simulated or replayed?
+        """
+        return self.motion.sensorOverride(self.objectName) is not None
+
+    def isTracked(self):
+        timestamp = self.motion.sensorSignal(
+            self.ros, 'timestamp', self.objectName + 'Timestamp')
+        if self.isSimulated():
+            timestamp.recompute(timestamp.time + 1)
+        return len(timestamp.value) >= 1
+
     def start(self, name, feetFollowerWithCorrection):
         I = ((1.,0.,0.,0.), (0.,1.,0.,0.), (0.,0.,1.,0.), (0.,0.,0.,1.))
         self.estimator = ErrorEstimator(name)
@@ -116,35 +139,35 @@ class ControlViSP(Control):
         return self.estimator
 
     def interactiveStart(self, name, feetFollowerWithCorrection):
-        while len(self.ros.signals()) == 0:
+        while not self.isSimulated() and len(self.ros.signals()) == 0:
             raw_input("Press enter after starting ROS visp_tracker node.")
-        while len(self.ros.signal(self.objectName).value) < 1:
+        while not self.isTracked():
             raw_input("Tracking not started...")
         return self.start(name, feetFollowerWithCorrection)
 
     def canStart(self):
-        if not self.ros:
-            return False
-        if len(self.ros.signals()) == 0:
-            return False
-        if len(self.ros.signal(self.objectName).value) < 1:
-            return False
-        if len(self.ros.signal(self.objectName + 'Timestamp').value) < 1:
-            return False
-        return True
+        if not self.isSimulated():
+            if not self.ros:
+                return False
+            if len(self.ros.signals()) == 0:
+                return False
+            if len(self.ros.signal(self.objectName).value) < 1:
+                return False
+        return self.isTracked()
 
     def setupTrace(self, errorEstimator):
         self.setupTraceErrorEstimator(self.estimator)
         for s in [self.objectName, self.objectName + 'Timestamp']:
-            addTrace(self.robot, self.trace, self.ros.name, s)
-
-        for s in ['cMo', 'cMoTimestamp',
-                  'plannedObjectPosition',
-                  'position',
-                  'positionTimestamp',
-                  'dbgcMo',
-                  'dbgPosition',
-                  'dbgrMc']:
+            addTrace(self.robot, self.trace,
+                     self.motion.sensorSource(self.ros, s).name, s)
+
+        signals = ['cMo', 'cMoTimestamp',
+                   'plannedObjectPosition',
+                   'position',
+                   'positionTimestamp']
+        if self.debug:
+            signals += ['dbgcMo', 'dbgPosition', 'dbgrMc']
+        for s in signals:
             addTrace(self.robot, self.trace, self.robotPositionFromVisp.name, s)
 
     def __str__(self):
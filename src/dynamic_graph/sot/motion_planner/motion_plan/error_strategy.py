@@ -18,7 +18,7 @@
 from __future__ import print_function
 from dynamic_graph import plug
 from dynamic_graph.sot.motion_planner.feet_follower import \
-    ErrorMerger, ErrorEstimator
+    ErrorMerger, ErrorEstimator, Randomizer
 
 from dynamic_graph.sot.motion_planner.error_estimation_strategy \
     import ErrorEstimationStrategy
@@ -38,16 +38,21 @@ class MotionPlanErrorEstimationStrategy(ErrorEstimationStrategy):
     def __init__(self, feetFollowerWithCorrection, robot, corba = None):
         ErrorEstimationStrategy.__init__(self,
                                          robot, feetFollowerWithCorrection)
-        self.errorEstimator = ErrorMerger('error_merger')
+        self.errorEstimator = ErrorMerger(
+            feetFollowerWithCorrection.entityName('error_merger'))
+        self.errorEstimators = []
         self.feetFollowerWithCorrection = feetFollowerWithCorrection
         self.robot = robot
 
     def start(self, interactive = False):
         for control in self.motionPlan.control:
-            name = 'error_estimator' + \
-                str(MotionPlanErrorEstimationStrategy.errorEstimatorId)
+            name = self.motionPlan.entityName(
+                'error_estimator' +
+                str(MotionPlanErrorEstimationStrategy.errorEstimatorId))
             MotionPlanErrorEstimationStrategy.errorEstimatorId += 1
             self.errorEstimator.addErrorEstimation(name)
+            control.errorMerger = self.errorEstimator
+            control.sourceName = name
 
             estimator = None
             if interactive:
@@ -59,7 +64,14 @@ class MotionPlanErrorEstimationStrategy(ErrorEstimationStrategy):
             if type(estimator) == ErrorEstimator:
                 plug(estimator.error,
                      self.errorEstimator.signal("error_" + name))
+                # Acquisition time is used to down-weight stale
+                # measurements.
+                plug(estimator.positionTimestamp,
+                     self.errorEstimator.signal("timestamp_" + name))
                 self.errorEstimators.append(estimator)
+            elif type(estimator) == Randomizer:
+                plug(estimator.signal('error'),
+                     self.errorEstimator.signal("error_" + name))
             else:
                 # If this is not an error estimator, we suppose it is a constant
                 # value that can be used to set the signal.
@@ -67,6 +79,9 @@ class MotionPlanErrorEstimationStrategy(ErrorEstimationStrategy):
 
             self.errorEstimator.signal("weight_" + name).value = \
                 (control.weight,)
+            if control.covariance:
+                self.errorEstimator.signal("covariance_" + name).value = \
+                    control.covariance
 
             if self.motionPlan.trace and type(estimator) == ErrorEstimator:
                 addTrace(self.motionPlan.robot,
@@ -82,10 +97,19 @@ class MotionPlanErrorEstimationStrategy(ErrorEstimationStrategy):
                          self.motionPlan.trace,
                          name, 'dbgIndex')
 
+        # All the sources are now plugged.
+        self.errorEstimator.resolvePlugging()
+
         if self.motionPlan.trace:
             addTrace(self.motionPlan.robot,
                      self.motionPlan.trace,
                      self.errorEstimator.name, 'error')
+            addTrace(self.motionPlan.robot,
+                     self.motionPlan.trace,
+                     self.errorEstimator.name, 'covariance')
+            addTrace(self.motionPlan.robot,
+                     self.motionPlan.trace,
+                     self.errorEstimator.name, 'activeSources')
         return True
 
     def interactiveStart(self):
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of dynamic-graph.
+# dynamic-graph is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# dynamic-graph is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import numpy as np
+
+"""
+Footstep as given to the analytical pattern generator.
+"""
+footstepDtype = np.dtype([('slide1', np.float),
+                          ('horizontalDistance', np.float),
+                          ('height', np.float),
+                          ('slide2', np.float),
+                          ('x', np.float),
+                          ('y', np.float),
+                          ('theta', np.float)])
+
+_footstepKeys = ('slide1', 'horizontal-distance', 'height', 'slide2',
+                 'x', 'y', 'theta')
+
+minSlides = (-1.52, -0.76)
+
+def _stepValues(step):
+    return tuple([step.get(k) for k in _footstepKeys])
+
+def _generatedStep(data, state, x, y, theta):
+    """
+    Values of a generated footstep, y being the lateral offset
+    towards the swing foot side.
+    """
+    side = state[0]
+    state[0] = -side
+    width = data.get('width', FootstepLimits.nominalWidth)
+    return (data.get('slide1'), data.get('horizontal-distance'),
+            data.get('height'), data.get('slide2'),
+            x, side * width + y, theta)
+
+def _straight(data, state):
+    for i in xrange(int(data['steps'])):
+        yield _generatedStep(data, state, data.get('length', 0.), 0., 0.)
+
+def _arc(data, state):
+    for i in xrange(int(data['steps'])):
+        yield _generatedStep(data, state, data.get('length', 0.), 0.,
+                             data.get('theta', 0.))
+
+def _turnInPlace(data, state):
+    for i in xrange(int(data['steps'])):
+        yield _generatedStep(data, state, 0., 0., data.get('theta', 0.))
+
+def _sidestep(data, state):
+    distance = data.get('distance', 0.)
+    for i in xrange(int(data['steps'])):
+        # The leading foot opens the feet, the other one follows.
+        y = 0.
+        if state[0] * distance > 0.:
+            y = distance
+        yield _generatedStep(data, state, 0., y, data.get('theta', 0.))
+
+def _repeat(data, state):
+    for i in xrange(int(data['count'])):
+        for values in _expand(data['footsteps'], state):
+            yield values
+
+_generators = {'straight': _straight,
+               'arc': _arc,
+               'turn-in-place': _turnInPlace,
+               'sidestep': _sidestep,
+               'repeat': _repeat}
+
+def _expand(footsteps, state):
+    for step in footsteps:
+        if len(step) == 1 and step.keys()[0] in _generators:
+            (name, data) = step.items()[0]
+            required = ['steps']
+            if name == 'repeat':
+                required = ['count', 'footsteps']
+            for key in required:
+                if not key in data:
+                    raise RuntimeError(
+                        '\'{0}\' is required by {1}'.format(key, name))
+            for values in _generators[name](data, state):
+                yield values
+        else:
+            for key in step.keys():
+                if not key in _footstepKeys:
+                    raise RuntimeError(
+                        'invalid footstep key \'{0}\''.format(key))
+            state[0] = -state[0]
+            yield _stepValues(step)
+
+def expandFootsteps(footsteps, firstSide = -1):
+    """
+    Iterate over the footsteps of a walk, expanding the generators.
+
+    Each footstep is either a footstep dictionary or a generator
+    producing several footsteps:
+
+    - straight: {steps, length}, steps of length forward,
+    - arc: {steps, length, theta}, steps of length forward, turning
+      by theta at each step,
+    - turn-in-place: {steps, theta}, turning by theta at each step,
+    - sidestep: {steps, distance, theta}, moving by distance to the
+      left (or to the right if negative) at each pair of steps and
+      turning by theta (zero by default) at each step,
+    - repeat: {count, footsteps}, footsteps (including generators)
+      repeated count times.
+
+    Generated footsteps are width away (0.19 by default) from the
+    support foot on the side of the swing foot, firstSide being the
+    side of the first one (-1 for the right foot). Slides, horizontal
+    distance and height can be set for all the generated footsteps.
+
+    Footsteps are yielded as tuples of values in the footstepDtype
+    order, None marking a missing value.
+    """
+    return _expand(footsteps, [firstSide])
+
+def compileFootsteps(footsteps, firstSide = -1):
+    """
+    Convert a list of footsteps (see expandFootsteps) to an array of
+    footstepDtype. Compiled footsteps are returned unchanged.
+
+    Missing or null slides are set to their minimum, except the
+    first slide1 which is null. The horizontal distance and the
+    height default to 0.24 and 0.25, the position to zero.
+    """
+    if isinstance(footsteps, np.ndarray):
+        return footsteps
+    nan = float('nan')
+    res = np.array([tuple([nan if v is None else v for v in values])
+                    for values in expandFootsteps(footsteps, firstSide)],
+                   dtype = footstepDtype)
+    if not len(res):
+        return res
+
+    slide1 = res['slide1']
+    missing = np.isnan(slide1) | (slide1 == 0.)
+    slide1[missing] = minSlides[0]
+    slide1[0] = 0. if missing[0] else slide1[0]
+    slide2 = res['slide2']
+    slide2[np.isnan(slide2) | (slide2 == 0.)] = minSlides[1]
+
+    for (field, default) in [('horizontalDistance', 0.24), ('height', 0.25),
+                             ('x', 0.), ('y', 0.), ('theta', 0.)]:
+        res[field][np.isnan(res[field])] = default
+    return res
+
+def footstepPoses(footsteps, start):
+    """
+    Return the (N + 2, 3) array of the feet positions (x, y, theta)
+    during a walk.
+
+    footsteps is a flat sequence of (x, y, theta) steps, each one
+    relative to the previous footstep (see makeFootsteps), and start
+    the (x, y, theta) position of the right ankle. The two first
+    positions are the right and left feet before walking.
+    """
+    steps = np.array(footsteps, dtype = np.float).reshape(-1, 3)
+    steps = np.vstack(((0., 0., 0.), (0., 0.19, 0.), steps))
+    steps[0] = start
+
+    # Footstep i is expressed in the frame of footstep i - 1.
+    theta = np.cumsum(steps[:, 2])
+    previousTheta = np.concatenate(((0.,), theta[:-1]))
+    c = np.cos(previousTheta)
+    s = np.sin(previousTheta)
+    dx = c * steps[:, 0] - s * steps[:, 1]
+    dy = s * steps[:, 0] + c * steps[:, 1]
+    return np.column_stack((np.cumsum(dx), np.cumsum(dy), theta))
+
+class FootstepLimits(object):
+    """
+    Kinematic limits of a footstep, w.r.t. the support foot.
+
+    - maxReach: distance between the footstep and its nominal
+      position, at nominalWidth on the side of the swing foot,
+    - minWidth, maxWidth: lateral distance between the feet, on the
+      side of the swing foot,
+    - maxTheta: absolute rotation of a footstep,
+    - footLength, footWidth: size of the soles, centered on the
+      ankles, used to detect collisions between the feet.
+
+    The default values are conservative bounds for HRP-2 14.
+    """
+    maxReach = 0.35
+    nominalWidth = 0.19
+    minWidth = 0.
+    maxWidth = 0.35
+    maxTheta = 0.5
+    footLength = 0.24
+    footWidth = 0.14
+
+    def __init__(self, yamlData = None):
+        if not yamlData:
+            return
+        for (key, attr) in [('max-reach', 'maxReach'),
+                            ('nominal-width', 'nominalWidth'),
+                            ('min-width', 'minWidth'),
+                            ('max-width', 'maxWidth'),
+                            ('max-theta', 'maxTheta'),
+                            ('foot-length', 'footLength'),
+                            ('foot-width', 'footWidth')]:
+            if key in yamlData:
+                setattr(self, attr, float(yamlData[key]))
+
+def feetCollide(x, y, theta, length, width):
+    """
+    Check whether two soles collide, the second one being at (x, y,
+    theta) in the frame of the first one.
+
+    Arrays are checked at once using the separating axis theorem.
+    """
+    a = .5 * length
+    b = .5 * width
+    c = np.abs(np.cos(theta))
+    s = np.abs(np.sin(theta))
+    rx = a * c + b * s
+    ry = a * s + b * c
+    separated = (np.abs(x) > a + rx) \
+        | (np.abs(y) > b + ry) \
+        | (np.abs(np.cos(theta) * x + np.sin(theta) * y) > rx + a) \
+        | (np.abs(-np.sin(theta) * x + np.cos(theta) * y) > ry + b)
+    return ~separated
+
+class FootstepReport(object):
+    """
+    Feasibility report of a footstep sequence (see checkFootsteps).
+
+    errors is the list of (step, message) tuples, steps being
+    numbered from zero in the sequence.
+    """
+    def __init__(self, footsteps, poses, errors):
+        self.footsteps = footsteps
+        self.poses = poses
+        self.errors = errors
+
+    def isFeasible(self):
+        return len(self.errors) == 0
+
+    def __str__(self):
+        res = '{0} footstep(s)'.format(len(self.footsteps))
+        if len(self.footsteps):
+            length = np.hypot(self.footsteps['x'], self.footsteps['y'])
+            res += ', max step {0:.3f}m, max rotation {1:.3f}rad'.format(
+                np.max(length), np.max(np.abs(self.footsteps['theta'])))
+            (x, y, theta) = self.poses[-1] \
+                - self.poses[(len(self.poses) - 1) % 2]
+            res += ', displacement ({0:.3f}, {1:.3f}, {2:.3f})'.format(x, y, theta)
+        if not self.errors:
+            return res + ': feasible'
+        res += ': {0} error(s)'.format(len(self.errors))
+        for (step, message) in self.errors:
+            res += '\n  step {0}: {1}'.format(step, message)
+        return res
+
+def checkFootsteps(footsteps, limits = None, firstSide = -1):
+    """
+    Check the kinematic feasibility of compiled footsteps.
+
+    firstSide is the side of the first swing foot, -1 for the right
+    one. The reach, the lateral distance, the rotation, the
+    collisions between the feet and the slides are checked for all
+    the steps at once.
+    """
+    if not limits:
+        limits = FootstepLimits()
+    x = footsteps['x']
+    y = footsteps['y']
+    theta = footsteps['theta']
+    side = firstSide * (1 - 2 * (np.arange(len(footsteps)) % 2))
+    width = side * y
+
+    checks = [
+        (np.hypot(x, y - side * limits.nominalWidth) > limits.maxReach,
+         'footstep out of reach'),
+        (width < limits.minWidth, 'feet too close'),
+        (width > limits.maxWidth, 'feet too far apart'),
+        (np.abs(theta) > limits.maxTheta, 'rotation too large'),
+        (feetCollide(x, y, theta, limits.footLength, limits.footWidth),
+         'feet collide'),
+        ((footsteps['slide1'] < minSlides[0]) | (footsteps['slide1'] > 0.),
+         'slide1 out of [{0}, 0]'.format(minSlides[0])),
+        ((footsteps['slide2'] < minSlides[1]) | (footsteps['slide2'] > 0.),
+         'slide2 out of [{0}, 0]'.format(minSlides[1])),
+        (footsteps['horizontalDistance'] <= 0.,
+         'horizontal distance must be positive'),
+        (footsteps['height'] <= 0., 'height must be positive'),
+        ]
+
+    errors = []
+    for (failed, message) in checks:
+        errors += [(int(i), message) for i in np.flatnonzero(failed)]
+    errors.sort()
+
+    poses = footstepPoses(
+        np.column_stack((x, y, theta)), (0., -.5 * limits.nominalWidth, 0.))
+    return FootstepReport(footsteps, poses, errors)
+
+__all__ = ["footstepDtype", "minSlides", "expandFootsteps",
+           "compileFootsteps", "footstepPoses", "FootstepLimits", "feetCollide",
+           "FootstepReport", "checkFootsteps"]
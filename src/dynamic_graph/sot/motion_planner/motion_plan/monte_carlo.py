@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of dynamic-graph.
+# dynamic-graph is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# dynamic-graph is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import copy, os, random, sys, tempfile, traceback
+import multiprocessing
+import yaml
+import numpy as np
+
+from dynamic_graph.sot.motion_planner.math import *
+from dynamic_graph.sot.motion_planner.motion_plan.tools import searchFile
+
+class WalkSample(object):
+    """
+    Random parameters of one simulated walk.
+
+    - offset: (x, y, theta) displacement of the observed objects
+      w.r.t. their planned position, i.e. the initial localization
+      error the correction has to compensate,
+    - constantError: (x, y, theta) error returned by the constant
+      control elements,
+    - sensorNoise: (x, y, theta) error on the object position seen by
+      the virtual sensors,
+    - latency: virtual sensors latency in seconds.
+    """
+    def __init__(self, index, offset, constantError, sensorNoise, latency):
+        self.index = index
+        self.offset = offset
+        self.constantError = constantError
+        self.sensorNoise = sensorNoise
+        self.latency = latency
+
+    def __str__(self):
+        return "walk {0} (offset: {1}, constant error: {2}, " \
+            "sensor noise: {3}, latency: {4})".format(
+            self.index, self.offset, self.constantError,
+            self.sensorNoise, self.latency)
+
+def drawSamples(count, seed = 0,
+                maxOffset = (0.1, 0.1, 0.2),
+                constantErrorStddev = (0.01, 0.01, 0.02),
+                sensorNoiseStddev = (0.01, 0.01, 0.02),
+                maxLatency = 0.1):
+    """
+    Draw the parameters of count walks.
+
+    Offsets and latencies are uniformly drawn in [-max, max] and
+    [0, maxLatency], noises follow centered Gaussian distributions.
+    The samples only depend on the seed.
+    """
+    generator = random.Random(seed)
+    uniform = lambda bounds: \
+        tuple([generator.uniform(-b, b) for b in bounds])
+    gauss = lambda stddevs: \
+        tuple([generator.gauss(0., s) for s in stddevs])
+    return [WalkSample(i, uniform(maxOffset), gauss(constantErrorStddev),
+                       gauss(sensorNoiseStddev),
+                       generator.uniform(0., maxLatency))
+            for i in xrange(count)]
+
+def _poseDict(pose):
+    return {'x': pose.x, 'y': pose.y, 'z': pose.z,
+            'rx': pose.rx, 'ry': pose.ry, 'rz': pose.rz}
+
+def _displace(pose, xytheta):
+    res = _poseDict(pose)
+    res['x'] += xytheta[0]
+    res['y'] += xytheta[1]
+    res['rz'] += xytheta[2]
+    return res
+
+def randomizePlan(plan, sample):
+    """
+    Return a copy of the plan (parsed YAML) where the control
+    elements are perturbed following the sample.
+
+    Also return the real position of each object observed by a
+    virtual sensor, used to evaluate the final error.
+    """
+    plan = copy.deepcopy(plan)
+    planned = {}
+    for obj in plan.get('environment', []) or []:
+        planned[obj['object']['name']] = \
+            Pose6d(obj['object']['planned']['position'])
+
+    realPositions = {}
+    hasVirtualSensor = False
+    for control in plan.get('control', []) or []:
+        (tag, data) = control.items()[0]
+        if tag == 'constant':
+            data['error'] = {'x': sample.constantError[0],
+                             'y': sample.constantError[1],
+                             'theta': sample.constantError[2]}
+        elif tag == 'virtual-sensor':
+            name = data['object-name']
+            if not name in planned:
+                raise RuntimeError(
+                    'object \'{0}\' does not exist'.format(name))
+            real = _displace(planned[name], sample.offset)
+            realPositions[name] = real
+            data['position'] = _displace(Pose6d(real), sample.sensorNoise)
+            data['latency'] = sample.latency
+            hasVirtualSensor = True
+
+    if not hasVirtualSensor:
+        raise RuntimeError('the plan needs a virtual-sensor control element '
+                           'to evaluate the localization error')
+    return (plan, realPositions)
+
+def _finalError(motionPlan, realPositions):
+    """
+    Localization error at the end of the walk as seen by a perfect
+    virtual sensor, i.e. the real waist position w.r.t. the objects
+    compared to the planned one.
+    """
+    robot = motionPlan.robot
+    t = robot.device.state.time
+    robot.dynamic.waist.recompute(t)
+    realWaist = np.matrix(robot.dynamic.waist.value)
+    plannedWaist = np.matrix(
+        motionPlan.feetFollower.referenceTrajectory.waist.value)
+
+    errors = []
+    for (name, real) in realPositions.items():
+        plannedObstacle = \
+            motionPlan.environment[name].plannedPosition.rotationMatrix()
+        realObstacle = Pose6d(real).rotationMatrix()
+        estimated = realWaist * inverseHomogeneousMatrix(realObstacle) \
+            * plannedObstacle
+        (x, y, z, theta) = HomogeneousMatrixToXYZTheta(
+            inverseHomogeneousMatrix(plannedWaist) * estimated)
+        errors.append((x, y, theta))
+    return tuple(np.mean(np.array(errors), axis = 0).tolist())
+
+class _Walk(object):
+    """
+    Picklable job executed by a worker process.
+    """
+    def __init__(self, plan, defaultDirectories, sample, timeStep):
+        self.plan = plan
+        self.defaultDirectories = defaultDirectories
+        self.sample = sample
+        self.timeStep = timeStep
+
+    def __call__(self):
+        result = {'index': self.sample.index,
+                  'sample': self.sample,
+                  'success': False}
+        try:
+            result.update(self.simulate())
+            result['success'] = True
+        except Exception:
+            result['failure'] = traceback.format_exc()
+        return result
+
+    def simulate(self):
+        # The robot is built in the worker process: the dynamic-graph
+        # pool cannot be shared between walks. The sot-dynamic tools
+        # parse the command line, do not forward ours.
+        sys.argv = sys.argv[:1]
+        from dynamic_graph.sot.dynamics.tools import robot, solver
+        from dynamic_graph.sot.motion_planner.feet_follower import Clock
+        from dynamic_graph.sot.motion_planner.motion_plan import MotionPlan
+
+        namespace = 'mc{0}'.format(self.sample.index)
+
+        # The walk runs faster than real-time.
+        clock = Clock(namespace + '_clock')
+        clock.setSimulated(self.timeStep)
+
+        (plan, realPositions) = randomizePlan(self.plan, self.sample)
+        (fd, filename) = tempfile.mkstemp(prefix = namespace + '-',
+                                          suffix = '.yaml')
+        try:
+            os.write(fd, yaml.dump(plan))
+            os.close(fd)
+            motionPlan = MotionPlan(filename, robot, solver,
+                                    self.defaultDirectories,
+                                    namespace = namespace)
+        finally:
+            os.remove(filename)
+
+        while not motionPlan.canStart():
+            if motionPlan.hasTimedOut():
+                raise RuntimeError('initial position not reached in time')
+            robot.device.increment(self.timeStep)
+        motionPlan.start()
+
+        limits = np.array((motionPlan.maxX, motionPlan.maxY,
+                           motionPlan.maxTheta))
+        offset = motionPlan.feetFollower.feetFollower.offset
+        saturated = np.zeros(3)
+        saturatedAny = 0
+        nIterations = int(motionPlan.duration / self.timeStep)
+        for n in xrange(nIterations + 1):
+            robot.device.increment(self.timeStep)
+            value = np.abs(np.array(offset.value))
+            if len(value) != 3:
+                continue
+            s = value > limits
+            saturated += s
+            saturatedAny += s.any()
+
+        motionPlan.teardown()
+        return {
+            'finalError': _finalError(motionPlan, realPositions),
+            'saturation': tuple((saturated / (nIterations + 1)).tolist()),
+            'saturationAny': float(saturatedAny) / (nIterations + 1),
+            }
+
+def _runWalk(walk):
+    return walk()
+
+class MonteCarloReport(object):
+    """
+    Distributions of the final localization error and of the
+    correction saturation over a set of walks.
+
+    The saturation of a walk is the ratio of iterations where the
+    estimated error exceeds the maximum correction per step.
+    """
+    percentiles = (50, 95, 99)
+
+    def __init__(self, results, limits):
+        self.results = sorted(results, key = lambda r: r['index'])
+        self.limits = limits
+        self.succeeded = [r for r in self.results if r['success']]
+        self.failed = [r for r in self.results if not r['success']]
+
+        if self.succeeded:
+            self.finalError = np.abs(
+                np.array([r['finalError'] for r in self.succeeded]))
+            self.saturation = np.array(
+                [r['saturation'] for r in self.succeeded])
+            self.saturationAny = np.array(
+                [r['saturationAny'] for r in self.succeeded])
+
+    def _line(self, label, values):
+        res = '  {0:<10} mean {1:8.4f}  std {2:8.4f}'.format(
+            label, np.mean(values), np.std(values))
+        for p in self.percentiles:
+            res += '  p{0} {1:8.4f}'.format(p, np.percentile(values, p))
+        res += '  max {0:8.4f}'.format(np.max(values))
+        return res
+
+    def __str__(self):
+        res = 'Monte-Carlo simulation: {0} walks, {1} failed\n'.format(
+            len(self.results), len(self.failed))
+        res += 'Correction limits: x {0}, y {1}, theta {2}\n'.format(
+            *self.limits)
+        if not self.succeeded:
+            return res
+        res += '\nFinal error (absolute value):\n'
+        for (i, axis) in enumerate(['x', 'y', 'theta']):
+            res += self._line(axis, self.finalError[:, i]) + '\n'
+        res += '\nSaturation ratio:\n'
+        for (i, axis) in enumerate(['x', 'y', 'theta']):
+            res += self._line(axis, self.saturation[:, i]) + '\n'
+        res += self._line('any', self.saturationAny) + '\n'
+        res += '  walks with saturation: {0}/{1}\n'.format(
+            int(np.sum(self.saturationAny > 0.)), len(self.succeeded))
+        return res
+
+    def write(self, filename):
+        """
+        Write one line per walk: index, success, offset, constant
+        error, sensor noise, latency, final error and saturation.
+        """
+        f = open(filename, 'w')
+        f.write('# index success offset(3) constantError(3) sensorNoise(3)'
+                ' latency finalError(3) saturation(3) saturationAny\n')
+        for r in self.results:
+            s = r['sample']
+            values = [r['index'], int(r['success'])]
+            values += list(s.offset) + list(s.constantError)
+            values += list(s.sensorNoise) + [s.latency]
+            if r['success']:
+                values += list(r['finalError']) + list(r['saturation'])
+                values += [r['saturationAny']]
+            else:
+                values += [float('nan')] * 7
+            f.write(' '.join(map(str, values)) + '\n')
+        f.close()
+
+def runMonteCarlo(filename, defaultDirectories, samples,
+                  processes = None, timeStep = 5e-3, logger = None):
+    """
+    Simulate the walk of a motion plan once per sample.
+
+    Walks are spread across a pool of processes (one per CPU by
+    default), each walk running in its own process.
+    """
+    filename = searchFile(filename, defaultDirectories)
+    plan = yaml.load(open(filename, 'r'))
+    directories = [os.path.dirname(os.path.abspath(filename))] \
+        + list(defaultDirectories)
+
+    limits = (0.04, 0.04, 0.1)
+    if 'maximum-correction-per-step' in plan:
+        m = plan['maximum-correction-per-step']
+        limits = (m['x'], m['y'], m['theta'])
+
+    walks = [_Walk(plan, directories, sample, timeStep)
+             for sample in samples]
+    pool = multiprocessing.Pool(processes, maxtasksperchild = 1)
+    results = []
+    try:
+        for result in pool.imap_unordered(_runWalk, walks):
+            results.append(result)
+            if logger:
+                if result['success']:
+                    logger.info('walk {0} done ({1}/{2})'.format(
+                            result['index'], len(results), len(walks)))
+                else:
+                    logger.error('walk {0} failed:\n{1}'.format(
+                            result['index'], result['failure']))
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return MonteCarloReport(results, limits)
+
+__all__ = ["WalkSample", "drawSamples", "randomizePlan",
+           "MonteCarloReport", "runMonteCarlo"]
@@ -20,4 +20,5 @@ from dynamic_graph.sot.motion_planner.motion_plan.motion.abstract import *
 from dynamic_graph.sot.motion_planner.motion_plan.motion.joint import *
 from dynamic_graph.sot.motion_planner.motion_plan.motion.task import *
 from dynamic_graph.sot.motion_planner.motion_plan.motion.visual_point import *
+from dynamic_graph.sot.motion_planner.motion_plan.motion.visual_points import *
 from dynamic_graph.sot.motion_planner.motion_plan.motion.walk import *
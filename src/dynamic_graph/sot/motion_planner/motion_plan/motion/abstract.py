@@ -18,8 +18,15 @@
 from __future__ import print_function
 
 class Motion(object):
+    """
+    Keys of the element description which can be changed without
+    rebuilding the element, see reload.
+    """
+    reloadableKeys = []
+
     def __init__(self, motion, yamlData):
         self.robot = motion.robot
+        self.solver = motion.solver
         self.interval = yamlData['interval']
         if len(self.interval) != 2:
             raise RuntimeError('invalid interval')
@@ -27,3 +34,17 @@ class Motion(object):
 
     def setupTrace(self, trace):
         raise NotImplementedError
+
+    def reload(self, motion, yamlData):
+        """
+        Update the element from a modified description where only
+        reloadableKeys changed, see MotionPlan.reload.
+        """
+        pass
+
+    def teardown(self):
+        """
+        Release the resources which are not entities, see
+        MotionPlan.teardown.
+        """
+        pass
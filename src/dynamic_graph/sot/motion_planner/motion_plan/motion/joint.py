@@ -39,6 +39,8 @@ class MotionJoint(Motion):
         'right-claw': 28
         }
 
+    reloadableKeys = ['gain', 'reference']
+
     def __init__(self, motion, yamlData, defaultDirectories):
         checkDict('interval', yamlData)
 
@@ -48,8 +50,13 @@ class MotionJoint(Motion):
         self.name = yamlData['name']
         self.reference = yamlData['reference']
 
-        self.task = Task('joint'+str(id(yamlData)))
-        self.feature = FeaturePosture('jointFeaturePosture'+str(id(yamlData)))
+        # Entities are taken from the pool, the task may still hold
+        # the feature it was previously given.
+        (self.task, self.feature) = acquireEntities(
+            self.yaml_tag, motion.robot,
+            lambda n: (Task(motion.entityName('joint{0}'.format(n))),
+                       FeaturePosture(motion.entityName(
+                        'jointFeaturePosture{0}'.format(n)))))
         plug(motion.robot.device.state, self.feature.state)
 
         jointId = self.nameToId[self.name]
@@ -65,6 +72,7 @@ class MotionJoint(Motion):
             else:
                 self.feature.selectDof(i + 6, False)
 
+        self.task.clear()
         self.task.add(self.feature.name)
         self.task.controlGain.value = self.gain
 
@@ -74,8 +82,25 @@ class MotionJoint(Motion):
                                   self.priority,
                                   (jointId,))
 
+    def reload(self, motion, yamlData):
+        self.gain = yamlData.get('gain', 1.)
+        self.reference = yamlData['reference']
+
+        jointId = self.nameToId[self.name]
+        posture = np.array(motion.robot.halfSitting)
+        posture[jointId] = self.reference
+        self.feature.setPosture(tuple(posture.tolist()))
+        self.task.controlGain.value = self.gain
+
     def __str__(self):
         return "joint motion ({0})".format(self.name)
 
     def setupTrace(self, trace):
         pass
+
+    def teardown(self):
+        if self.task:
+            self.solver.sot.remove(self.task.name)
+            releaseEntities(self.yaml_tag, self.robot,
+                            (self.task, self.feature))
+            self.task = None
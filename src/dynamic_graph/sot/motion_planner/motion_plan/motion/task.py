@@ -28,6 +28,8 @@ class MotionTask(Motion):
     gain = None
     reference = None
 
+    reloadableKeys = ['gain', 'reference', 'rotation', 'translation']
+
     def __init__(self, motion, yamlData, defaultDirectories):
         checkDict('interval', yamlData)
 
@@ -38,12 +40,43 @@ class MotionTask(Motion):
         if self.type != 'feature-point-6d' and self.type != 'feature-com':
             raise NotImplementedError
 
+        if self.type == 'feature-point-6d':
+            self.body = yamlData['operational-point']
+        self.configure(motion, yamlData)
+
+        if self.type == 'feature-point-6d':
+            unlockedDofs = []
+            if self.body == 'left-wrist':
+                for i in xrange(6):
+                    unlockedDofs.append(6 + 12 + 2 + 2 + 7 + i)
+            elif self.body == 'right-wrist':
+                for i in xrange(6):
+                    unlockedDofs.append(6 + 12 + 2 + 2 + i)
+
+
+            # Push the task into supervisor.
+            motion.supervisor.addTask(motion.robot.tasks[self.body].name,
+                                      self.interval[0], self.interval[1],
+                                      self.priority,
+                                      tuple(unlockedDofs))
+
+        elif self.type == 'feature-com':
+            # Push the task into supervisor.
+            motion.supervisor.addTask(motion.robot.comTask.name,
+                                      self.interval[0], self.interval[1],
+                                      self.priority,
+                                      ())
+        else:
+            raise RuntimeError('invalid task type')
+
+    def configure(self, motion, yamlData):
+        """
+        Set the gain, the reference and the selection of the task.
+        """
         self.gain = yamlData['gain']
         self.reference = yamlData['reference']
 
         if self.type == 'feature-point-6d':
-            self.body = yamlData['operational-point']
-
             motion.robot.tasks[self.body].controlGain.value = self.gain
             if self.reference == 'static':
                 motion.robot.features[self.body]._reference.position.value = \
@@ -64,21 +97,6 @@ class MotionTask(Motion):
                 self.selec += '000'
             motion.robot.features[self.body].selec.value = self.selec
 
-            unlockedDofs = []
-            if self.body == 'left-wrist':
-                for i in xrange(6):
-                    unlockedDofs.append(6 + 12 + 2 + 2 + 7 + i)
-            elif self.body == 'right-wrist':
-                for i in xrange(6):
-                    unlockedDofs.append(6 + 12 + 2 + 2 + i)
-
-
-            # Push the task into supervisor.
-            motion.supervisor.addTask(motion.robot.tasks[self.body].name,
-                                      self.interval[0], self.interval[1],
-                                      self.priority,
-                                      tuple(unlockedDofs))
-
         elif self.type == 'feature-com':
             motion.robot.comTask.controlGain.value = self.gain
             if self.reference == 'static':
@@ -88,13 +106,8 @@ class MotionTask(Motion):
                 motion.robot.featureComDes.position.value = \
                     (self.reference.get('x', 0.), self.reference.get('y', 0.))
 
-            # Push the task into supervisor.
-            motion.supervisor.addTask(motion.robot.comTask.name,
-                                      self.interval[0], self.interval[1],
-                                      self.priority,
-                                      ())
-        else:
-            raise RuntimeError('invalid task type')
+    def reload(self, motion, yamlData):
+        self.configure(motion, yamlData)
 
     def __str__(self):
         return "task motion (type = {0})".format(self.type)
@@ -32,6 +32,8 @@ class MotionVisualPoint(Motion):
     gain = None
     objectName = None
 
+    reloadableKeys = ['gain']
+
     def __init__(self, motion, yamlData, defaultDirectories):
         checkDict('interval', yamlData)
 
@@ -46,12 +48,15 @@ class MotionVisualPoint(Motion):
         if self.interval[0] != 0 and self.interval[1] != motion.duration:
             raise NotImplementedError
 
+        # Entities are taken from the pool and configured again.
+        (self.fvpDes, self.vispPointProjection, self.fvp, self.task) = \
+            acquireEntities(self.yaml_tag, motion.robot,
+                            lambda n: self.createEntities(motion, n))
+
         # Desired feature
-        self.fvpDes = FeatureVisualPoint('fvpDes'+str(id(yamlData)))
         self.fvpDes.xy.value = (0., 0.)
 
         # Feature
-        self.vispPointProjection = VispPointProjection('vpp'+str(id(yamlData)))
         self.vispPointProjection.cMo.value = (
             (1., 0., 0., 0.),
             (0., 1., 0., 0.),
@@ -59,7 +64,6 @@ class MotionVisualPoint(Motion):
             (0., 0., 0., 1.),)
         self.vispPointProjection.cMoTimestamp.value = (0., 0.)
 
-        self.fvp = FeatureVisualPoint('fvp'+str(id(yamlData)))
         plug(self.vispPointProjection.xy, self.fvp.xy)
         plug(self.vispPointProjection.Z, self.fvp.Z)
 
@@ -72,7 +76,7 @@ class MotionVisualPoint(Motion):
         self.fvp.jacobian.recompute(self.fvp.jacobian.time + 1)
 
         # Task
-        self.task = Task('task_fvp_'+str(id(yamlData)))
+        self.task.clear()
         self.task.add(self.fvp.name)
         self.task.controlGain.value = self.gain
 
@@ -86,6 +90,17 @@ class MotionVisualPoint(Motion):
                                   #FIXME: HRP-2 specific
                                   (6 + 14, 6 + 15))
 
+    @staticmethod
+    def createEntities(motion, n):
+        return (FeatureVisualPoint(motion.entityName('fvpDes{0}'.format(n))),
+                VispPointProjection(motion.entityName('vpp{0}'.format(n))),
+                FeatureVisualPoint(motion.entityName('fvp{0}'.format(n))),
+                Task(motion.entityName('task_fvp_{0}'.format(n))))
+
+    def reload(self, motion, yamlData):
+        self.gain = yamlData.get('gain', 1.)
+        self.task.controlGain.value = self.gain
+
     def __str__(self):
         msg = "visual point motion (frame: {0}, object: {1})"
         return msg.format(self.frameName, self.objectName)
@@ -102,3 +117,11 @@ class MotionVisualPoint(Motion):
 
         for s in ['error']:
             addTrace(self.robot, trace, self.task.name, s)
+
+    def teardown(self):
+        if self.task:
+            self.solver.sot.remove(self.task.name)
+            releaseEntities(self.yaml_tag, self.robot,
+                            (self.fvpDes, self.vispPointProjection, self.fvp,
+                             self.task))
+            self.task = None
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of dynamic-graph.
+# dynamic-graph is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# dynamic-graph is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+from dynamic_graph import plug
+from dynamic_graph.sot.core import FeatureGeneric, Task
+from dynamic_graph.sot.motion_planner import VispPointsProjection
+from dynamic_graph.sot.motion_planner.motion_plan.tools import *
+
+from dynamic_graph.sot.motion_planner.motion_plan.motion.abstract import *
+
+class MotionVisualPoints(Motion):
+    """
+    Control the image position of several points of an object.
+
+    All the points are projected by one VispPointsProjection entity
+    and stacked into a single feature, hence a single task and a
+    single level of the stack whatever the number of points.
+
+    YAML keys:
+    - object-name: tracked object, its position is provided by ViSP,
+    - frame-name: robot frame of the camera,
+    - points: list of (x, y, z) points in the object frame,
+    - desired (optional): list of (x, y) desired image positions,
+      the image center by default,
+    - name (optional): element name, the object name by default,
+    - unlocked-dofs (optional): degrees of freedom released from
+      the posture task when the task is active.
+    """
+    yaml_tag = u'visual-points'
+
+    gain = None
+    objectName = None
+
+    reloadableKeys = ['gain', 'desired']
+
+    #FIXME: HRP-2 specific (head).
+    defaultUnlockedDofs = (6 + 14, 6 + 15)
+
+    def __init__(self, motion, yamlData, defaultDirectories):
+        for key in ['interval', 'object-name', 'frame-name', 'points']:
+            checkDict(key, yamlData)
+
+        Motion.__init__(self, motion, yamlData)
+
+        self.objectName = yamlData['object-name']
+        self.frameName = yamlData['frame-name']
+        self.name = yamlData.get('name', self.objectName)
+
+        self.gain = yamlData.get('gain', 1.)
+
+        self.points = tuple(map(lambda p: tuple(map(float, p)),
+                                yamlData['points']))
+        if not self.points or any(len(p) != 3 for p in self.points):
+            raise RuntimeError('invalid points for visual points element '
+                               '\'{0}\''.format(self.name))
+
+        desired = self.desiredPoints(yamlData)
+
+        unlockedDofs = tuple(yamlData.get('unlocked-dofs',
+                                          self.defaultUnlockedDofs))
+
+        # Projection
+        self.projection = VispPointsProjection(
+            motion.entityName('visual_points_projection_' + self.name))
+        self.projection.setPoints(self.points)
+        self.projection.cMo.value = (
+            (1., 0., 0., 0.),
+            (0., 1., 0., 0.),
+            (0., 0., 1., 1.),
+            (0., 0., 0., 1.),)
+        self.projection.cMoTimestamp.value = (0., 0.)
+        self.projection.xyDes.value = desired
+        plug(motion.robot.frames[self.frameName].jacobian,
+             self.projection.Jq)
+
+        # Feature
+        self.feature = FeatureGeneric(
+            motion.entityName('visual_points_feature_' + self.name))
+        plug(self.projection.error, self.feature.errorIN)
+        plug(self.projection.jacobian, self.feature.jacobianIN)
+
+        self.feature.error.recompute(self.feature.error.time + 1)
+        self.feature.jacobian.recompute(self.feature.jacobian.time + 1)
+
+        # Task
+        self.task = Task(motion.entityName('visual_points_task_' + self.name))
+        self.task.add(self.feature.name)
+        self.task.controlGain.value = self.gain
+
+        self.task.error.recompute(self.task.error.time + 1)
+        self.task.jacobian.recompute(self.task.jacobian.time + 1)
+
+        # Push the task into supervisor, it is added to and removed
+        # from the stack following the interval.
+        motion.supervisor.addTask(self.task.name,
+                                  self.interval[0], self.interval[1],
+                                  self.priority,
+                                  unlockedDofs)
+
+    def desiredPoints(self, yamlData):
+        desired = yamlData.get('desired', [[0., 0.]] * len(self.points))
+        if len(desired) != len(self.points) \
+                or any(len(p) != 2 for p in desired):
+            raise RuntimeError('invalid desired points for visual points '
+                               'element \'{0}\''.format(self.name))
+        return tuple([float(v) for p in desired for v in p])
+
+    def reload(self, motion, yamlData):
+        desired = self.desiredPoints(yamlData)
+        self.gain = yamlData.get('gain', 1.)
+        self.projection.xyDes.value = desired
+        self.task.controlGain.value = self.gain
+
+    def __str__(self):
+        msg = "visual points motion (frame: {0}, object: {1}, points: {2})"
+        return msg.format(self.frameName, self.objectName, len(self.points))
+
+    def setupTrace(self, trace):
+        for s in ['xy', 'error']:
+            addTrace(self.robot, trace, self.projection.name, s)
+
+        for s in ['error']:
+            addTrace(self.robot, trace, self.task.name, s)
@@ -16,10 +16,15 @@
 # dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import print_function
+import numpy as np
+
 from dynamic_graph.sot.motion_planner.feet_follower_graph \
     import FeetFollowerAnalyticalPgGraph
+from dynamic_graph.sot.motion_planner.footstep_stream \
+    import FootstepStream, FootstepServer
 
 from dynamic_graph.sot.motion_planner.math import *
+from dynamic_graph.sot.motion_planner.motion_plan.footstep_compiler import *
 from dynamic_graph.sot.motion_planner.motion_plan.tools import *
 
 from dynamic_graph.sot.motion_planner.motion_plan.motion.abstract import *
@@ -32,18 +37,77 @@ class MotionWalk(Motion):
     gazeFile = None
     feetFollower = None
 
+    """
+    Feasibility report of the footsteps (see checkFootsteps).
+    """
+    footstepReport = None
+
+    """
+    Side of the first swing foot. The pattern generator starts every
+    segment with the left foot stable, i.e. the right one swinging.
+    """
+    firstSide = -1
+
+    reloadableKeys = ['footsteps']
+
+    """
+    Footstep stream, only set if the walk is generated by windows.
+    """
+    footstepStream = None
+    footstepServer = None
+
     def __init__(self, motion, yamlData, defaultDirectories):
         checkDict('interval', yamlData)
         checkDict('footsteps', yamlData)
 
         Motion.__init__(self, motion, yamlData)
 
-        steps = convertToNPFootstepsStack(yamlData['footsteps'])
-        self.footsteps = yamlData['footsteps']
         self.comZ = yamlData.get('comZ')
 
-        #FIXME: handle multiple walk movement.
-        motion.footsteps = yamlData['footsteps']
+        # Walks are executed by the feet follower of the first walk,
+        # each one as a separate segment.
+        walks = [e for e in motion.motion if type(e) == MotionWalk]
+
+        # Expand the footstep generators and reject unfeasible
+        # footsteps before generating the walk.
+        (self.footsteps, self.footstepReport) = self.compile(
+            yamlData['footsteps'], self.firstSide,
+            FootstepLimits(motion.plan.get('footstep-limits')))
+        steps = tuple(self.footsteps.tolist())
+        if walks:
+            self.addSegment(motion, walks, steps, yamlData)
+        else:
+            self.createFeetFollower(motion, steps, yamlData,
+                                    defaultDirectories)
+
+    @staticmethod
+    def compile(footsteps, firstSide, limits):
+        """
+        Compile and check footsteps, raise if they are unfeasible.
+
+        Return the compiled footsteps and their report (see
+        compileFootsteps and checkFootsteps).
+        """
+        compiled = compileFootsteps(footsteps, firstSide)
+        report = checkFootsteps(compiled, limits, firstSide)
+        if not report.isFeasible():
+            raise RuntimeError('unfeasible footsteps: ' + str(report))
+        return (compiled, report)
+
+    def reload(self, motion, yamlData):
+        """
+        Compile the new footsteps.
+
+        The walks share the feet follower of the first one: the walk
+        is only generated again by MotionPlan.reload once all the
+        walks have been reloaded (see MotionPlan.generateWalk).
+        """
+        (self.footsteps, self.footstepReport) = self.compile(
+            yamlData['footsteps'], self.firstSide,
+            FootstepLimits(motion.plan.get('footstep-limits')))
+
+    def createFeetFollower(self, motion, steps, yamlData, defaultDirectories):
+        motion.footsteps = self.footsteps
 
         self.waistFile = searchFile(yamlData.get('waist-trajectory'),
                                     defaultDirectories)
@@ -51,15 +115,70 @@ class MotionWalk(Motion):
                                     defaultDirectories)
         self.zmpFile = searchFile(yamlData.get('zmp-trajectory'),
                                     defaultDirectories)
+
+        # Streaming: footsteps are only the first steps of the walk,
+        # the next ones are pushed while walking.
+        streaming = yamlData.get('streaming')
+        windowSize = None
+        if streaming:
+            # Pushed steps are appended to the last segment: the
+            # streamed walk must be the only one.
+            walks = [m for m in motion.plan['motion']
+                     if m.keys() == [self.yaml_tag]]
+            if len(walks) > 1:
+                raise RuntimeError(
+                    'a streamed walk must be the only walk of the plan')
+            windowSize = int(streaming.get('window', 4))
+
         self.feetFollower = FeetFollowerAnalyticalPgGraph(
             motion.robot, motion.solver, steps,
             waistFile = self.waistFile,
             gazeFile = self.gazeFile,
             zmpFile = self.zmpFile,
-            comZ = self.comZ)
+            comZ = self.comZ,
+            windowSize = windowSize,
+            startTime = self.interval[0],
+            namespace = motion.namespace)
+
+        if streaming:
+            self.footstepStream = FootstepStream(
+                self.feetFollower.feetFollower)
+            if 'port' in streaming:
+                self.footstepServer = FootstepServer(
+                    self.footstepStream, int(streaming['port']))
+                self.footstepServer.start()
         #FIXME: make tracing and walking independent.
         motion.trace = self.feetFollower.trace
 
+        self.addTasks(motion, self.interval[0], self.interval[1])
+
+    def addSegment(self, motion, walks, steps, yamlData):
+        if 'streaming' in yamlData:
+            raise RuntimeError(
+                'a streamed walk must be the only walk of the plan')
+        for key in ['comZ', 'waist-trajectory',
+                    'gaze-trajectory', 'zmp-trajectory']:
+            if key in yamlData:
+                raise RuntimeError(
+                    '\'{0}\' is only allowed in the first walk'.format(key))
+        if self.interval[0] < walks[-1].interval[1]:
+            raise RuntimeError('walks must not overlap')
+
+        first = walks[0]
+        self.feetFollower = first.feetFollower
+        self.priority = first.priority
+        motion.footsteps = np.concatenate(
+            (motion.footsteps, self.footsteps))
+
+        feetFollower = self.feetFollower.feetFollower
+        feetFollower.startSegment(self.interval[0])
+        for step in steps:
+            feetFollower.pushStep(step)
+
+        # The robot stands on the feet follower between two walks.
+        self.addTasks(motion, first.interval[0], self.interval[1])
+
+    def addTasks(self, motion, start, end):
         unlockedDofsRleg = []
         unlockedDofsLleg = []
         for i in xrange(6):
@@ -70,28 +189,36 @@ class MotionWalk(Motion):
 
         # Push the tasks into supervisor.
         motion.supervisor.addTask(self.feetFollower.postureTask.name,
-                                  self.interval[0], self.interval[1],
+                                  start, end,
                                   self.priority + 9,
                                   ())
         motion.supervisor.addTask(self.robot.comTask.name,
-                                  self.interval[0], self.interval[1],
+                                  start, end,
                                   self.priority + 3,
                                   ())
         motion.supervisor.addTask(self.robot.tasks['left-ankle'].name,
-                                  self.interval[0], self.interval[1],
+                                  start, end,
                                   self.priority + 2,
                                   tuple(unlockedDofsLleg))
         motion.supervisor.addTask(self.robot.tasks['right-ankle'].name,
-                                  self.interval[0], self.interval[1],
+                                  start, end,
                                   self.priority + 1,
                                   tuple(unlockedDofsRleg))
         motion.supervisor.addTask(self.robot.tasks['waist'].name,
-                                  self.interval[0], self.interval[1],
+                                  start, end,
                                   self.priority,
                                   ())
 
     def __str__(self):
-        return "walking motion ({0} footstep(s))".format(len(self.footsteps))
+        msg = "walking motion ({0} footstep(s))".format(len(self.footsteps))
+        if self.footstepStream:
+            msg += ", " + str(self.footstepStream)
+        return msg
 
     def setupTrace(self, trace):
         pass
+
+    def teardown(self):
+        if self.footstepServer:
+            self.footstepServer.stop()
+            self.footstepServer = None
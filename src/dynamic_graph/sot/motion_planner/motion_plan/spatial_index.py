@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of dynamic-graph.
+# dynamic-graph is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# dynamic-graph is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import __builtin__
+import math
+import numpy as np
+
+from dynamic_graph.sot.motion_planner.motion_plan.footstep_compiler import \
+    footstepPoses
+from dynamic_graph.sot.motion_planner.motion_plan.tools import searchFile
+
+def _noop(*args, **kwargs):
+    return None
+
+class _ModelRecorder(dict):
+    """
+    Namespace in which an object model is executed.
+
+    Models are robot-viewer OpenGL scripts. The floor footprint of
+    the primitives they draw is recorded, every other OpenGL call is
+    ignored. The z coordinate is ignored: objects are supposed to
+    stand on the floor.
+
+    Each shape is (x, y, theta, hx, hy, r) in the object frame: a
+    rectangle of half extents (hx, hy) rounded by a radius r, a disk
+    being a rectangle of null extents.
+    """
+    def __init__(self):
+        dict.__init__(self)
+        self.shapes = []
+        self.frame = (0., 0., 0.)
+        self.stack = []
+
+        self['glTranslatef'] = self.translate
+        self['glTranslated'] = self.translate
+        self['glRotatef'] = self.rotate
+        self['glRotated'] = self.rotate
+        self['glPushMatrix'] = self.push
+        self['glPopMatrix'] = self.pop
+        self['glLoadIdentity'] = self.loadIdentity
+        self['glRectd'] = self.rect
+        self['glRectf'] = self.rect
+        self['gluDisk'] = self.disk
+        self['gluSphere'] = self.sphere
+        self['gluCylinder'] = self.cylinder
+
+    def __missing__(self, key):
+        if hasattr(__builtin__, key):
+            return getattr(__builtin__, key)
+        return _noop
+
+    def toFrame(self, x, y):
+        (fx, fy, ftheta) = self.frame
+        c = math.cos(ftheta)
+        s = math.sin(ftheta)
+        return (fx + c * x - s * y, fy + s * x + c * y)
+
+    def add(self, x, y, hx, hy, r):
+        (x, y) = self.toFrame(x, y)
+        self.shapes.append((x, y, self.frame[2], hx, hy, r))
+
+    def translate(self, x, y, z):
+        (x, y) = self.toFrame(x, y)
+        self.frame = (x, y, self.frame[2])
+
+    def rotate(self, angle, x, y, z):
+        # Only rotations around the vertical axis change the footprint.
+        if x == 0. and y == 0. and z != 0.:
+            theta = math.copysign(math.radians(angle), z)
+            self.frame = (self.frame[0], self.frame[1],
+                          self.frame[2] + theta)
+
+    def push(self):
+        self.stack.append(self.frame)
+
+    def pop(self):
+        self.frame = self.stack.pop()
+
+    def loadIdentity(self):
+        self.frame = (0., 0., 0.)
+
+    def rect(self, x1, y1, x2, y2):
+        self.add(.5 * (x1 + x2), .5 * (y1 + y2),
+                 .5 * abs(x2 - x1), .5 * abs(y2 - y1), 0.)
+
+    def disk(self, quad, inner, outer, slices = None, loops = None):
+        self.add(0., 0., 0., 0., outer)
+
+    def sphere(self, quad, radius, slices = None, stacks = None):
+        self.add(0., 0., 0., 0., radius)
+
+    def cylinder(self, quad, base, top, height,
+                 slices = None, stacks = None):
+        self.add(0., 0., 0., 0., max(base, top))
+
+_footprints = {}
+
+def modelFootprint(filename):
+    """
+    Return the floor footprint of an object model as a list of
+    shapes (see _ModelRecorder).
+
+    Models drawing the same primitive at several heights (shelves,
+    tables) only keep one copy of it. Footprints are cached.
+    """
+    if filename in _footprints:
+        return _footprints[filename]
+    recorder = _ModelRecorder()
+    source = open(filename, 'r').read()
+    exec(compile(source, filename, 'exec'), {}, recorder)
+
+    shapes = []
+    for shape in recorder.shapes:
+        shape = tuple([round(e, 9) for e in shape])
+        if not shape in shapes:
+            shapes.append(shape)
+    _footprints[filename] = shapes
+    return shapes
+
+def footRadius(filename):
+    """
+    Radius of the disk enclosing a footstep model, used to
+    approximate the foot in clearance checks.
+    """
+    res = 0.
+    for (x, y, theta, hx, hy, r) in modelFootprint(filename):
+        res = max(res, math.hypot(x, y) + math.hypot(hx, hy) + r)
+    return res
+
+def swingPositions(poses, samples):
+    """
+    Sample the ankle path of each swing.
+
+    The swing foot of step i goes from the footstep i - 2 to the
+    footstep i, the path is sampled at samples points strictly
+    between both footsteps. Return the (M, 2) array of positions and
+    the (M,) array of the corresponding steps.
+    """
+    if len(poses) < 3 or samples < 1:
+        return (np.zeros((0, 2)), np.zeros(0, dtype = np.int))
+    ratios = np.arange(1, samples + 1, dtype = np.float) / (samples + 1)
+    start = poses[:-2, 0:2]
+    end = poses[2:, 0:2]
+    positions = start[:, None, :] \
+        + ratios[None, :, None] * (end - start)[:, None, :]
+    steps = np.repeat(np.arange(2, len(poses)), samples)
+    return (positions.reshape(-1, 2), steps)
+
+class SpatialIndex(object):
+    """
+    Uniform grid indexing the floor footprint of the environment
+    objects.
+
+    Each cell stores the shapes whose footprint, inflated by the
+    clearance, overlaps it. A query point therefore only has to be
+    tested against the shapes of its cell: queries are answered for
+    all the points at once without scanning the whole environment.
+    """
+    cellSize = 0.25
+
+    def __init__(self, names, shapes, owners, clearance,
+                 cellSize = None):
+        """
+        names are the objects names, shapes the (M, 6) array of the
+        shapes in the world frame (see _ModelRecorder) and owners
+        the (M,) array of the index of the object of each shape.
+
+        A point collides with a shape if it is closer than
+        clearance, typically the foot radius plus a safety margin.
+        """
+        if cellSize:
+            self.cellSize = cellSize
+        self.names = list(names)
+        self.shapes = np.array(shapes, dtype = np.float).reshape(-1, 6)
+        self.owners = np.array(owners, dtype = np.int)
+        self.clearance = clearance
+
+        self.origin = np.zeros(2)
+        self.cells = np.zeros((0, 0, 0), dtype = np.int)
+        if not len(self.shapes):
+            return
+
+        # Axis-aligned bounding boxes of the inflated shapes.
+        c = np.abs(np.cos(self.shapes[:, 2]))
+        s = np.abs(np.sin(self.shapes[:, 2]))
+        inflate = self.shapes[:, 5] + clearance
+        extents = np.column_stack(
+            (c * self.shapes[:, 3] + s * self.shapes[:, 4] + inflate,
+             s * self.shapes[:, 3] + c * self.shapes[:, 4] + inflate))
+        lower = self.shapes[:, 0:2] - extents
+        upper = self.shapes[:, 0:2] + extents
+
+        self.origin = lower.min(axis = 0)
+        lowerCells = np.floor(
+            (lower - self.origin) / self.cellSize).astype(np.int)
+        upperCells = np.floor(
+            (upper - self.origin) / self.cellSize).astype(np.int)
+        size = upperCells.max(axis = 0) + 1
+
+        content = [[[] for j in xrange(size[1])] for i in xrange(size[0])]
+        for k in xrange(len(self.shapes)):
+            for i in xrange(lowerCells[k, 0], upperCells[k, 0] + 1):
+                for j in xrange(lowerCells[k, 1], upperCells[k, 1] + 1):
+                    content[i][j].append(k)
+
+        depth = max([len(cell) for row in content for cell in row])
+        self.cells = -np.ones((size[0], size[1], depth), dtype = np.int)
+        for i in xrange(size[0]):
+            for j in xrange(size[1]):
+                cell = content[i][j]
+                self.cells[i, j, :len(cell)] = cell
+
+    @staticmethod
+    def fromEnvironment(environment, defaultDirectories, clearance,
+                        cellSize = None):
+        """
+        Build the index of the planned positions of the objects of
+        a motion plan.
+        """
+        names = sorted(environment.keys())
+        shapes = []
+        owners = []
+        for (i, name) in enumerate(names):
+            obj = environment[name]
+            position = obj.plannedPosition
+            c = math.cos(position.rz)
+            s = math.sin(position.rz)
+            filename = searchFile(obj.plannedModel, defaultDirectories)
+            for (x, y, theta, hx, hy, r) in modelFootprint(filename):
+                shapes.append((position.x + c * x - s * y,
+                               position.y + s * x + c * y,
+                               position.rz + theta, hx, hy, r))
+                owners.append(i)
+        return SpatialIndex(names, shapes, owners, clearance, cellSize)
+
+    def query(self, points):
+        """
+        Return, for each of the (N, 2) points, the index of an object
+        colliding with it or -1.
+        """
+        points = np.array(points, dtype = np.float).reshape(-1, 2)
+        res = -np.ones(len(points), dtype = np.int)
+        if not len(points) or not self.cells.size:
+            return res
+
+        cell = np.floor((points - self.origin) / self.cellSize).astype(np.int)
+        inside = np.all((cell >= 0) & (cell < self.cells.shape[0:2]),
+                        axis = 1)
+        if not inside.any():
+            return res
+        points = points[inside]
+        candidates = self.cells[cell[inside, 0], cell[inside, 1]]
+
+        valid = candidates >= 0
+        shapes = self.shapes[np.where(valid, candidates, 0)]
+
+        # Distance to the rounded rectangles, in their frame.
+        dx = points[:, None, 0] - shapes[:, :, 0]
+        dy = points[:, None, 1] - shapes[:, :, 1]
+        c = np.cos(shapes[:, :, 2])
+        s = np.sin(shapes[:, :, 2])
+        x = c * dx + s * dy
+        y = -s * dx + c * dy
+        x -= np.clip(x, -shapes[:, :, 3], shapes[:, :, 3])
+        y -= np.clip(y, -shapes[:, :, 4], shapes[:, :, 4])
+        distance = np.hypot(x, y) - shapes[:, :, 5]
+
+        hit = valid & (distance < self.clearance)
+        first = candidates[np.arange(len(points)), hit.argmax(axis = 1)]
+        res[inside] = np.where(hit.any(axis = 1), self.owners[first], -1)
+        return res
+
+    def checkFootsteps(self, footsteps, start, swingSamples = 5):
+        """
+        Check a walk against the environment.
+
+        Both the footsteps and the path of the swing ankle are
+        checked (see footstepPoses and swingPositions). Return the
+        list of collisions as (step, object name, 'footstep' or
+        'swing') tuples, steps being numbered as in footstepPoses.
+        """
+        poses = footstepPoses(footsteps, start)
+        (swing, swingSteps) = swingPositions(poses, swingSamples)
+
+        # The feet before walking are not checked.
+        objects = self.query(np.vstack((poses[2:, 0:2], swing)))
+        steps = np.concatenate((np.arange(2, len(poses)), swingSteps))
+        kinds = ['footstep'] * (len(poses) - 2) + ['swing'] * len(swing)
+
+        res = []
+        for k in np.flatnonzero(objects >= 0):
+            collision = (int(steps[k]), self.names[objects[k]], kinds[k])
+            if not collision in res:
+                res.append(collision)
+        return res
+
+__all__ = ["modelFootprint", "footRadius", "swingPositions",
+           "SpatialIndex"]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of dynamic-graph.
+# dynamic-graph is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# dynamic-graph is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import print_function
+import yaml
+
+from dynamic_graph import plug
+from dynamic_graph.sot.motion_planner.feet_follower import \
+    Clock, SensorStandIn
+from dynamic_graph.sot.motion_planner.motion_plan.tools import *
+
+class SensorStandInScenario(object):
+    """
+    Replace the motion capture system and the visual trackers by a
+    SensorStandIn entity configured from a scenario file.
+
+    Each stream of the scenario is published under its name, i.e. the
+    perceived body of a mocap control element or the object name of
+    a ViSP control element. Its source is one of:
+
+    - signal: an operational point of the robot (dynamic entity),
+    - frame: a robot frame position,
+    - object: the planned position of an environment object,
+    - recorded: a stream of the replayed sensor recording,
+    - value: a constant value.
+
+    matrixHomo streams may also define a reference frame, using the
+    same format, in which the source is expressed.
+
+    As the robot is simulated, the shared clock is switched to
+    simulated time so that all the timestamps follow the control
+    iterations. The wall clock is restored by teardown.
+    """
+
+    """
+    Default stream parameters.
+    """
+    defaultJitter = 0.
+    defaultLatency = 0.
+    defaultDropout = 0.
+
+    def __init__(self, motion, filename, defaultDirectories,
+                 timeStep = 5e-3):
+        self.motion = motion
+        self.filename = filename
+        scenario = yaml.load(
+            open(searchFile(filename, defaultDirectories), "r"))
+
+        self.clock = Clock(motion.entityName('clock'))
+        self.clock.setSimulated(timeStep)
+
+        self.entity = SensorStandIn(motion.entityName('sensor_stand_in'))
+        self.entity.setTimeStep(timeStep)
+        self.entity.setSeed(scenario.get('seed', 0))
+
+        self.streams = []
+        for stream in scenario.get('streams', []):
+            self.addStream(stream)
+
+        self.motion.robot.device.after.addSignal(
+            self.entity.name + '.trigger')
+
+    def __str__(self):
+        return "sensor stand-in \'{0}\' (streams: {1})".format(
+            self.filename, ', '.join(self.streams))
+
+    def addStream(self, stream):
+        for key in ['name', 'type', 'source', 'rate']:
+            checkDict(key, stream)
+        name = stream['name']
+        rate = float(stream['rate'])
+        if rate <= 0.:
+            raise RuntimeError(
+                'invalid rate for stream \'{0}\''.format(name))
+
+        self.entity.addStream(stream['type'], name,
+                              1. / rate,
+                              float(stream.get('jitter', self.defaultJitter)),
+                              float(stream.get('latency', self.defaultLatency)),
+                              float(stream.get('dropout', self.defaultDropout)))
+        self.plugSource(stream['source'],
+                        self.entity.signal(name + 'Source'))
+        if 'reference' in stream:
+            self.plugSource(stream['reference'],
+                            self.entity.signal(name + 'Reference'))
+        self.streams.append(name)
+
+    def plugSource(self, source, signal):
+        robot = self.motion.robot
+        if 'signal' in source:
+            plug(robot.dynamic.signal(source['signal']), signal)
+        elif 'frame' in source:
+            plug(robot.frames[source['frame']].position, signal)
+        elif 'object' in source:
+            obj = self.motion.environment.get(source['object'])
+            if not obj:
+                raise RuntimeError(
+                    'object \'{0}\' does not exist'.format(source['object']))
+            signal.value = obj.plannedPosition.dgRotationMatrix()
+        elif 'recorded' in source:
+            if not self.motion.sensorReplay:
+                raise RuntimeError('recorded sources require a sensor replay')
+            plug(self.motion.sensorReplay.signal(source['recorded']), signal)
+        elif 'value' in source:
+            value = source['value']
+            if len(value) and isinstance(value[0], (list, tuple)):
+                value = tuple(map(tuple, value))
+            else:
+                value = tuple(value)
+            signal.value = value
+        else:
+            raise RuntimeError('invalid stream source {0}'.format(source))
+
+    def teardown(self):
+        self.motion.robot.device.after.rmSignal(
+            self.entity.name + '.trigger')
+        self.clock.setWallClock()
+
+    def hasStream(self, name):
+        if name.endswith('Timestamp'):
+            name = name[:-len('Timestamp')]
+        return name in self.streams
+
+    def signal(self, name):
+        return self.entity.signal(name)
+
+__all__ = ["SensorStandInScenario"]
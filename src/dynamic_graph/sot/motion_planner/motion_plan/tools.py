@@ -16,42 +16,81 @@
 # dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import print_function
+import numpy as np
+
+from dynamic_graph.sot.motion_planner.motion_plan.footstep_compiler import \
+    compileFootsteps
+
+# Signals recomputed at each iteration for a tracer, see removeTraces.
+_tracedSignals = {}
 
 def addTrace(robot, trace, entityName, signalName):
     trace.add(entityName + '.' + signalName,
               entityName + '-' + signalName)
     robot.device.after.addSignal(entityName + '.' + signalName)
+    signals = _tracedSignals.setdefault(trace.name, [])
+    if not entityName + '.' + signalName in signals:
+        signals.append(entityName + '.' + signalName)
+
+def removeTraces(robot, trace):
+    """
+    Stop recomputing at each iteration the signals traced by a tracer.
+    """
+    for signal in _tracedSignals.pop(trace.name, []):
+        robot.device.after.rmSignal(signal)
+
+def prefixEntityName(namespace, name):
+    """
+    Prefix an entity name by a namespace so that several motion plans
+    can coexist in the same process. An empty namespace keeps the
+    name unchanged.
+    """
+    if not namespace:
+        return name
+    return namespace + '_' + name
+
+# Released entities and number of created entities per (kind, robot),
+# see acquireEntities.
+_freeEntities = {}
+_createdEntities = {}
+
+def acquireEntities(kind, robot, create):
+    """
+    Take entities of a given kind from the pool.
+
+    Entities cannot be destroyed: the entities of a released motion
+    element (see releaseEntities) are reused by the next element of
+    the same kind driving the same robot, which has to reconfigure
+    them. If none is available, create(n) is called to build new
+    ones, n being a number unique for this kind and robot.
+
+    The pool is shared by all the namespaces: reused entities keep the
+    name given by the plan which created them.
+    """
+    key = (kind, robot.name)
+    free = _freeEntities.get(key)
+    if free:
+        return free.pop()
+    n = _createdEntities.get(key, 0)
+    _createdEntities[key] = n + 1
+    return create(n)
+
+def releaseEntities(kind, robot, entities):
+    """
+    Give back to the pool entities taken by acquireEntities.
+
+    The tasks must have been removed from the solver stack first: they
+    are reconfigured as soon as they are taken again.
+    """
+    _freeEntities.setdefault((kind, robot.name), []).append(entities)
 
 def convertToNPFootstepsStack(footsteps):
-    minSlides = (-1.52, -0.76)
-
-    res = []
-    for step in footsteps:
-        slide1 = step.get('slide1')
-        slide2 = step.get('slide2')
-
-        if not slide1:
-            if len(res) == 0:
-                slide1 = 0.
-            else:
-                slide1 = minSlides[0]
-        if not slide2:
-            slide2 = minSlides[1]
-        res.append((slide1,
-                    step.get('horizontal-distance', 0.24),
-                    step.get('height', 0.25),
-                    slide2,
-                    step.get('x', 0.), step.get('y', 0.),
-                    step.get('theta', 0.)))
-    return tuple(res)
+    return tuple(compileFootsteps(footsteps).tolist())
 
 def makeFootsteps(footsteps):
-    res = []
-    for step in footsteps:
-        res.append(step.get('x', 0.))
-        res.append(step.get('y', 0.))
-        res.append(step.get('theta', 0.))
-    return tuple(res)
+    steps = compileFootsteps(footsteps)
+    return tuple(np.column_stack(
+            (steps['x'], steps['y'], steps['theta'])).flatten().tolist())
 
 def find(f, seq):
   """Return first item in sequence where f(item) == True."""
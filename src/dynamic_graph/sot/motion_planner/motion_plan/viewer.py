@@ -204,6 +204,7 @@ class MotionPlanViewer(object):
         if self.plan.feetFollower:
             self.plan.feetFollower.trace.dump()
 
+        self.plan.dumpSensors()
         self.storePositions()
 
         # Try to reset the robot.
@@ -234,6 +235,11 @@ class MotionPlanViewer(object):
         animation = WaitingAnimation()
         sys.stdout.write('Waiting for motion to initialize... ')
         while not self.plan.canStart() and not self.shouldExit:
+            if self.plan.hasTimedOut():
+                sys.stdout.write('\n')
+                self.logger.error('initial position not reached in time')
+                self.logger.error(self.plan.convergenceReport())
+                return
             self.robot.device.increment(self.step)
             animation.write(sys.stdout)
             sys.stdout.flush()
@@ -293,10 +299,17 @@ class MotionPlanViewer(object):
             sys.stdout.write(s)
             sys.stdout.flush()
 
-            if tAll < self.step:
+            self.plan.flushEvents()
+            self.plan.checkClearance()
+
+            # Replayed sensors do not depend on the wall clock, do
+            # not wait.
+            if tAll < self.step and not self.plan.sensorReplay:
                 time.sleep(self.step - tAll)
         sys.stdout.write('\n')
+        self.plan.flushEvents()
         self.logger.info('execution finished')
+        self.plan.dumpSensors()
         self.storePositions()
         if self.plan.feetFollower:
             self.plan.feetFollower.trace.dump()
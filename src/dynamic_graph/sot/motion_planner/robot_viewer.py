@@ -92,6 +92,19 @@ def drawFootsteps(clt, plan, robot, startLeft, startRight, elements,
         clt.updateElementConfig(name, pose(pos))
         i = i + 1
 
+def supportPhases(plan):
+    """
+    Return the support phases of the corrected walk as a list of
+    (start time, support foot) where the support foot is -1 (double
+    support), 0 (left) or 1 (right).
+    """
+    try:
+        phases = plan.feetFollower.feetFollower.getSupportPhases()
+    except AttributeError:
+        return []
+    return [(phases[i], int(phases[i + 1]))
+            for i in xrange(0, len(phases), 2)]
+
 def drawFootstepsFromFile(clt, filename,  startRight, elements, suffix='',
                           create = True):
     f = open('/tmp/' + str(filename))
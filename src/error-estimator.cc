@@ -177,9 +177,11 @@ ErrorEstimator::~ErrorEstimator ()
 size_t
 ErrorEstimator::timestampToIndex (const ml::Vector& timestamp)
 {
-  ptime_t time = sot::motionPlanner::timestampToDateTime(timestamp);
+  const sot::motionPlanner::nanoseconds_t time =
+    sot::motionPlanner::timestampToNanoseconds (timestamp);
 
-  typedef boost::tuple<ptime_t, int, sot::MatrixHomogeneous> pair_t;
+  typedef boost::tuple<sot::motionPlanner::nanoseconds_t, unsigned,
+		       sot::MatrixHomogeneous> pair_t;
   for (int i = plannedPositions_.size () - 1; i >= 0; --i)
     {
       const pair_t& e = plannedPositions_[i];
@@ -192,9 +194,6 @@ ErrorEstimator::timestampToIndex (const ml::Vector& timestamp)
 ml::Vector&
 ErrorEstimator::updateError (ml::Vector& res, int t)
 {
-  using namespace boost::gregorian;
-  using namespace boost::posix_time;
-
   if (res.size () != 3)
     res.resize (3);
   res.setZero ();
@@ -214,15 +213,15 @@ ErrorEstimator::updateError (ml::Vector& res, int t)
 
   //FIXME: here we suppose implicit sync between feet follower and
   //error estimation.
-  //static const int delta_usec = 1500 * 1000; // 150ms.
+  //static const sot::motionPlanner::nanoseconds_t delta_nsec =
+  //  150 * 1000 * 1000; // 150ms.
 
-  static const int delta_usec = 0;
+  static const sot::motionPlanner::nanoseconds_t delta_nsec = 0;
 
   plannedPositions_.push_back
     (boost::make_tuple
-     (boost::posix_time::microsec_clock::universal_time ()
-      + microseconds (delta_usec),
-      t, planned_ (t)));
+     (sot::motionPlanner::SharedClock::instance ().now (t) + delta_nsec,
+      static_cast<unsigned> (t), planned_ (t)));
 
   if (positionTimestamp_ (t).size () != 2)
     return res;
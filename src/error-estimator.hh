@@ -20,7 +20,6 @@
 # include <utility>
 
 # include <boost/array.hpp>
-# include <boost/date_time/posix_time/posix_time_types.hpp>
 # include <boost/shared_ptr.hpp>
 # include <boost/tuple/tuple.hpp>
 
@@ -39,6 +38,7 @@
 # include "common.hh"
 # include "discretized-trajectory.hh"
 # include "feet-follower.hh"
+# include "time.hh"
 
 namespace ml = ::maal::boost;
 namespace dg = ::dynamicgraph;
@@ -113,9 +113,6 @@ class ErrorEstimator : public dg::Entity
 {
   DYNAMIC_GRAPH_ENTITY_DECL ();
  public:
-  /// \brief POSIX time
-  typedef boost::posix_time::ptime ptime_t;
-
   /// \brief Input vector signal.
   typedef dg::SignalPtr<ml::Vector, int> signalVectorIn_t;
   /// \brief Input homogeneous matrix signal.
@@ -217,7 +214,8 @@ protected:
   FeetFollower* referenceTrajectory_;
 
   /// \brief Set of past planned positions (time, index, position).
-  std::vector<boost::tuple<ptime_t, unsigned, sot::MatrixHomogeneous> >
+  std::vector<boost::tuple<sot::motionPlanner::nanoseconds_t, unsigned,
+			   sot::MatrixHomogeneous> >
   plannedPositions_;
 
   /// \brief Did the movement start?
@@ -14,9 +14,42 @@
 // received a copy of the GNU Lesser General Public License along with
 // sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
 
+#include <cmath>
+
 #include <boost/assign.hpp>
 
+#include <dynamic-graph/command-setter.h>
+
 #include "error-merger.hh"
+#include "time.hh"
+
+namespace
+{
+  /// \brief Invert a 3x3 matrix.
+  ///
+  /// \return false if the matrix is singular.
+  bool inverse3 (const ml::Matrix& m, ml::Matrix& res)
+  {
+    const double c00 = m (1, 1) * m (2, 2) - m (1, 2) * m (2, 1);
+    const double c01 = m (1, 2) * m (2, 0) - m (1, 0) * m (2, 2);
+    const double c02 = m (1, 0) * m (2, 1) - m (1, 1) * m (2, 0);
+    const double det = m (0, 0) * c00 + m (0, 1) * c01 + m (0, 2) * c02;
+
+    if (std::fabs (det) < 1e-12)
+      return false;
+
+    res (0, 0) = c00 / det;
+    res (1, 0) = c01 / det;
+    res (2, 0) = c02 / det;
+    res (0, 1) = (m (0, 2) * m (2, 1) - m (0, 1) * m (2, 2)) / det;
+    res (1, 1) = (m (0, 0) * m (2, 2) - m (0, 2) * m (2, 0)) / det;
+    res (2, 1) = (m (0, 1) * m (2, 0) - m (0, 0) * m (2, 1)) / det;
+    res (0, 2) = (m (0, 1) * m (1, 2) - m (0, 2) * m (1, 1)) / det;
+    res (1, 2) = (m (0, 2) * m (1, 0) - m (0, 0) * m (1, 2)) / det;
+    res (2, 2) = (m (0, 0) * m (1, 1) - m (0, 1) * m (1, 0)) / det;
+    return true;
+  }
+} // end of anonymous namespace.
 
 namespace command
 {
@@ -37,28 +70,57 @@ namespace command
       const std::vector<Value>& values = getParameterValues();
       const std::string& errorName = values[0].value();
 
-      ErrorMerger::signalVectorIn_t* signal =
-	new ErrorMerger::signalVectorIn_t
-	(dg::nullptr,
-	 MAKE_SIGNAL_STRING
-	 (errorMerger.getName(), true, "Vector", "error_" + errorName));
+      ErrorMerger::ErrorSource source;
+      source.hasCovariance = false;
+      source.hasTimestamp = false;
+      source.error.reset
+	(new ErrorMerger::signalVectorIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING
+	  (errorMerger.getName(), true, "Vector", "error_" + errorName)));
+      source.weight.reset
+	(new ErrorMerger::signalVectorIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING
+	  (errorMerger.getName(), true, "Vector", "weight_" + errorName)));
+      source.covariance.reset
+	(new ErrorMerger::signalMatrixIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING
+	  (errorMerger.getName(), true, "Matrix", "covariance_" + errorName)));
+      source.timestamp.reset
+	(new ErrorMerger::signalVectorIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING
+	  (errorMerger.getName(), true, "Vector", "timestamp_" + errorName)));
 
-      ErrorMerger::signalVectorIn_t* signalWeight =
-	new ErrorMerger::signalVectorIn_t
-	(dg::nullptr,
-	 MAKE_SIGNAL_STRING
-	 (errorMerger.getName(), true, "Vector", "weight_" + errorName));
+      errorMerger.sources ().push_back (source);
+      errorMerger.signalRegistration (*source.error << *source.weight
+				      << *source.covariance
+				      << *source.timestamp);
 
+      errorMerger.errorOut ().addDependency (*source.error);
+      errorMerger.errorOut ().addDependency (*source.weight);
+      errorMerger.errorOut ().addDependency (*source.covariance);
+      errorMerger.errorOut ().addDependency (*source.timestamp);
 
-      errorMerger.errorsIn ().push_back
-	(std::make_pair
-	 (boost::shared_ptr<ErrorMerger::signalVectorIn_t> (signal),
-	  boost::shared_ptr<ErrorMerger::signalVectorIn_t> (signalWeight)));
-      errorMerger.signalRegistration (*signal << *signalWeight);
+      errorMerger.resolvePlugging ();
+      return Value ();
+    }
 
-      errorMerger.errorOut ().addDependency (*signal);
-      errorMerger.errorOut ().addDependency (*signalWeight);
+    ResolvePlugging::ResolvePlugging (ErrorMerger& entity,
+				      const std::string& docstring)
+      : Command
+	(entity,
+	 std::vector<Value::Type> (),
+	 docstring)
+    {}
 
+    Value
+    ResolvePlugging::doExecute ()
+    {
+      ErrorMerger& errorMerger = static_cast<ErrorMerger&> (owner ());
+      errorMerger.resolvePlugging ();
       return Value ();
     }
   } // end of namespace errorMerger.
@@ -67,63 +129,217 @@ namespace command
 
 ErrorMerger::ErrorMerger (const std::string& name)
   : dg::Entity (name),
-    errorsIn_ (),
-    errorOut_ (INIT_SIGNAL_OUT ("error", ErrorMerger::updateError, "Vector"))
+    sources_ (),
+    activeSources_ (),
+    nbUsedSources_ (0),
+    errorOut_ (INIT_SIGNAL_OUT ("error", ErrorMerger::updateError, "Vector")),
+    covarianceOut_ (boost::bind (&ErrorMerger::updateCovariance, this, _1, _2),
+		    errorOut_,
+		    MAKE_SIGNAL_STRING (name, false, "Matrix", "covariance")),
+    activeSourcesOut_
+    (boost::bind (&ErrorMerger::updateActiveSources, this, _1, _2),
+     errorOut_,
+     MAKE_SIGNAL_STRING (name, false, "Vector", "activeSources")),
+    stalenessNoise_ (3),
+    maximumAge_ (0.),
+    covariance_ (3, 3),
+    information_ (3, 3),
+    sourceCovariance_ (3, 3),
+    sourceInformation_ (3, 3),
+    informationVector_ (3)
 {
-  signalRegistration (errorOut_);
+  signalRegistration (errorOut_ << covarianceOut_ << activeSourcesOut_);
   errorOut_.setNeedUpdateFromAllChildren (true);
+  covarianceOut_.setNeedUpdateFromAllChildren (true);
+  activeSourcesOut_.setNeedUpdateFromAllChildren (true);
 
   ml::Vector zero (3);
   zero.setZero ();
   errorOut_.setConstant(zero);
 
+  // Default variance growth rate, in m^2/s and rad^2/s: a stale
+  // measurement variance is increased by 1e-4 after one second (1cm
+  // or 0.01rad), its standard deviation grows as the square root of
+  // the age. This is only meaningful w.r.t. the sources covariances:
+  // sources without covariance use the identity and are not affected.
+  stalenessNoise_ (0) = 1e-4;
+  stalenessNoise_ (1) = 1e-4;
+  stalenessNoise_ (2) = 1e-4;
+  covariance_.setZero ();
+
   std::string docstring;
   addCommand
     ("addErrorEstimation",
      new command::errorMerger::AddErrorEstimation (*this, docstring));
 
+  docstring =
+    "    \n"
+    "    Check which source signals are plugged\n"
+    "    \n"
+    "      This must be called once all the source signals have\n"
+    "      been plugged (or set). Sources whose error or weight\n"
+    "      is not plugged are ignored.\n"
+    "    \n";
+  addCommand
+    ("resolvePlugging",
+     new command::errorMerger::ResolvePlugging (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the covariance growth rate of stale measurements\n"
+    "    \n"
+    "      The covariance of a measurement acquired dt seconds ago\n"
+    "      is C + dt * diag (noise), noise being a variance rate\n"
+    "      (m^2/s, rad^2/s). C is the identity for sources without\n"
+    "      covariance: staleness only makes sense if the sources\n"
+    "      provide their covariance.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a vector of three elements: noise (x, y, theta).\n"
+    "    \n";
+  addCommand
+    ("setStalenessNoise",
+     new dg::command::Setter<ErrorMerger, ml::Vector>
+     (*this, &ErrorMerger::setStalenessNoise, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the maximum age of measurements\n"
+    "    \n"
+    "      Older measurements are discarded. Zero disables\n"
+    "      this check.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a double: maximum age in seconds.\n"
+    "    \n";
+  addCommand
+    ("setMaximumAge",
+     new dg::command::Setter<ErrorMerger, double>
+     (*this, &ErrorMerger::setMaximumAge, docstring));
 }
 
 ErrorMerger::~ErrorMerger ()
 {}
 
+void
+ErrorMerger::setStalenessNoise (const ml::Vector& noise)
+{
+  if (noise.size () != 3)
+    throw std::runtime_error ("staleness noise must contain 3 elements");
+  stalenessNoise_ = noise;
+}
+
+void
+ErrorMerger::resolvePlugging ()
+{
+  activeSources_.clear ();
+  activeSources_.reserve (sources_.size ());
+  for (unsigned i = 0; i < sources_.size (); ++i)
+    {
+      ErrorSource& source = sources_[i];
+      source.hasCovariance = source.covariance->isPlugged ();
+      source.hasTimestamp = source.timestamp->isPlugged ();
+
+      if (source.error->isPlugged () && source.weight->isPlugged ())
+	activeSources_.push_back (&source);
+    }
+}
+
+double
+ErrorMerger::computeAge (const ml::Vector& timestamp, int t)
+{
+  if (timestamp.size () != 2)
+    return 0.;
+  const sot::motionPlanner::nanoseconds_t age =
+    sot::motionPlanner::SharedClock::instance ().now (t)
+    - sot::motionPlanner::timestampToNanoseconds (timestamp);
+  return static_cast<double> (age) * 1e-9;
+}
+
 ml::Vector&
 ErrorMerger::updateError (ml::Vector& res, int t)
 {
   if (res.size () != 3)
     res.resize (3);
   res.setZero ();
-  const unsigned N = errorsIn_.size ();
+  information_.setZero ();
+  informationVector_.setZero ();
+  covariance_.setZero ();
 
-  double M = 0;
+  nbUsedSources_ = 0;
 
+  const unsigned N = activeSources_.size ();
   for (unsigned i = 0; i < N; ++i)
     {
-      double w = 0.;
-      try
-	{
-	  w = (*errorsIn_[i].second) (t) (0);
-	}
-      catch (...)
+      const ErrorSource& source = *activeSources_[i];
+
+      const double w = (*source.weight) (t) (0);
+      if (w < 1e-6)
+	continue;
+
+      const ml::Vector& error = (*source.error) (t);
+
+      // Source covariance, identity by default.
+      ml::Matrix& C = sourceCovariance_;
+      C.setIdentity ();
+      if (source.hasCovariance)
 	{
-	  std::cerr << "warning: weight not plugged" << std::endl;
+	  const ml::Matrix& covariance = (*source.covariance) (t);
+	  if (covariance.nbRows () == 3 && covariance.nbCols () == 3)
+	    C = covariance;
 	}
 
-      if (w >= 1e-6)
+      // Inflate the covariance of stale measurements.
+      if (source.hasTimestamp)
 	{
-	  M += w;
-	  res += w * (*errorsIn_[i].first) (t);
+	  const double age = computeAge ((*source.timestamp) (t), t);
+	  if (maximumAge_ > 0. && age > maximumAge_)
+	    continue;
+	  if (age > 0.)
+	    for (unsigned j = 0; j < 3; ++j)
+	      C (j, j) += age * stalenessNoise_ (j);
 	}
+
+      // Accumulate w * inv (C) and w * inv (C) * error.
+      if (!inverse3 (C, sourceInformation_))
+	continue;
+      for (unsigned r = 0; r < 3; ++r)
+	for (unsigned c = 0; c < 3; ++c)
+	  {
+	    information_ (r, c) += w * sourceInformation_ (r, c);
+	    informationVector_ (r) +=
+	      w * sourceInformation_ (r, c) * error (c);
+	  }
+      ++nbUsedSources_;
     }
 
-  if (M < 1e-6)
+  if (!inverse3 (information_, covariance_))
     {
-      res.setZero ();
+      covariance_.setZero ();
       return res;
     }
 
-  for (unsigned i = 0; i < 3; ++i)
-    res (i) /= M;
+  for (unsigned r = 0; r < 3; ++r)
+    for (unsigned c = 0; c < 3; ++c)
+      res (r) += covariance_ (r, c) * informationVector_ (c);
+  return res;
+}
+
+ml::Matrix&
+ErrorMerger::updateCovariance (ml::Matrix& res, int t)
+{
+  errorOut_ (t);
+  res = covariance_;
+  return res;
+}
+
+ml::Vector&
+ErrorMerger::updateActiveSources (ml::Vector& res, int t)
+{
+  errorOut_ (t);
+  if (res.size () != 1)
+    res.resize (1);
+  res (0) = nbUsedSources_;
   return res;
 }
 
@@ -16,6 +16,7 @@
 
 #ifndef SOT_MOTION_PLANNER_ERROR_MERGER_HH
 # define SOT_MOTION_PLANNER_ERROR_MERGER_HH
+# include <vector>
 # include <boost/shared_ptr.hpp>
 
 # include <jrl/mal/boost.hh>
@@ -55,9 +56,44 @@ namespace command
 			  const std::string& docstring);
       virtual Value doExecute ();
     };
+
+    class ResolvePlugging : public Command
+    {
+    public:
+      ResolvePlugging (ErrorMerger& entity,
+		       const std::string& docstring);
+      virtual Value doExecute ();
+    };
   } // end of namespace errorMerger.
 } // end of namespace command.
 
+/// \brief Merge several error estimations into a single one.
+///
+/// Each error estimation (source) provides:
+/// - error_<name>: the estimated (x, y, theta) error,
+/// - weight_<name>: its weight, sources whose weight is null are
+///   discarded,
+/// - covariance_<name> (optional): the 3x3 covariance of the error,
+/// - timestamp_<name> (optional): the acquisition time of the
+///   measurement (seconds, microseconds).
+///
+/// Errors are fused in information form: each source contributes
+/// weight * inv (C), where C is its covariance inflated by the time
+/// elapsed since the acquisition (C + age * stalenessNoise). Sources
+/// older than the maximum age are discarded. Sources without
+/// covariance use the identity, hence when no covariance and no
+/// timestamp is provided, the result is the weighted mean of the
+/// errors. The staleness noise is a variance rate, small w.r.t. this
+/// identity: staleness only has an effect when the sources provide
+/// their covariance.
+///
+/// The covariance of the merged error is exposed by the covariance
+/// signal.
+///
+/// Which signals are plugged is only checked when sources are added
+/// or when resolvePlugging is called, i.e. it must be called again
+/// once all the source signals have been plugged. Sources whose
+/// error or weight signal is not plugged are ignored.
 class ErrorMerger : public dg::Entity
 {
   DYNAMIC_GRAPH_ENTITY_DECL ();
@@ -66,8 +102,25 @@ class ErrorMerger : public dg::Entity
 
   /// \brief Input vector signal.
   typedef dg::SignalPtr<ml::Vector, int> signalVectorIn_t;
+  /// \brief Input matrix signal.
+  typedef dg::SignalPtr<ml::Matrix, int> signalMatrixIn_t;
   /// \brief Output vector signal.
   typedef dg::SignalTimeDependent<ml::Vector, int> signalVectorOut_t;
+  /// \brief Output matrix signal.
+  typedef dg::SignalTimeDependent<ml::Matrix, int> signalMatrixOut_t;
+
+  /// \brief Input signals associated with one error estimation.
+  struct ErrorSource
+  {
+    boost::shared_ptr<signalVectorIn_t> error;
+    boost::shared_ptr<signalVectorIn_t> weight;
+    boost::shared_ptr<signalMatrixIn_t> covariance;
+    boost::shared_ptr<signalVectorIn_t> timestamp;
+
+    /// \brief Cached plugging status of the optional signals.
+    bool hasCovariance;
+    bool hasTimestamp;
+  };
 
   /// \name Constructor and destructor.
   /// \{
@@ -75,11 +128,9 @@ class ErrorMerger : public dg::Entity
   virtual ~ErrorMerger ();
   /// \}
 
-  std::vector<std::pair<boost::shared_ptr<signalVectorIn_t>,
-			boost::shared_ptr<signalVectorIn_t> > >&
-  errorsIn ()
+  std::vector<ErrorSource>& sources ()
   {
-    return errorsIn_;
+    return sources_;
   }
 
   signalVectorOut_t& errorOut ()
@@ -87,14 +138,54 @@ class ErrorMerger : public dg::Entity
     return errorOut_;
   }
 
+  /// \brief Check which signals are plugged and update the list of
+  ///        active sources accordingly.
+  void resolvePlugging ();
+
+  /// \brief Set the covariance growth rate (per second) of stale
+  ///        measurements, one value per error component.
+  void setStalenessNoise (const ml::Vector& noise);
+
+  /// \brief Set the age (in seconds) above which measurements are
+  ///        discarded (zero disables this check).
+  void setMaximumAge (const double& age)
+  {
+    maximumAge_ = age;
+  }
+
 protected:
   /// \brief Update the error signal.
   ml::Vector& updateError (ml::Vector& res, int);
+  /// \brief Update the covariance signal.
+  ml::Matrix& updateCovariance (ml::Matrix& res, int);
+  /// \brief Update the active sources count signal.
+  ml::Vector& updateActiveSources (ml::Vector& res, int);
 
 private:
-  std::vector<std::pair<boost::shared_ptr<signalVectorIn_t>,
-			boost::shared_ptr<signalVectorIn_t> > > errorsIn_;
+  /// \brief Measurement age in seconds.
+  double computeAge (const ml::Vector& timestamp, int t);
+
+  std::vector<ErrorSource> sources_;
+  /// \brief Sources whose error and weight signals are plugged.
+  std::vector<ErrorSource*> activeSources_;
+  /// \brief Number of sources used by the last fusion.
+  unsigned nbUsedSources_;
+
   signalVectorOut_t errorOut_;
+  signalMatrixOut_t covarianceOut_;
+  signalVectorOut_t activeSourcesOut_;
+
+  ml::Vector stalenessNoise_;
+  double maximumAge_;
+
+  /// \name Workspaces
+  /// \{
+  ml::Matrix covariance_;
+  ml::Matrix information_;
+  ml::Matrix sourceCovariance_;
+  ml::Matrix sourceInformation_;
+  ml::Vector informationVector_;
+  /// \}
 };
 
 #endif //! SOT_MOTION_PLANNER_ERROR_MERGER_HH
@@ -0,0 +1,143 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <algorithm>
+#include <cstring>
+#include <ostream>
+
+#include "event-log.hh"
+
+namespace sot
+{
+  namespace motionPlanner
+  {
+    namespace
+    {
+      void copyString (char* dst, const char* src, unsigned size)
+      {
+	if (!src)
+	  src = "";
+	std::strncpy (dst, src, size - 1);
+	dst[size - 1] = '\0';
+      }
+    } // end of anonymous namespace.
+
+    const char*
+    eventTypeToString (EventType type)
+    {
+      static const char* names[EVENT_TYPE_SIZE] =
+	{
+	  "info",
+	  "task-added",
+	  "task-removed",
+	  "localization",
+	  "reference-message",
+	  "correction",
+	  "convergence"
+	};
+      if (type < 0 || type >= EVENT_TYPE_SIZE)
+	return "invalid";
+      return names[type];
+    }
+
+    std::ostream&
+    operator<< (std::ostream& o, const Event& event)
+    {
+      o << event.time
+	<< " " << eventTypeToString (event.type)
+	<< " " << event.source;
+      if (event.message[0])
+	o << " \"" << event.message << "\"";
+      for (unsigned i = 0; i < event.dataSize; ++i)
+	o << " " << event.data[i];
+      return o;
+    }
+
+    EventLog&
+    EventLog::instance ()
+    {
+      static EventLog log;
+      return log;
+    }
+
+    EventLog::EventLog (unsigned capacity)
+      : buffer_ (capacity + 1),
+	head_ (0),
+	tail_ (0),
+	dropped_ (0)
+    {}
+
+    bool
+    EventLog::push (int time, EventType type,
+		    const std::string& source,
+		    const char* message,
+		    const double* data,
+		    unsigned dataSize)
+    {
+      const unsigned head = head_;
+      const unsigned next = (head + 1) % buffer_.size ();
+
+      if (next == tail_)
+	{
+	  ++dropped_;
+	  return false;
+	}
+
+      Event& event = buffer_[head];
+      event.time = time;
+      event.type = type;
+      copyString (event.source, source.c_str (), Event::SOURCE_SIZE);
+      copyString (event.message, message, Event::MESSAGE_SIZE);
+      event.dataSize = data ? std::min (dataSize, Event::DATA_SIZE) : 0;
+      for (unsigned i = 0; i < event.dataSize; ++i)
+	event.data[i] = data[i];
+
+      // Make sure the record is written before publishing it.
+      __sync_synchronize ();
+      head_ = next;
+      return true;
+    }
+
+    bool
+    EventLog::push (int time, EventType type,
+		    const std::string& source,
+		    const char* message,
+		    const ml::Vector& data)
+    {
+      double values[Event::DATA_SIZE];
+      const unsigned size =
+	std::min (static_cast<unsigned> (data.size ()), Event::DATA_SIZE);
+      for (unsigned i = 0; i < size; ++i)
+	values[i] = data (i);
+      return push (time, type, source, message, values, size);
+    }
+
+    bool
+    EventLog::pop (Event& event)
+    {
+      const unsigned tail = tail_;
+      if (tail == head_)
+	return false;
+
+      // Make sure the record is read after checking it is published.
+      __sync_synchronize ();
+      event = buffer_[tail];
+      __sync_synchronize ();
+      tail_ = (tail + 1) % buffer_.size ();
+      return true;
+    }
+
+  } // end of namespace motionPlanner.
+} // end of namespace sot.
@@ -0,0 +1,145 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+#ifndef SOT_MOTION_PLANNER_EVENT_LOG_HH
+# define SOT_MOTION_PLANNER_EVENT_LOG_HH
+# include <iosfwd>
+# include <string>
+# include <vector>
+
+# include <boost/noncopyable.hpp>
+
+# include <jrl/mal/boost.hh>
+
+namespace ml = ::maal::boost;
+
+namespace sot
+{
+  namespace motionPlanner
+  {
+    /// \brief Kind of event pushed by the control loop.
+    enum EventType
+      {
+	/// \brief Generic information.
+	EVENT_INFO = 0,
+	/// \brief A task has been pushed into the solver.
+	EVENT_TASK_ADDED,
+	/// \brief A task has been removed from the solver.
+	EVENT_TASK_REMOVED,
+	/// \brief A localization offset has been computed.
+	EVENT_LOCALIZATION,
+	/// \brief A new reference message has been received.
+	EVENT_REFERENCE_MESSAGE,
+	/// \brief A new trajectory correction has been scheduled.
+	EVENT_CORRECTION,
+	/// \brief Monitored errors converged (or failed to).
+	EVENT_CONVERGENCE,
+
+	/// \brief Enum maximum value, do not describe a valid event.
+	EVENT_TYPE_SIZE
+      };
+
+    /// \brief Return a human readable name for an event type.
+    const char* eventTypeToString (EventType type);
+
+    /// \brief Fixed-size event record.
+    ///
+    /// Records are plain data so that they can be copied into the
+    /// preallocated ring without any dynamic allocation.
+    struct Event
+    {
+      static const unsigned SOURCE_SIZE = 32;
+      static const unsigned MESSAGE_SIZE = 64;
+      static const unsigned DATA_SIZE = 6;
+
+      /// \brief Control loop tick when the event has been pushed.
+      int time;
+      /// \brief Event kind.
+      EventType type;
+      /// \brief Name of the entity which emitted the event (truncated).
+      char source[SOURCE_SIZE];
+      /// \brief Short description (truncated).
+      char message[MESSAGE_SIZE];
+      /// \brief Number of valid elements in data.
+      unsigned dataSize;
+      /// \brief Optional numerical payload.
+      double data[DATA_SIZE];
+    };
+
+    std::ostream& operator<< (std::ostream& o, const Event& event);
+
+    /// \brief Lock-free, preallocated event ring.
+    ///
+    /// The control loop is the only producer and a single non
+    /// real-time thread (see EventLogger) is the only consumer.
+    /// Pushing an event never allocates, never locks and never
+    /// blocks: if the ring is full, the event is dropped and
+    /// accounted for in dropped ().
+    class EventLog : private boost::noncopyable
+    {
+    public:
+      static const unsigned DEFAULT_CAPACITY = 4096;
+
+      /// \brief Process-wide event log shared by all entities.
+      static EventLog& instance ();
+
+      explicit EventLog (unsigned capacity = DEFAULT_CAPACITY);
+
+      /// \name Producer side (real-time safe).
+      /// \{
+      bool push (int time, EventType type,
+		 const std::string& source,
+		 const char* message,
+		 const double* data = 0,
+		 unsigned dataSize = 0);
+
+      bool push (int time, EventType type,
+		 const std::string& source,
+		 const char* message,
+		 const ml::Vector& data);
+      /// \}
+
+      /// \name Consumer side.
+      /// \{
+
+      /// \brief Retrieve the oldest event.
+      ///
+      /// \return false if the ring is empty.
+      bool pop (Event& event);
+      /// \}
+
+      /// \brief Number of events dropped because the ring was full.
+      unsigned dropped () const
+      {
+	return dropped_;
+      }
+
+      unsigned capacity () const
+      {
+	return buffer_.size () - 1;
+      }
+
+    private:
+      std::vector<Event> buffer_;
+      /// \brief Next slot to be written (modified by the producer only).
+      volatile unsigned head_;
+      /// \brief Next slot to be read (modified by the consumer only).
+      volatile unsigned tail_;
+      volatile unsigned dropped_;
+    };
+
+  } // end of namespace motionPlanner.
+} // end of namespace sot.
+
+#endif //! SOT_MOTION_PLANNER_EVENT_LOG_HH
@@ -0,0 +1,180 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <sstream>
+#include <stdexcept>
+
+#include <boost/assign/list_of.hpp>
+#include <boost/bind.hpp>
+#include <boost/date_time/posix_time/posix_time_types.hpp>
+
+#include "event-logger.hh"
+
+namespace command
+{
+  namespace eventLogger
+  {
+    Open::Open (EventLogger& entity, const std::string& docstring)
+      : Command (entity, boost::assign::list_of (Value::STRING), docstring)
+    {}
+
+    Value
+    Open::doExecute ()
+    {
+      EventLogger& entity = static_cast<EventLogger&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      std::string filename = values[0].value ();
+      entity.open (filename);
+      return Value ();
+    }
+
+    Close::Close (EventLogger& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    Close::doExecute ()
+    {
+      EventLogger& entity = static_cast<EventLogger&> (owner ());
+      entity.close ();
+      return Value ();
+    }
+
+    Fetch::Fetch (EventLogger& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    Fetch::doExecute ()
+    {
+      EventLogger& entity = static_cast<EventLogger&> (owner ());
+      return Value (entity.fetch ());
+    }
+  } // end of namespace eventLogger.
+} // end of namespace command.
+
+EventLogger::EventLogger (const std::string& name)
+  : dg::Entity (name),
+    thread_ (),
+    mutex_ (),
+    file_ (),
+    pending_ (),
+    running_ (false),
+    reportedDrops_ (0)
+{
+  std::string docstring;
+
+  docstring =
+    "    Start draining the real-time event log into a file.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: output file name.\n";
+  addCommand ("open", new command::eventLogger::Open (*this, docstring));
+
+  docstring =
+    "    Stop draining the real-time event log.\n";
+  addCommand ("close", new command::eventLogger::Close (*this, docstring));
+
+  docstring =
+    "    Return the events drained since the last call, one per line.\n";
+  addCommand ("fetch", new command::eventLogger::Fetch (*this, docstring));
+}
+
+EventLogger::~EventLogger ()
+{
+  close ();
+}
+
+void
+EventLogger::open (const std::string& filename)
+{
+  if (running_)
+    throw std::runtime_error ("event logger is already opened");
+
+  file_.open (filename.c_str ());
+  if (!file_.good ())
+    throw std::runtime_error ("failed to open event log file");
+
+  running_ = true;
+  thread_.reset (new boost::thread (boost::bind (&EventLogger::run, this)));
+}
+
+void
+EventLogger::close ()
+{
+  if (!running_)
+    return;
+  running_ = false;
+  if (thread_)
+    thread_->join ();
+  thread_.reset ();
+
+  // Flush events pushed after the thread stopped.
+  drain ();
+  file_.close ();
+}
+
+std::string
+EventLogger::fetch ()
+{
+  std::string res;
+  boost::mutex::scoped_lock lock (mutex_);
+  while (!pending_.empty ())
+    {
+      res += pending_.front ();
+      res += '\n';
+      pending_.pop_front ();
+    }
+  return res;
+}
+
+void
+EventLogger::run ()
+{
+  while (running_)
+    {
+      drain ();
+      boost::this_thread::sleep (boost::posix_time::milliseconds (10));
+    }
+}
+
+void
+EventLogger::drain ()
+{
+  sot::motionPlanner::EventLog& log =
+    sot::motionPlanner::EventLog::instance ();
+
+  sot::motionPlanner::Event event;
+  while (log.pop (event))
+    {
+      std::ostringstream stream;
+      stream << event;
+
+      file_ << stream.str () << std::endl;
+
+      boost::mutex::scoped_lock lock (mutex_);
+      if (pending_.size () >= MAX_PENDING_LINES)
+	pending_.pop_front ();
+      pending_.push_back (stream.str ());
+    }
+
+  if (log.dropped () != reportedDrops_)
+    {
+      reportedDrops_ = log.dropped ();
+      file_ << "# " << reportedDrops_ << " event(s) dropped" << std::endl;
+    }
+}
+
+DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (EventLogger, "EventLogger");
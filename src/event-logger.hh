@@ -0,0 +1,110 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef SOT_MOTION_PLANNER_EVENT_LOGGER_HH
+# define SOT_MOTION_PLANNER_EVENT_LOGGER_HH
+# include <deque>
+# include <fstream>
+# include <string>
+
+# include <boost/scoped_ptr.hpp>
+# include <boost/thread/mutex.hpp>
+# include <boost/thread/thread.hpp>
+
+# include <dynamic-graph/command.h>
+# include <dynamic-graph/entity.h>
+# include <dynamic-graph/factory.h>
+
+# include "event-log.hh"
+
+namespace dg = ::dynamicgraph;
+
+class EventLogger;
+
+namespace command
+{
+  namespace eventLogger
+  {
+    using ::dynamicgraph::command::Command;
+    using ::dynamicgraph::command::Value;
+
+    class Open : public Command
+    {
+    public:
+      Open (EventLogger& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class Close : public Command
+    {
+    public:
+      Close (EventLogger& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class Fetch : public Command
+    {
+    public:
+      Fetch (EventLogger& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+  } // end of namespace eventLogger.
+} // end of namespace command.
+
+/// \brief Drain the real-time event log outside of the control loop.
+///
+/// Entities running in the control loop push their events into
+/// sot::motionPlanner::EventLog::instance (). This entity owns a
+/// background thread which empties the ring, writes the events into
+/// a file and keeps the formatted lines until they are fetched from
+/// Python.
+///
+/// Only one logger should be opened at a time as the ring supports a
+/// single consumer.
+class EventLogger : public dg::Entity
+{
+  DYNAMIC_GRAPH_ENTITY_DECL ();
+public:
+  /// \brief Maximum number of lines kept until fetch () is called.
+  static const unsigned MAX_PENDING_LINES = 16384;
+
+  /// \name Constructor and destructor.
+  /// \{
+  explicit EventLogger (const std::string& name);
+  virtual ~EventLogger ();
+  /// \}
+
+  /// \brief Start draining events into the given file.
+  void open (const std::string& filename);
+
+  /// \brief Stop the background thread and flush remaining events.
+  void close ();
+
+  /// \brief Return (and forget) the lines drained since the last call.
+  std::string fetch ();
+
+private:
+  void run ();
+  void drain ();
+
+  boost::scoped_ptr<boost::thread> thread_;
+  boost::mutex mutex_;
+  std::ofstream file_;
+  std::deque<std::string> pending_;
+  volatile bool running_;
+  unsigned reportedDrops_;
+};
+
+#endif //! SOT_MOTION_PLANNER_EVENT_LOGGER_HH
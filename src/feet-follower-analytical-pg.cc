@@ -14,14 +14,21 @@
 // received a copy of the GNU Lesser General Public License along with
 // dynamic-graph. If not, see <http://www.gnu.org/licenses/>.
 
+#include <algorithm>
+#include <stdexcept>
+
+#include <boost/bind.hpp>
 #include <boost/filesystem/fstream.hpp>
+#include <boost/make_shared.hpp>
 
 #include "discretized-trajectory.hh"
 
 #include "feet-follower-analytical-pg.hh"
 
+#include <dynamic-graph/command-getter.h>
 #include <dynamic-graph/command-setter.h>
 
+using ::dynamicgraph::command::Getter;
 using ::dynamicgraph::command::Setter;
 
 const double FeetFollowerAnalyticalPg::STEP = 0.005;
@@ -31,7 +38,22 @@ FeetFollowerAnalyticalPg::FeetFollowerAnalyticalPg (const std::string& name)
     steps_ (),
     leftOrRightFootStable_ (true),
     trajectories_ (),
-    index_ (0)
+    index_ (0),
+    windowSize_ (0),
+    segments_ (),
+    windowStartTime_ (0.),
+    nextWindowStartTime_ (0.),
+    nextTrajectories_ (),
+    retiredTrajectories_ (),
+    lastLeftAnkle_ (),
+    lastRightAnkle_ (),
+    flush_ (false),
+    closed_ (false),
+    mutex_ (),
+    condition_ (),
+    worker_ (),
+    stopWorker_ (false),
+    epoch_ (0)
 {
   std::string docstring = "";
 
@@ -63,6 +85,41 @@ FeetFollowerAnalyticalPg::FeetFollowerAnalyticalPg (const std::string& name)
     "    Clear list of steps\n";
   addCommand ("clearSteps",
 	      new command::ClearSteps (*this, docstring));
+  docstring =
+    "    Generate the remaining steps even if they do not fill a window\n"
+    "    \n"
+    "    If an odd number of steps remains, no step can be pushed\n"
+    "    until clearSteps is called.\n";
+  addCommand ("flushSteps",
+	      new command::FlushSteps (*this, docstring));
+  docstring =
+    "    Start a new walk segment\n"
+    "    \n"
+    "    Input: a floating point number\n"
+    "      - trajectory time at which the segment starts (in seconds)\n"
+    "    \n"
+    "    Steps pushed afterward belong to the new segment. The robot\n"
+    "    stops at the end of the previous segment and starts walking\n"
+    "    again at the given time, or as soon as the previous segment\n"
+    "    is finished if it is later.\n";
+  addCommand ("startSegment",
+	      new Setter<FeetFollowerAnalyticalPg, double>
+	      (*this, &FeetFollowerAnalyticalPg::startSegment, docstring));
+
+  docstring =
+    "    Set the number of steps generated at once\n"
+    "    \n"
+    "    Input: an even unsigned integer\n"
+    "      0 (default) generates all the steps in generateTrajectory,\n"
+    "      otherwise the trajectory is generated by windows while\n"
+    "      walking and steps can be pushed at any time.\n";
+  addCommand ("setWindowSize",
+	      new Setter<FeetFollowerAnalyticalPg, unsigned>
+	      (*this, &FeetFollowerAnalyticalPg::setWindowSize, docstring));
+  docstring = "    Return the number of steps not generated yet\n";
+  addCommand ("getPendingSteps",
+	      new Getter<FeetFollowerAnalyticalPg, unsigned>
+	      (*this, &FeetFollowerAnalyticalPg::pendingSteps, docstring));
 
   docstring = "set waist trajectory file";
   addCommand ("setWaistFile",
@@ -84,19 +141,15 @@ FeetFollowerAnalyticalPg::FeetFollowerAnalyticalPg (const std::string& name)
 }
 
 FeetFollowerAnalyticalPg::~FeetFollowerAnalyticalPg ()
-{}
+{
+  stopWorker ();
+}
 
 void
 FeetFollowerAnalyticalPg::updateVelocities ()
 {
-  using sot::Trajectory;
-  using roboptim::Function;
-
-  const double t = (index_) * STEP;
-  const double tnext = (index_ + 1) * STEP;
-
-  if (t >= Function::getUpperBound (trajectories_->leftFoot.getRange ()) or
-      tnext >= Function::getUpperBound (trajectories_->leftFoot.getRange ()))
+  // Velocities are computed once, when the window is generated.
+  if (index_ >= trajectories_->comVelocity.size ())
     {
       comVelocity_.setZero ();
       waistYawVelocity_.setZero ();
@@ -105,32 +158,10 @@ FeetFollowerAnalyticalPg::updateVelocities ()
       return;
     }
 
-  const Trajectory::vector_t& leftFoot = trajectories_->leftFoot (t);
-  const Trajectory::vector_t& rightFoot = trajectories_->rightFoot (t);
-  const Trajectory::vector_t& com = trajectories_->com (t);
-  const Trajectory::vector_t& waistYaw = trajectories_->waistYaw (t);
-
-  const Trajectory::vector_t& leftFootNext = trajectories_->leftFoot (tnext);
-  const Trajectory::vector_t& rightFootNext = trajectories_->rightFoot (tnext);
-  const Trajectory::vector_t& comNext = trajectories_->com (tnext);
-  const Trajectory::vector_t& waistYawNext = trajectories_->waistYaw (tnext);
-
-  comVelocity_.accessToMotherLib () = (comNext - com) / STEP;
-
-  waistYawVelocity_ (0) = 0.;
-  waistYawVelocity_ (1) = 0.;
-  waistYawVelocity_ (2) = waistYawNext[0] - waistYaw[0];
-
-  //FIXME: foot <-> ankle
-  leftAnkleVelocity_.setZero ();
-  leftAnkleVelocity_ (0) = (leftFootNext[0] - leftFoot[0]) / STEP;
-  leftAnkleVelocity_ (1) = (leftFootNext[1] - leftFoot[1]) / STEP;
-  leftAnkleVelocity_ (5) = (leftFootNext[2] - leftFoot[2]) / STEP;
-
-  rightAnkleVelocity_.setZero ();
-  rightAnkleVelocity_ (0) = (rightFootNext[0] - rightFoot[0]) / STEP;
-  rightAnkleVelocity_ (1) = (rightFootNext[1] - rightFoot[1]) / STEP;
-  rightAnkleVelocity_ (5) = (rightFootNext[2] - rightFoot[2]) / STEP;
+  comVelocity_ = trajectories_->comVelocity[index_];
+  waistYawVelocity_ = trajectories_->waistYawVelocity[index_];
+  leftAnkleVelocity_ = trajectories_->leftAnkleVelocity[index_];
+  rightAnkleVelocity_ = trajectories_->rightAnkleVelocity[index_];
 }
 
 void
@@ -142,10 +173,15 @@ FeetFollowerAnalyticalPg::impl_update ()
   if (!trajectories_)
     return;
 
-  const double t = index_ * STEP;
+  double t = index_ * STEP;
 
   if (t >= Function::getUpperBound (trajectories_->leftFoot.getRange ()))
-    return;
+    {
+      // Keep the final position until the next window is available.
+      if (!switchWindow ())
+	return;
+      t = 0.;
+    }
 
   const Trajectory::vector_t& leftFoot = trajectories_->leftFoot (t);
   const Trajectory::vector_t& rightFoot = trajectories_->rightFoot (t);
@@ -203,65 +239,28 @@ FeetFollowerAnalyticalPg::impl_update ()
 	gaze_ (i, j) = gaze (i * 4 + j);
       }
 
+  // Hold the initial position until the window start time.
+  if (started_ && getTrajectoryTime () < windowStartTime_)
+    {
+      comVelocity_.setZero ();
+      waistYawVelocity_.setZero ();
+      leftAnkleVelocity_.setZero ();
+      rightAnkleVelocity_.setZero ();
+      return;
+    }
+
   updateVelocities ();
 
   if (started_)
     ++index_;
 }
 
-namespace
-{
-  void logStepFeatures(const std::vector<double>& steps,
-		       const StepFeatures& stepFeatures,
-		       const ml::Matrix& wMs)
-  {
-    std::ofstream log ("/tmp/pg.dat");
-
-    log << "# it lf_x lf_y lf_z rf_x rf_y rf_z "
-	<< "com_x com_y com_z zmp_x zmp_y w_x w_y w_z"
-	<< std::endl;
-
-    for (unsigned i = 0; i < stepFeatures.size; ++i)
-    {
-      boost::format fmt
-	("%d "
-	 "%f %f %f "
-	 "%f %f %f "
-	 "%f %f %f "
-	 "%f %f");
-      fmt
-	% i
-
-	% stepFeatures.leftfootXtraj[i]
-	% stepFeatures.leftfootYtraj[i]
-	% stepFeatures.leftfootHeight[i]
-
-	% stepFeatures.rightfootXtraj[i]
-	% stepFeatures.rightfootYtraj[i]
-	% stepFeatures.rightfootHeight[i]
-
-	% stepFeatures.comTrajX[i]
-	% stepFeatures.comTrajY[i]
-	% stepFeatures.zc
-
-	% stepFeatures.zmpTrajX[i]
-	% stepFeatures.zmpTrajY[i];
-
-      log << fmt.str () << std::endl;
-    }
-
-    std::ofstream wMsLog ("/tmp/wms.dat");
-    wMsLog << wMs << std::endl;
-
-    std::ofstream logSteps ("/tmp/pg_steps.dat");
-
-    for (unsigned i = 0; i < steps.size (); ++i)
-      logSteps << steps[i] << std::endl;
-  }
-} // end of anonymous namespace.
-
-void
-FeetFollowerAnalyticalPg::generateTrajectory ()
+FeetFollowerAnalyticalPg::walkMovementPtr_t
+FeetFollowerAnalyticalPg::generateWindow
+(const std::vector<ml::Vector>& windowSteps,
+ const sot::MatrixHomogeneous& leftAnkle,
+ const sot::MatrixHomogeneous& rightAnkle,
+ bool verbose)
 {
   typedef sot::Trajectory::vector_t vector_t;
   typedef sot::Trajectory::discreteInterval_t discreteInterval_t;
@@ -275,13 +274,21 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
 
   StepFeatures stepFeatures;
 
-  leftOrRightFootStable_ = true;
+  // Waist, gaze and zmp files describe the whole walk, they cannot
+  // be used when generating by windows.
+  const bool useFiles = windowSize_ == 0;
+  const bool warn = useFiles && verbose;
 
   sot::MatrixHomogeneous initialLeftFeet =
-    initialLeftAnklePosition_ * leftFootToAnkle_.inverse ();
+    leftAnkle * leftFootToAnkle_.inverse ();
 
   sot::MatrixHomogeneous initialRightFeet =
-    initialRightAnklePosition_ * rightFootToAnkle_.inverse ();
+    rightAnkle * rightFootToAnkle_.inverse ();
+
+  // Right foot position in the left foot frame, so that windows
+  // starting after a turn are handled as the first one.
+  sot::MatrixHomogeneous leftToRightFeet =
+    initialLeftFeet.inverse () * initialRightFeet;
 
   ml::Vector initialStep (6);
 
@@ -291,35 +298,33 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
 
   // As leftPosition_x = -rightPosition_x, leftPosition_y = -rightPosition_y,
   // we center the movement in (0, 0) and shift it back using wMs.
-  initialStep (0) =
-    std::fabs (initialLeftFeet (0, 3) - initialRightFeet (0, 3)) / 2.;
-  initialStep (1) =
-    std::fabs (initialLeftFeet (1, 3) - initialRightFeet (1, 3)) / 2.;
+  initialStep (0) = std::fabs (leftToRightFeet (0, 3)) / 2.;
+  initialStep (1) = std::fabs (leftToRightFeet (1, 3)) / 2.;
   initialStep (2) = 0.;
 
   initialStep (3) = -initialStep (0);
   initialStep (4) = -initialStep (1);
-  initialStep (5) = atan2(initialRightFeet (1,0), initialRightFeet (0,0));
+  initialStep (5) = atan2(leftToRightFeet (1,0), leftToRightFeet (0,0));
 
   std::vector<double> steps;
   for (unsigned i = 0; i < 6; ++i)
     steps.push_back (initialStep (i));
 
-  for (unsigned i = 0; i < steps_.size (); ++i)
+  for (unsigned i = 0; i < windowSteps.size (); ++i)
     {
-      assert (steps_[i].size () == 7);
+      assert (windowSteps[i].size () == 7);
 
       // Make sure that slides coefficients are valid.
-      if (steps_[i] (0) < -1.52 || steps_[i] (0) > 0.)
+      if (windowSteps[i] (0) < -1.52 || windowSteps[i] (0) > 0.)
 	throw std::runtime_error ("invalid first slide");
-      if (steps_[i] (3) < -0.76 || steps_[i] (3) > 0.)
+      if (windowSteps[i] (3) < -0.76 || windowSteps[i] (3) > 0.)
 	throw std::runtime_error ("invalid second slide");
 
-      // Convert from radian to degrees.
-      steps_[i] (6) *= 180. / M_PI;
+      for (unsigned j = 0; j < 6; ++j)
+	steps.push_back (windowSteps[i] (j));
 
-      for (unsigned j = 0; j < steps_[i].size (); ++j)
-	steps.push_back (steps_[i] (j));
+      // Convert from radian to degrees.
+      steps.push_back (windowSteps[i] (6) * 180. / M_PI);
     }
 
   pg.produceSeqSlidedHalfStepFeatures
@@ -386,7 +391,7 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
       waistYawData.push_back (waistYaw);
     }
 
-  if (boost::filesystem::exists (waistFile_))
+  if (useFiles && boost::filesystem::exists (waistFile_))
     {
       boost::filesystem::ifstream file(waistFile_);
       vector_t waistPosition (16);
@@ -397,12 +402,12 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
 	  waistData.push_back(waistPosition);
 	}
     }
-  else
+  else if (warn)
     std::cerr << "warning: waist file '"
 	      << waistFile_
 	      <<"' does not exist" << std::endl;
 
-  if (boost::filesystem::exists (gazeFile_))
+  if (useFiles && boost::filesystem::exists (gazeFile_))
     {
       boost::filesystem::ifstream file(gazeFile_);
       vector_t gazePosition (16);
@@ -413,12 +418,12 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
 	  gazeData.push_back(gazePosition);
 	}
     }
-  else
+  else if (warn)
     std::cerr << "warning: gaze file '"
 	      << gazeFile_
 	      <<"' does not exist" << std::endl;
 
-  if (boost::filesystem::exists (zmpFile_))
+  if (useFiles && boost::filesystem::exists (zmpFile_))
     {
       boost::filesystem::ifstream file(zmpFile_);
       vector_t zmpPosition (3);
@@ -430,7 +435,7 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
 	  zmpData.push_back(zmpPosition);
 	}
     }
-  else
+  else if (warn)
     std::cerr << "warning: zmp file '"
 	      << zmpFile_
 	      <<"' does not exist, using generated trajectory instead."
@@ -438,30 +443,36 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
 
   if (waistData.size () != stepFeatures.size)
     {
-      boost::format fmt ("warning: bad waist size (%1% != %2%)");
-      fmt % waistData.size () % stepFeatures.size;
-      std::cerr << fmt.str () << std::endl;
+      if (warn)
+	{
+	  boost::format fmt ("warning: bad waist size (%1% != %2%)");
+	  fmt % waistData.size () % stepFeatures.size;
+	  std::cerr << fmt.str () << std::endl;
+	}
       waistData.resize (stepFeatures.size, vector_t (16));
     }
   if (gazeData.size () != stepFeatures.size)
     {
-      boost::format fmt ("warning: bad gaze size (%1% != %2%)");
-      fmt % gazeData.size () % stepFeatures.size;
-      std::cerr << fmt.str () << std::endl;
+      if (warn)
+	{
+	  boost::format fmt ("warning: bad gaze size (%1% != %2%)");
+	  fmt % gazeData.size () % stepFeatures.size;
+	  std::cerr << fmt.str () << std::endl;
+	}
       gazeData.resize (stepFeatures.size, vector_t (16));
     }
   if (zmpData.size () != stepFeatures.size)
     {
-      boost::format fmt ("warning: bad zmp size (%1% != %2%)");
-      fmt % zmpData.size () % stepFeatures.size;
-      std::cerr << fmt.str () << std::endl;
+      if (warn)
+	{
+	  boost::format fmt ("warning: bad zmp size (%1% != %2%)");
+	  fmt % zmpData.size () % stepFeatures.size;
+	  std::cerr << fmt.str () << std::endl;
+	}
       zmpData.resize (stepFeatures.size, vector_t (16));
     }
 
 
-  // Reset the movement.
-  index_ = 0;
-
   const sot::Trajectory::vector_t& initialConfig = leftFootData[0];
 
   // wMw_traj = wMa * aMw_traj = wMa * (w_trajMa)^{-1}
@@ -469,16 +480,14 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
   // wMa = ankle position in dynamic-graph frame (initialLeftAnklePosition_)
   // w_trajMa = ankle position in pattern generator frame (initialConfig)
   sot::MatrixHomogeneous wMw_traj =
-    initialLeftAnklePosition_
+    leftAnkle
     * computeAnklePositionInWorldFrame (initialConfig[0], initialConfig[1],
 					initialConfig[2], initialConfig[3],
 					leftFootToAnkle_).inverse ();
 
-  logStepFeatures(steps, stepFeatures, wMw_traj);
-
   discreteInterval_t range (0., stepFeatures.size * STEP, STEP);
 
-  trajectories_ = WalkMovement
+  walkMovementPtr_t movement = boost::make_shared<WalkMovement>
     (sot::DiscretizedTrajectory (range, leftFootData, "left-foot"),
      sot::DiscretizedTrajectory (range, rightFootData, "right-foot"),
      sot::DiscretizedTrajectory (range, comData, "com"),
@@ -491,7 +500,7 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
 
   //FIXME: for now compute walk phases by looking at foot height.
   // It would probably better to recompute from timing parameters.
-  trajectories_->supportFoot.push_back
+  movement->supportFoot.push_back
     (std::make_pair (0., WalkMovement::SUPPORT_FOOT_DOUBLE));
   WalkMovement::SupportFoot oldPhase = WalkMovement::SUPPORT_FOOT_DOUBLE;
   for (unsigned i = 0; i < stepFeatures.size; ++i)
@@ -520,17 +529,213 @@ FeetFollowerAnalyticalPg::generateTrajectory ()
       if (phase != oldPhase)
 	{
 	  oldPhase = phase;
-	  trajectories_->supportFoot.push_back
+	  movement->supportFoot.push_back
 	    (std::make_pair (i * STEP, phase));
 	}
     }
 
+  movement->computeVelocities (STEP);
+  return movement;
+}
+
+void
+FeetFollowerAnalyticalPg::generateTrajectory ()
+{
+  std::vector<ml::Vector> steps;
+  double startTime = 0.;
+  {
+    boost::mutex::scoped_lock lock (mutex_);
+    nextTrajectories_.reset ();
+    ++epoch_;
+
+    if (!takeWindow (steps, startTime, true))
+      throw std::runtime_error ("no step to generate");
+  }
+
+  leftOrRightFootStable_ = true;
+  trajectories_ = generateWindow
+    (steps, initialLeftAnklePosition_, initialRightAnklePosition_, true);
+  windowStartTime_ = startTime;
+
+  // Support phases are expressed in trajectory time.
+  WalkMovement::supportFoot_t& supportFoot = trajectories_->supportFoot;
+  for (unsigned i = 0; i < supportFoot.size (); ++i)
+    supportFoot[i].first += startTime;
+
+  // Reset the movement.
+  index_ = 0;
+
+  // Next windows and segments are generated by the worker thread.
+  {
+    boost::mutex::scoped_lock lock (mutex_);
+    storeFinalAnklePositions (*trajectories_);
+  }
+  startWorker ();
+  condition_.notify_one ();
+
   this->comOut_.recompute (0);
   this->zmpOut_.recompute (0);
   this->leftAnkleOut_.recompute (0);
   this->rightAnkleOut_.recompute (0);
 }
 
+bool
+FeetFollowerAnalyticalPg::takeWindow (std::vector<ml::Vector>& steps,
+				      double& startTime,
+				      bool partial)
+{
+  // Drop the segments which have been generated.
+  while (segments_.size () > 1 && !segments_.front ().size)
+    segments_.pop_front ();
+
+  if (closed_ || segments_.empty () || !segments_.front ().size)
+    return false;
+  Segment& segment = segments_.front ();
+
+  // A segment is complete when the next one has been started. Without
+  // window, all the steps of a segment are generated at once.
+  const bool complete = segments_.size () > 1 || flush_ || !windowSize_;
+
+  unsigned size = windowSize_
+    ? std::min (windowSize_, segment.size) : segment.size;
+  if (size < windowSize_ && !partial && !complete)
+    return false;
+
+  // Keep an even number of steps so that the next window starts
+  // with the same support foot. The last window of a segment
+  // does not need to as the next segment is a new walk.
+  if (!complete)
+    size -= size % 2;
+  if (!size)
+    return false;
+  if (size % 2 && flush_ && segments_.size () == 1)
+    closed_ = true;
+
+  steps.assign (steps_.begin (), steps_.begin () + size);
+  steps_.erase (steps_.begin (), steps_.begin () + size);
+
+  // Only the first window of a segment has to wait.
+  startTime = segment.startTime;
+  segment.startTime = 0.;
+  segment.size -= size;
+
+  if (steps_.empty ())
+    flush_ = false;
+  return true;
+}
+
+void
+FeetFollowerAnalyticalPg::storeFinalAnklePositions
+(const WalkMovement& movement)
+{
+  const double t = (movement.leftFoot.trajectorySize () - 1) * STEP;
+  const sot::Trajectory::vector_t& leftFoot = movement.leftFoot (t);
+  const sot::Trajectory::vector_t& rightFoot = movement.rightFoot (t);
+
+  lastLeftAnkle_ =
+    movement.wMw_traj *
+    computeAnklePositionInWorldFrame
+    (leftFoot[0], leftFoot[1], leftFoot[2], leftFoot[3], leftFootToAnkle_);
+  lastRightAnkle_ =
+    movement.wMw_traj *
+    computeAnklePositionInWorldFrame
+    (rightFoot[0], rightFoot[1], rightFoot[2], rightFoot[3],
+     rightFootToAnkle_);
+}
+
+bool
+FeetFollowerAnalyticalPg::switchWindow ()
+{
+  // Never block the control loop, retry at next iteration instead.
+  boost::mutex::scoped_try_lock lock (mutex_);
+  if (!lock.owns_lock () || !nextTrajectories_ || retiredTrajectories_)
+    return false;
+
+  const double startTime = getTrajectoryTime ();
+  if (startTime < nextWindowStartTime_)
+    return false;
+
+  // Support phases are expressed in trajectory time.
+  WalkMovement::supportFoot_t& supportFoot = nextTrajectories_->supportFoot;
+  for (unsigned i = 0; i < supportFoot.size (); ++i)
+    supportFoot[i].first += startTime;
+
+  // The previous window is released by the worker thread.
+  retiredTrajectories_.swap (trajectories_);
+  trajectories_.swap (nextTrajectories_);
+  windowStartTime_ = startTime;
+  index_ = 0;
+
+  condition_.notify_one ();
+  return true;
+}
+
+void
+FeetFollowerAnalyticalPg::startWorker ()
+{
+  if (worker_)
+    return;
+  stopWorker_ = false;
+  worker_.reset
+    (new boost::thread
+     (boost::bind (&FeetFollowerAnalyticalPg::runWorker, this)));
+}
+
+void
+FeetFollowerAnalyticalPg::stopWorker ()
+{
+  {
+    boost::mutex::scoped_lock lock (mutex_);
+    stopWorker_ = true;
+    condition_.notify_one ();
+  }
+  if (worker_)
+    worker_->join ();
+  worker_.reset ();
+}
+
+void
+FeetFollowerAnalyticalPg::runWorker ()
+{
+  boost::mutex::scoped_lock lock (mutex_);
+  while (!stopWorker_)
+    {
+      retiredTrajectories_.reset ();
+
+      std::vector<ml::Vector> steps;
+      double startTime = 0.;
+      if (nextTrajectories_ || !takeWindow (steps, startTime, false))
+	{
+	  condition_.wait (lock);
+	  continue;
+	}
+
+      const unsigned epoch = epoch_;
+      const sot::MatrixHomogeneous leftAnkle = lastLeftAnkle_;
+      const sot::MatrixHomogeneous rightAnkle = lastRightAnkle_;
+
+      walkMovementPtr_t movement;
+      lock.unlock ();
+      try
+	{
+	  movement = generateWindow (steps, leftAnkle, rightAnkle, false);
+	}
+      catch (const std::exception& e)
+	{
+	  std::cerr << "failed to generate steps: " << e.what () << std::endl;
+	}
+      lock.lock ();
+
+      // Steps have been cleared in the meantime.
+      if (!movement || epoch != epoch_)
+	continue;
+
+      nextTrajectories_ = movement;
+      nextWindowStartTime_ = startTime;
+      storeFinalAnklePositions (*movement);
+    }
+}
+
 void
 FeetFollowerAnalyticalPg::pushStep (const ml::Vector& step)
 {
@@ -539,8 +744,71 @@ FeetFollowerAnalyticalPg::pushStep (const ml::Vector& step)
       std::cerr << "invalid step" << std::endl;
       return;
     }
+  if (step (0) < -1.52 || step (0) > 0. || step (3) < -0.76 || step (3) > 0.)
+    {
+      std::cerr << "invalid step slides" << std::endl;
+      return;
+    }
 
+  boost::mutex::scoped_lock lock (mutex_);
+  if (closed_)
+    {
+      std::cerr << "steps have been flushed, clear them first" << std::endl;
+      return;
+    }
+  if (segments_.empty ())
+    segments_.push_back (Segment (0.));
   steps_.push_back (step);
+  ++segments_.back ().size;
+  condition_.notify_one ();
+}
+
+void
+FeetFollowerAnalyticalPg::startSegment (const double& startTime)
+{
+  boost::mutex::scoped_lock lock (mutex_);
+  segments_.push_back (Segment (startTime));
+  closed_ = false;
+  condition_.notify_one ();
+}
+
+void
+FeetFollowerAnalyticalPg::clearSteps ()
+{
+  boost::mutex::scoped_lock lock (mutex_);
+  steps_.clear ();
+  segments_.clear ();
+  nextTrajectories_.reset ();
+  flush_ = false;
+  closed_ = false;
+  ++epoch_;
+}
+
+void
+FeetFollowerAnalyticalPg::flushSteps ()
+{
+  boost::mutex::scoped_lock lock (mutex_);
+  flush_ = true;
+  condition_.notify_one ();
+}
+
+void
+FeetFollowerAnalyticalPg::setWindowSize (const unsigned& windowSize)
+{
+  if (windowSize % 2)
+    {
+      std::cerr << "window size must be even" << std::endl;
+      return;
+    }
+  boost::mutex::scoped_lock lock (mutex_);
+  windowSize_ = windowSize;
+}
+
+unsigned
+FeetFollowerAnalyticalPg::pendingSteps () const
+{
+  boost::mutex::scoped_lock lock (mutex_);
+  return steps_.size ();
 }
 
 DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (FeetFollowerAnalyticalPg,
@@ -591,4 +859,17 @@ namespace command
     entity.clearSteps ();
     return Value ();
   }
+
+  FlushSteps::FlushSteps (FeetFollowerAnalyticalPg& entity,
+			  const std::string& docstring)
+    : Command (entity, std::vector<Value::Type> (), docstring)
+  {}
+
+  Value FlushSteps::doExecute()
+  {
+    FeetFollowerAnalyticalPg& entity =
+      static_cast<FeetFollowerAnalyticalPg&>(owner ());
+    entity.flushSteps ();
+    return Value ();
+  }
 } // end of namespace command.
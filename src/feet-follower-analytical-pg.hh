@@ -16,10 +16,17 @@
 
 #ifndef SOT_MOTION_PLANNER_FEET_FOLLOWER_ANALYTICAL_PG_HH
 # define SOT_MOTION_PLANNER_FEET_FOLLOWER_ANALYTICAL_PG_HH
+# include <deque>
 # include <string>
+# include <vector>
 
 # include <boost/filesystem/path.hpp>
 # include <boost/optional.hpp>
+# include <boost/scoped_ptr.hpp>
+# include <boost/shared_ptr.hpp>
+# include <boost/thread/condition_variable.hpp>
+# include <boost/thread/mutex.hpp>
+# include <boost/thread/thread.hpp>
 
 # include <dynamic-graph/command.h>
 
@@ -58,8 +65,38 @@ namespace command
 		const std::string& docstring);
     virtual Value doExecute ();
   };
+
+  class FlushSteps : public Command
+  {
+  public:
+    FlushSteps (FeetFollowerAnalyticalPg& entity,
+		const std::string& docstring);
+    virtual Value doExecute ();
+  };
 } // end of namespace command.
 
+/// \brief Feet follower using the analytical pattern generator.
+///
+/// By default, the whole walk is generated by generateTrajectory
+/// from the steps pushed beforehand.
+///
+/// If a window size is set, the steps are consumed by windows
+/// instead. generateTrajectory only generates the first window and a
+/// background thread generates the next one, ahead of execution, as
+/// soon as enough steps have been pushed. Steps can therefore be
+/// pushed while the robot is walking and at most two windows are
+/// stored at any time.
+///
+/// Each window starts and ends in double support: the first slide of
+/// the first step of a window is ignored. Windows contain an even
+/// number of steps so that they all start on the same support foot,
+/// except the last one which is generated by flushSteps.
+///
+/// Steps can also be split into segments (startSegment), each one
+/// being an independent walk starting at a given trajectory time.
+/// The robot stands still between two segments. Segments are
+/// generated by the worker thread too, so several walks are executed
+/// by a single feet follower.
 class FeetFollowerAnalyticalPg : public FeetFollower
 {
   DYNAMIC_GRAPH_ENTITY_DECL ();
@@ -73,10 +110,22 @@ public:
 
   void pushStep (const ml::Vector& step);
 
-  void clearSteps ()
-  {
-    steps_.clear ();
-  }
+  void clearSteps ();
+
+  /// \brief Generate the remaining steps even if they do not fill
+  ///        a window.
+  ///
+  /// If an odd number of steps remains, the stream is closed until
+  /// clearSteps is called.
+  void flushSteps ();
+
+  void setWindowSize (const unsigned& windowSize);
+
+  /// \brief Steps pushed afterward start a new walk at the given
+  ///        trajectory time.
+  void startSegment (const double& startTime);
+
+  unsigned pendingSteps () const;
 
   virtual boost::optional<const WalkMovement&> walkMovement () const
   {
@@ -112,14 +161,94 @@ public:
   }
 
 private:
+  typedef boost::shared_ptr<WalkMovement> walkMovementPtr_t;
+
+  /// \brief Steps of a walk segment not generated yet.
+  struct Segment
+  {
+    explicit Segment (double startTime)
+      : size (0),
+	startTime (startTime)
+    {}
+
+    /// \brief Number of steps in the queue.
+    unsigned size;
+    /// \brief Trajectory time at which the walk starts.
+    double startTime;
+  };
+
   virtual void impl_update ();
   void updateVelocities ();
 
-  std::vector<ml::Vector> steps_;
+  /// \brief Generate the walk movement executing the given steps
+  ///        from the given ankle positions.
+  ///
+  /// Warnings about the waist, gaze and zmp files are only printed
+  /// if verbose is true, i.e. not by the worker thread.
+  walkMovementPtr_t
+  generateWindow (const std::vector<ml::Vector>& steps,
+		  const sot::MatrixHomogeneous& leftAnkle,
+		  const sot::MatrixHomogeneous& rightAnkle,
+		  bool verbose);
+
+  /// \brief Remove the steps of the next window from the queue.
+  ///
+  /// A window never spans several segments, startTime is set to the
+  /// time at which the window must start. If partial is true, a
+  /// window which is not full is accepted.
+  /// The mutex must be locked.
+  bool takeWindow (std::vector<ml::Vector>& steps, double& startTime,
+		   bool partial);
+
+  /// \brief Store the final ankle positions of a generated window.
+  void storeFinalAnklePositions (const WalkMovement& movement);
+
+  /// \brief Replace the current window by the next one if it has
+  ///        been generated.
+  bool switchWindow ();
+
+  void startWorker ();
+  void stopWorker ();
+  void runWorker ();
+
+  std::deque<ml::Vector> steps_;
   bool leftOrRightFootStable_;
 
-  boost::optional<WalkMovement> trajectories_;
+  walkMovementPtr_t trajectories_;
   unsigned index_;
+
+  /// \name Sliding window generation.
+  /// \{
+
+  /// \brief Number of steps per window (0 generates whole segments).
+  unsigned windowSize_;
+  /// \brief Walk segments, steps_ is the concatenation of their steps.
+  std::deque<Segment> segments_;
+  /// \brief Trajectory time at which the current window starts.
+  double windowStartTime_;
+  /// \brief Trajectory time at which the next window starts.
+  double nextWindowStartTime_;
+  /// \brief Generated window waiting to be executed.
+  walkMovementPtr_t nextTrajectories_;
+  /// \brief Executed window, released by the worker thread.
+  walkMovementPtr_t retiredTrajectories_;
+  /// \brief Final ankle positions of the last generated window.
+  sot::MatrixHomogeneous lastLeftAnkle_;
+  sot::MatrixHomogeneous lastRightAnkle_;
+  /// \brief Generate remaining steps even if the window is not full.
+  bool flush_;
+  /// \brief An odd number of steps has been flushed.
+  bool closed_;
+
+  mutable boost::mutex mutex_;
+  boost::condition_variable condition_;
+  boost::scoped_ptr<boost::thread> worker_;
+  bool stopWorker_;
+  /// \brief Incremented when the steps are cleared to discard the
+  ///        window being generated.
+  unsigned epoch_;
+  /// \}
+
   boost::filesystem::path waistFile_;
   boost::filesystem::path gazeFile_;
   boost::filesystem::path zmpFile_;
@@ -16,6 +16,7 @@
 
 #include <string>
 #include <fstream>
+#include <stdexcept>
 
 #include <boost/bind.hpp>
 #include <boost/format.hpp>
@@ -78,12 +79,49 @@ using ::dynamicgraph::command::Setter;
 FeetFollowerFromFile::FeetFollowerFromFile (const std::string& name)
   : FeetFollower (name),
     trajectories_ (),
-    index_ (0)
+    index_ (0),
+    interpolation_ (sot::DiscretizedTrajectory::INTERPOLATION_NEAREST),
+    compression_ (0.)
 {
   std::string docstring = "";
   addCommand ("readTrajectory", new Setter<FeetFollowerFromFile, std::string>
 	      (*this, &FeetFollowerFromFile::readTrajectory, docstring));
 
+  docstring =
+    "    Set the interpolation of the trajectories\n"
+    "    \n"
+    "    Input: a string, nearest (default), linear or cubic.\n"
+    "      Homogeneous matrices rotations are interpolated by SLERP.\n"
+    "      Only the trajectories read afterward are affected.\n";
+  addCommand ("setInterpolation",
+	      new Setter<FeetFollowerFromFile, std::string>
+	      (*this, &FeetFollowerFromFile::setInterpolation, docstring));
+
+  docstring =
+    "    Compress the trajectories\n"
+    "    \n"
+    "    Input: a double, the maximum interpolation error.\n"
+    "      Samples which can be interpolated from their neighbours\n"
+    "      are dropped, 0 (default) keeps all the samples.\n"
+    "      Only the trajectories read afterward are affected.\n";
+  addCommand ("setCompression",
+	      new Setter<FeetFollowerFromFile, double>
+	      (*this, &FeetFollowerFromFile::setCompression, docstring));
+}
+
+void
+FeetFollowerFromFile::setInterpolation (const std::string& interpolation)
+{
+  interpolation_ =
+    sot::DiscretizedTrajectory::stringToInterpolation (interpolation);
+}
+
+void
+FeetFollowerFromFile::setCompression (const double& tolerance)
+{
+  if (tolerance < 0.)
+    throw std::runtime_error ("compression tolerance must be positive");
+  compression_ = tolerance;
 }
 
 void
@@ -166,6 +204,23 @@ FeetFollowerFromFile::readTrajectory (const std::string& dirname)
 				trajectoryGazePath,
 				STEP);
 
+  sot::DiscretizedTrajectory* trajectories[] =
+    {
+      &trajectories_->leftFoot,
+      &trajectories_->rightFoot,
+      &trajectories_->com,
+      &trajectories_->zmp,
+      &trajectories_->waistYaw,
+      &trajectories_->waist,
+      &trajectories_->gaze
+    };
+  for (unsigned i = 0; i < sizeof (trajectories) / sizeof (*trajectories); ++i)
+    {
+      trajectories[i]->setInterpolation (interpolation_);
+      if (compression_ > 0.)
+	trajectories[i]->compress (compression_);
+    }
+
   // Reset the movement.
   index_ = 0;
 
@@ -38,6 +38,14 @@ public:
 
   void readTrajectory (const std::string& dirname);
 
+  /// \brief Set the interpolation of the trajectories read afterward.
+  void setInterpolation (const std::string& interpolation);
+  /// \brief Compress the trajectories read afterward.
+  ///
+  /// \param tolerance maximum interpolation error, zero disables
+  ///        the compression.
+  void setCompression (const double& tolerance);
+
   virtual boost::optional<const WalkMovement&> walkMovement () const
   {
     if (!trajectories_)
@@ -59,6 +67,9 @@ private:
 private:
   boost::optional<WalkMovement> trajectories_;
   unsigned index_;
+
+  sot::DiscretizedTrajectory::Interpolation interpolation_;
+  double compression_;
 };
 
 #endif //! SOT_MOTION_PLANNER_FEET_FOLLOWER_FROM_FILE_HH
@@ -33,6 +33,7 @@
 #include <dynamic-graph/signal-ptr.h>
 
 #include "common.hh"
+#include "event-log.hh"
 #include "feet-follower-with-correction.hh"
 
 namespace ublas = boost::numeric::ublas;
@@ -107,7 +108,13 @@ FeetFollowerWithCorrection::FeetFollowerWithCorrection (const std::string& name)
     dbgFootstepsOut_ (INIT_SIGNAL_OUT
 		      ("dbgFootsteps",
 		       FeetFollowerWithCorrection::updateDbgFootsteps,
-		       "Vector"))
+		       "Vector")),
+    phases_ (),
+    phaseCursor_ (0),
+    phaseOut_ (INIT_SIGNAL_OUT
+	       ("phase",
+		FeetFollowerWithCorrection::updatePhase,
+		"Vector"))
 
 {
   leftAnkleOut_.addDependency (offsetIn_);
@@ -137,8 +144,10 @@ FeetFollowerWithCorrection::FeetFollowerWithCorrection (const std::string& name)
 
 
   dbgFootstepsOut_.setNeedUpdateFromAllChildren (true);
+  phaseOut_.setNeedUpdateFromAllChildren (true);
 
-  signalRegistration (offsetIn_ << positionIn_ << dbgFootstepsOut_);
+  signalRegistration (offsetIn_ << positionIn_ << dbgFootstepsOut_
+		      << phaseOut_);
 
   std::string docstring = "";
   addCommand ("setReferenceTrajectory",
@@ -150,6 +159,16 @@ FeetFollowerWithCorrection::FeetFollowerWithCorrection (const std::string& name)
 
   addCommand ("setFootsteps",
 	      new command::SetFootsteps (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Return the support phases of the reference walk.\n"
+    "    \n"
+    "      The result is a vector of (start time, support foot) pairs\n"
+    "      where the support foot is -1 (double), 0 (left) or 1 (right).\n";
+  addCommand ("getSupportPhases",
+	      new dg::command::Getter<FeetFollowerWithCorrection, ml::Vector>
+	      (*this, &FeetFollowerWithCorrection::supportPhases, docstring));
 }
 
 FeetFollowerWithCorrection::~FeetFollowerWithCorrection ()
@@ -162,6 +181,109 @@ FeetFollowerWithCorrection::updateDbgFootsteps (ml::Vector& res, int)
   return res;
 }
 
+ml::Vector&
+FeetFollowerWithCorrection::updatePhase (ml::Vector& res, int t)
+{
+  if (t > t_)
+    update (t);
+
+  res.resize (4);
+  if (phases_.empty ())
+    {
+      res (0) = WalkMovement::SUPPORT_FOOT_DOUBLE;
+      res (1) = -1.;
+      res (2) = 0.;
+      res (3) = -1.;
+      return res;
+    }
+
+  res (0) = phases_[phaseCursor_].second;
+  res (1) = phaseCursor_;
+  res (2) = phases_[phaseCursor_].first;
+  res (3) = phaseCursor_ + 1 < phases_.size ()
+    ? phases_[phaseCursor_ + 1].first : -1.;
+  return res;
+}
+
+ml::Vector
+FeetFollowerWithCorrection::supportPhases () const
+{
+  ml::Vector res (2 * phases_.size ());
+  for (unsigned i = 0; i < phases_.size (); ++i)
+    {
+      res (2 * i) = phases_[i].first;
+      res (2 * i + 1) = phases_[i].second;
+    }
+  return res;
+}
+
+void
+FeetFollowerWithCorrection::buildPhaseTable ()
+{
+  phases_.clear ();
+  phaseCursor_ = 0;
+
+  if (!referenceTrajectory_ || !referenceTrajectory_->walkMovement ())
+    return;
+  const WalkMovement::supportFoot_t& supportFoot =
+    referenceTrajectory_->walkMovement ()->supportFoot;
+
+  // Allocate once, before the control loop extends the table.
+  const std::size_t capacity = PHASE_TABLE_CAPACITY;
+  phases_.reserve (std::max (capacity, 2 * supportFoot.size ()));
+  phases_.assign (supportFoot.begin (), supportFoot.end ());
+}
+
+void
+FeetFollowerWithCorrection::extendPhaseTable ()
+{
+  if (!referenceTrajectory_ || !referenceTrajectory_->walkMovement ())
+    return;
+  const WalkMovement::supportFoot_t& supportFoot =
+    referenceTrajectory_->walkMovement ()->supportFoot;
+
+  if (supportFoot.empty () || phases_.empty ()
+      || supportFoot.back ().first <= phases_.back ().first)
+    return;
+
+  // Forget the phases which have been executed. Phases are moved
+  // within the reserved storage, the table is never reallocated.
+  std::copy (phases_.begin () + phaseCursor_, phases_.end (),
+	     phases_.begin ());
+  phases_.resize (phases_.size () - phaseCursor_);
+  phaseCursor_ = 0;
+
+  for (unsigned i = 0; i < supportFoot.size (); ++i)
+    {
+      if (supportFoot[i].first <= phases_.back ().first)
+	continue;
+      // Table full: the remaining phases are appended once the
+      // current ones have been executed.
+      if (phases_.size () == phases_.capacity ())
+	break;
+      // Windows start with the double support ending the previous one.
+      if (supportFoot[i].second == phases_.back ().second)
+	continue;
+      phases_.push_back (supportFoot[i]);
+    }
+}
+
+void
+FeetFollowerWithCorrection::updatePhaseCursor (const double& time)
+{
+  extendPhaseTable ();
+  if (phases_.empty ())
+    return;
+
+  // Time went backward, restart from the beginning.
+  if (time < phases_[phaseCursor_].first)
+    phaseCursor_ = 0;
+
+  while (phaseCursor_ + 1 < phases_.size ()
+	 && phases_[phaseCursor_ + 1].first <= time)
+    ++phaseCursor_;
+}
+
 void
 FeetFollowerWithCorrection::updateVelocities ()
 {
@@ -226,32 +348,12 @@ FeetFollowerWithCorrection::impl_start ()
     return;
   referenceTrajectory_->start ();
 
+  buildPhaseTable ();
   computeNewCorrection ();
 }
 
 namespace
 {
-  bool phaseStart (const WalkMovement& movement,
-		   const double& t,
-		   WalkMovement::SupportFoot supportFoot)
-  {
-    typedef std::pair<double, WalkMovement::SupportFoot> iter_t;
-
-    BOOST_FOREACH (const iter_t& e, movement.supportFoot)
-      {
-	if (e.first > t)
-	  return false;
-	if (t >= e.first && std::fabs (e.first - t) <= 1e-2)
-	  return e.second == supportFoot;
-      }
-    return false;
-  }
-
-  bool isDoubleSupportStart (const WalkMovement& movement, const double& t)
-  {
-    return phaseStart (movement, t, WalkMovement::SUPPORT_FOOT_DOUBLE);
-  }
-
   bool contain (const double& t, const sot::ErrorTrajectory& trajectory)
   {
     return (t >= trajectory.getLowerBound (trajectory.getRange ())
@@ -285,19 +387,6 @@ namespace
       (correction.comCorrection.getRange ());
   }
 
-  WalkMovement::supportFoot_t::const_iterator
-  findIter (const WalkMovement::supportFoot_t& supportFoot, const double& time)
-  {
-    WalkMovement::supportFoot_t::const_iterator iter = supportFoot.begin ();
-    for (; iter != supportFoot.end (); ++iter)
-      {
-	if (time >= iter->first
-	    && std::fabs (time - iter->first) <= 1e-2)
-	  return iter;
-      }
-    return supportFoot.end ();
-  }
-
   // If the correction goes toward left, do it with left foot first,
   // otherwise do it with right foot first.
   //
@@ -372,52 +461,28 @@ FeetFollowerWithCorrection::computeNewCorrection ()
 {
   const double time = referenceTrajectory_->getTrajectoryTime ();
 
-  if (time > 0.
-      && (!isDoubleSupportStart (*referenceTrajectory_->walkMovement (), time)
-	  || !correctionIsFinished (corrections_, time)))
-    return;
+  updatePhaseCursor (time);
 
-  const WalkMovement::supportFoot_t& supportFoot =
-    referenceTrajectory_->walkMovement ()->supportFoot;
+  // A correction starts at the beginning of a double support phase
+  // which is followed by two steps.
+  const unsigned i = phaseCursor_;
+  if (i + 4 >= phases_.size ()
+      || phases_[i].second != WalkMovement::SUPPORT_FOOT_DOUBLE
+      || time < phases_[i].first || time - phases_[i].first > 1e-2)
+    return;
+  if (time > 0. && !correctionIsFinished (corrections_, time))
+    return;
 
   // Now - double support
-  WalkMovement::supportFoot_t::const_iterator t = supportFoot.end ();
+  const WalkMovement::supportFoot_t::value_type* t = &phases_[i];
   // left or right
-  WalkMovement::supportFoot_t::const_iterator t1 = supportFoot.end ();
+  const WalkMovement::supportFoot_t::value_type* t1 = &phases_[i + 1];
   // double support
-  WalkMovement::supportFoot_t::const_iterator t2 = supportFoot.end ();
+  const WalkMovement::supportFoot_t::value_type* t2 = &phases_[i + 2];
   // left or right (opposite foot)
-  WalkMovement::supportFoot_t::const_iterator t3 = supportFoot.end ();
+  const WalkMovement::supportFoot_t::value_type* t3 = &phases_[i + 3];
   // double support
-  WalkMovement::supportFoot_t::const_iterator t4 = supportFoot.end ();
-
-  // Find next steps.
-  t = findIter (supportFoot, time);
-  if (t != supportFoot.end ())
-    {
-      t1 = t;
-      ++t1;
-      if (t1 != supportFoot.end ())
-	{
-	  t2 = t1;
-	  ++t2;
-	  if (t2 != supportFoot.end ())
-	    {
-	      t3 = t2;
-	      ++t3;
-	      if (t3 != supportFoot.end ())
-		{
-		  t4 = t3;
-		  ++t4;
-		}
-	    }
-	}
-    }
-
-  if (t == supportFoot.end () || t1 == supportFoot.end ()
-      || t2 == supportFoot.end () || t3 == supportFoot.end ()
-      || t4 == supportFoot.end ())
-    return;
+  const WalkMovement::supportFoot_t::value_type* t4 = &phases_[i + 4];
 
   assert (t->second == WalkMovement::SUPPORT_FOOT_DOUBLE);
   assert (t1->second == WalkMovement::SUPPORT_FOOT_LEFT
@@ -526,10 +591,11 @@ FeetFollowerWithCorrection::computeNewCorrection ()
 
   updateFootsteps (time, XYThetaToMatrixHomogeneous (errorW));
 
-  std::cout
-    << "Adding new correction, offset = " << error
-    << ", t = " << t_
-    << ", " << (leftFirst ? 'l' : 'r') << std::endl;
+  const double correctionData[4] =
+    {error[0], error[1], error[2], leftFirst ? 0. : 1.};
+  sot::motionPlanner::EventLog::instance ().push
+    (t_, sot::motionPlanner::EVENT_CORRECTION, getName (),
+     "new correction (x, y, theta, first foot)", correctionData, 4);
 }
 
 void
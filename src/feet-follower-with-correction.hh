@@ -121,6 +121,11 @@ public:
     return footstepsTime_;
   }
 
+  /// \brief Return the support phases of the reference walk.
+  ///
+  /// The phases are flattened as (start time, support foot) pairs.
+  ml::Vector supportPhases () const;
+
 protected:
   virtual void impl_update ();
   void updateCorrection ();
@@ -132,6 +137,23 @@ protected:
 
   void computeNewCorrection ();
 
+  /// \brief Copy the support phases of the reference walk and
+  ///        rewind the cursor.
+  void buildPhaseTable ();
+  /// \brief Append the phases of a new window of the reference walk.
+  ///
+  /// Executed phases are dropped at the same time so that the table
+  /// size does not depend on the walk length. The table storage is
+  /// reserved by buildPhaseTable: this is called from the control
+  /// loop and never allocates.
+  void extendPhaseTable ();
+  /// \brief Move the cursor to the phase containing the given time.
+  ///
+  /// Time is expected to increase so that the amortized cost is O(1).
+  void updatePhaseCursor (const double& time);
+
+  ml::Vector& updatePhase (ml::Vector& res, int);
+
 private:
   FeetFollower* referenceTrajectory_;
 
@@ -152,6 +174,18 @@ private:
   double footstepsTime_;
   ml::Vector footsteps_;
   signalVectorOut_t dbgFootstepsOut_;
+
+  /// \brief Minimum number of phases the table can hold.
+  static const std::size_t PHASE_TABLE_CAPACITY = 256;
+
+  /// \brief Support phases of the reference walk.
+  WalkMovement::supportFoot_t phases_;
+  /// \brief Index of the current phase in phases_.
+  unsigned phaseCursor_;
+
+  /// \brief Current phase: support foot, phase index, start time
+  ///        and start time of the next phase (-1 if none).
+  signalVectorOut_t phaseOut_;
 };
 
 namespace command
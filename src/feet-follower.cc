@@ -95,6 +95,66 @@ WalkMovement::WalkMovement
     wMw_traj (wMw_traj)
 {}
 
+void
+WalkMovement::computeVelocities (double step)
+{
+  using sot::Trajectory;
+  using roboptim::Function;
+
+  const size_t size = leftFoot.trajectorySize ();
+  comVelocity.assign (size, ml::Vector (3));
+  waistYawVelocity.assign (size, ml::Vector (3));
+  leftAnkleVelocity.assign (size, ml::Vector (6));
+  rightAnkleVelocity.assign (size, ml::Vector (6));
+  for (size_t i = 0; i < size; ++i)
+    {
+      comVelocity[i].setZero ();
+      waistYawVelocity[i].setZero ();
+      leftAnkleVelocity[i].setZero ();
+      rightAnkleVelocity[i].setZero ();
+    }
+  if (size < 2)
+    return;
+
+  Trajectory::vector_t leftFootPrev = leftFoot (0.);
+  Trajectory::vector_t rightFootPrev = rightFoot (0.);
+  Trajectory::vector_t comPrev = com (0.);
+  Trajectory::vector_t waistYawPrev = waistYaw (0.);
+
+  // As for a finite difference evaluated at each iteration, the
+  // velocity is null once the next time leaves the trajectory range.
+  const double upper = Function::getUpperBound (leftFoot.getRange ());
+  for (size_t i = 0; i + 1 < size && (i + 1) * step < upper; ++i)
+    {
+      const double tnext = (i + 1) * step;
+      const Trajectory::vector_t& leftFootNext = leftFoot (tnext);
+      const Trajectory::vector_t& rightFootNext = rightFoot (tnext);
+      const Trajectory::vector_t& comNext = com (tnext);
+      const Trajectory::vector_t& waistYawNext = waistYaw (tnext);
+
+      comVelocity[i].accessToMotherLib () = (comNext - comPrev) / step;
+
+      waistYawVelocity[i] (2) = waistYawNext[0] - waistYawPrev[0];
+
+      //FIXME: foot <-> ankle
+      leftAnkleVelocity[i] (0) = (leftFootNext[0] - leftFootPrev[0]) / step;
+      leftAnkleVelocity[i] (1) = (leftFootNext[1] - leftFootPrev[1]) / step;
+      leftAnkleVelocity[i] (5) = (leftFootNext[2] - leftFootPrev[2]) / step;
+
+      rightAnkleVelocity[i] (0) =
+	(rightFootNext[0] - rightFootPrev[0]) / step;
+      rightAnkleVelocity[i] (1) =
+	(rightFootNext[1] - rightFootPrev[1]) / step;
+      rightAnkleVelocity[i] (5) =
+	(rightFootNext[2] - rightFootPrev[2]) / step;
+
+      leftFootPrev = leftFootNext;
+      rightFootPrev = rightFootNext;
+      comPrev = comNext;
+      waistYawPrev = waistYawNext;
+    }
+}
+
 using ::dynamicgraph::command::Getter;
 using ::dynamicgraph::command::Setter;
 
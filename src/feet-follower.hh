@@ -17,6 +17,7 @@
 #ifndef SOT_MOTION_PLANNER_FEET_FOLLOWER_HH
 # define SOT_MOTION_PLANNER_FEET_FOLLOWER_HH
 # include <string>
+# include <vector>
 
 # include <boost/optional.hpp>
 
@@ -127,6 +128,21 @@ struct WalkMovement
   /// ${}^wM_{la} = {}^w M_{w_{traj}} * {}^{w_{traj}} M_{la}$
   sot::MatrixHomogeneous wMw_traj;
 
+  /// \brief Compute the reference velocities of each control step.
+  ///
+  /// Velocities are obtained by differencing the trajectories
+  /// sampled every step seconds. The velocities of the last step are
+  /// zero.
+  void computeVelocities (double step);
+
+  /// \name Reference velocities, one per control step.
+  /// \{
+  std::vector<ml::Vector> comVelocity;
+  std::vector<ml::Vector> waistYawVelocity;
+  std::vector<ml::Vector> leftAnkleVelocity;
+  std::vector<ml::Vector> rightAnkleVelocity;
+  /// \}
+
   /// \brief Describes when the walk phase changes.
   ///
   /// Each element of the vector describes a new phase
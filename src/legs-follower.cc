@@ -44,7 +44,9 @@
 
 #include "common.hh"
 #include "discretized-trajectory.hh"
+#include "event-log.hh"
 #include "legs-follower.hh"
+#include "time.hh"
 
 namespace ml = ::maal::boost;
 namespace dg = ::dynamicgraph;
@@ -115,11 +117,13 @@ void LegsFollower::getAbsoluteTime(double& sec, double& usec)
 {
   sotDEBUGIN(15);
 #if 1
-  boost::posix_time::ptime t(boost::posix_time::microsec_clock::universal_time ());
-  boost::posix_time::time_duration t_now = t.time_of_day();
-  sec = t_now.total_seconds();
-  double total_usec = (double) t_now.total_microseconds();
-  usec = total_usec - 1000000.0*sec;
+  // Time of day, read from the clock shared with the other entities.
+  static const sot::motionPlanner::nanoseconds_t day =
+    24LL * 3600LL * 1000000000LL;
+  const sot::motionPlanner::nanoseconds_t now =
+    sot::motionPlanner::SharedClock::instance ().now () % day;
+  sec = static_cast<double> (now / 1000000000);
+  usec = static_cast<double> ((now % 1000000000) / 1000);
 #else
   struct timeval tv;
   gettimeofday (&tv,NULL);
@@ -161,7 +165,10 @@ LegsFollower::start ()
   temp(2) = usec;
   outputStart_ = temp;
   started_ = RUN;
-  std::cout << "Start at index "<< startIndex_ << " (" << startTime_ << "s)" << std::endl;
+  const double startData[2] = {static_cast<double> (startIndex_), startTime_};
+  sot::motionPlanner::EventLog::instance ().push
+    (t_, sot::motionPlanner::EVENT_INFO, getName (), "start",
+     startData, 2);
   sotDEBUGOUT(15);
 
 }
@@ -368,9 +375,12 @@ LegsFollower::updateRefFromCorba()
   int begin = (int) (r(2)/0.005 + 0.001);
   int end   = (int) (r(3)/0.005 + 0.001);
 
-  std::cout << t_ << " New message : ID "<< lastID << " with " << r.size() 
-	    << " values, from " << begin*0.005 << " to " << end*0.005 
-	    << ", end of path = "<< endOfPath <<"."<< std::endl;
+  const double messageData[5] =
+    {lastID, static_cast<double> (r.size ()),
+     begin * 0.005, end * 0.005, endOfPath};
+  sot::motionPlanner::EventLog::instance ().push
+    (t_, sot::motionPlanner::EVENT_REFERENCE_MESSAGE, getName (),
+     "new message", messageData, 5);
 
   int currIndex = t_-startIndex_;
   if( (started_ == RUN || started_ == STOP) && currIndex > begin){
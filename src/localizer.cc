@@ -14,8 +14,12 @@
 // sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
 
 #include <algorithm>
+#include <cmath>
+#include <map>
+#include <sstream>
 #include <string>
 #include <fstream>
+#include <stdexcept>
 
 #include <boost/assign/list_of.hpp>
 #include <boost/bind.hpp>
@@ -36,6 +40,7 @@
 #include <dynamic-graph/command.h>
 
 #include "common.hh"
+#include "event-log.hh"
 
 
 // Python:
@@ -56,17 +61,64 @@ class Localizer;
 namespace command
 {
   class AddLandmarkObservation;
+  class AddLandmarkObservations;
+  class SetLandmarkVectors;
+  class SetLandmarkMatrices;
+  class SetRobustEstimator;
 } // end of namespace command.
 
+namespace ublas = boost::numeric::ublas;
+
+/// \brief Copy a value into its cache.
+///
+/// The cache is only reallocated if the value size changes.
+///
+/// \return true if the cache content has been modified.
+template <typename T>
+bool updateCache (T& cache, const T& value)
+{
+  if (cache.size () != value.size ())
+    {
+      cache.resize (value.size (), false);
+      cache = value;
+      return true;
+    }
+  if (std::equal (value.begin (), value.end (), cache.begin ()))
+    return false;
+  cache = value;
+  return true;
+}
+
+template <>
+bool updateCache (ublas::matrix<double>& cache,
+		  const ublas::matrix<double>& value)
+{
+  if (cache.size1 () != value.size1 () || cache.size2 () != value.size2 ())
+    {
+      cache.resize (value.size1 (), value.size2 (), false);
+      cache = value;
+      return true;
+    }
+  if (std::equal (value.data ().begin (), value.data ().end (),
+		  cache.data ().begin ()))
+    return false;
+  cache = value;
+  return true;
+}
+
 struct LandmarkObservation
 {
   typedef dg::SignalPtr<sot::MatrixHomogeneous, int> signalInMatrixHomo_t;
   typedef dg::SignalPtr<ml::Matrix, int> signalInMatrix_t;
   typedef dg::SignalPtr<ml::Vector, int> signalInVector_t;
+  typedef dg::SignalTimeDependent<ml::Vector, int> signalOutVector_t;
 
   explicit LandmarkObservation (Localizer& localizer,
 				const std::string& signalNamePrefix);
 
+  /// \brief Localizer owning this observation.
+  Localizer& localizer_;
+
   /// \name Input signals
   /// \{
 
@@ -124,6 +176,199 @@ struct LandmarkObservation
   signalInVector_t correctedDofs_;
   /// \}
 
+  /// \name Output signals
+  /// \{
+
+  /// \brief Weighted residual W dq - ds of this observation once the
+  ///        configuration offset has been computed.
+  ///
+  /// In robust mode, large residuals identify the observations
+  /// which have been discarded or down-weighted.
+  signalOutVector_t residual_;
+  /// \}
+
+  ml::Vector& computeResidual (ml::Vector& res, int t);
+
+  /// \brief Number of configuration parameters which can be corrected.
+  static const unsigned CONFIGURATION_SIZE = 3;
+
+  /// \brief Retrieve a vector input signal from its short name
+  ///        (i.e. without the observation prefix).
+  signalInVector_t& vectorSignal (const std::string& name)
+  {
+    if (name == "featureReferencePosition")
+      return featureReferencePosition_;
+    if (name == "featureObservedPosition")
+      return featureObservedPosition_;
+    if (name == "weight")
+      return weight_;
+    if (name == "correctedDofs")
+      return correctedDofs_;
+    throw std::runtime_error ("invalid landmark vector signal " + name);
+  }
+
+  /// \brief Retrieve a matrix input signal from its short name
+  ///        (i.e. without the observation prefix).
+  signalInMatrix_t& matrixSignal (const std::string& name)
+  {
+    if (name == "JsensorPosition")
+      return JsensorPosition_;
+    if (name == "JfeatureReferencePosition")
+      return JfeatureReferencePosition_;
+    throw std::runtime_error ("invalid landmark matrix signal " + name);
+  }
+
+  /// \brief Refresh the weighted Jacobian block of this observation.
+  ///
+  /// The block is only recomputed if one of the Jacobians, the
+  /// weight or the corrected DoFs changed since the last call.
+  /// Workspaces are only (re)allocated when the problem dimensions
+  /// change.
+  ///
+  /// \return true if the block has been modified.
+  bool updateJacobian (int t)
+  {
+    bool changed = false;
+    changed |= updateCache (JsensorPositionCache_,
+			    JsensorPosition_ (t).accessToMotherLib ());
+    changed |= updateCache (JfeatureReferencePositionCache_,
+			    JfeatureReferencePosition_ (t).accessToMotherLib ());
+    changed |= updateCache (weightCache_, weight_ (t).accessToMotherLib ());
+    changed |= updateCache (correctedDofsCache_,
+			    correctedDofs_ (t).accessToMotherLib ());
+    if (!changed)
+      return false;
+
+    const size_t featureSize = JfeatureReferencePositionCache_.size1 ();
+    // Invalid inputs are checked again at the next call.
+    if (JfeatureReferencePositionCache_.size2 ()
+	!= JsensorPositionCache_.size1 ())
+      {
+	JsensorPositionCache_.resize (0, 0, false);
+	throw std::runtime_error
+	  ("feature and sensor Jacobian sizes are inconsistent");
+      }
+    if (weightCache_.size () != featureSize)
+      {
+	weightCache_.resize (0, false);
+	throw std::runtime_error
+	  ("feature and weight sizes are inconsistent");
+      }
+    if (correctedDofsCache_.size () != JsensorPositionCache_.size2 ())
+      {
+	correctedDofsCache_.resize (0, false);
+	throw std::runtime_error
+	  ("corrected DoFs and Jacobian sizes are inconsistent");
+      }
+    if (product_.size1 () != featureSize
+	|| product_.size2 () != JsensorPositionCache_.size2 ())
+      product_.resize (featureSize, JsensorPositionCache_.size2 (), false);
+    if (W_.size1 () != featureSize)
+      W_.resize (featureSize, CONFIGURATION_SIZE, false);
+
+    ublas::noalias (product_) =
+      ublas::prod (JfeatureReferencePositionCache_, JsensorPositionCache_);
+
+    // Extract considered DoFs and multiply by weight.
+    W_.clear ();
+    unsigned column = 0;
+    for (unsigned j = 0; j < correctedDofsCache_.size (); ++j)
+      {
+	if (correctedDofsCache_[j] != 1.)
+	  continue;
+	if (column >= CONFIGURATION_SIZE)
+	  throw std::runtime_error ("too many corrected DoFs");
+	for (unsigned i = 0; i < featureSize; ++i)
+	  W_ (i, column) = product_ (i, j) * weightCache_[i];
+	++column;
+      }
+
+    // Contribution of this observation to the normal matrix.
+    normal_.clear ();
+    for (unsigned r = 0; r < featureSize; ++r)
+      for (unsigned i = 0; i < CONFIGURATION_SIZE; ++i)
+	for (unsigned j = 0; j < CONFIGURATION_SIZE; ++j)
+	  normal_ (i, j) += W_ (r, i) * W_ (r, j);
+    return true;
+  }
+
+  /// \brief Compute the weighted feature offset ds and W^T ds.
+  void updateFeatureOffset (int t)
+  {
+    const ublas::vector<double>& featureObservedPos =
+      featureObservedPosition_ (t).accessToMotherLib ();
+    const ublas::vector<double>& featureReferencePos =
+      featureReferencePosition_ (t).accessToMotherLib ();
+
+    if (featureReferencePos.size () != W_.size1 ()
+	|| featureObservedPos.size () != W_.size1 ())
+      throw std::runtime_error
+	("feature and Jacobian sizes are inconsistent");
+    if (weightCache_.size () != W_.size1 ())
+      throw std::runtime_error
+	("feature and weight sizes are inconsistent");
+
+    if (delta_.size () != W_.size1 ())
+      {
+	delta_.resize (W_.size1 (), false);
+	residualValue_.resize (W_.size1 (), false);
+      }
+
+    rhs_.clear ();
+    for (unsigned r = 0; r < W_.size1 (); ++r)
+      {
+	delta_[r] =
+	  (featureObservedPos[r] - featureReferencePos[r]) * weightCache_[r];
+	for (unsigned i = 0; i < CONFIGURATION_SIZE; ++i)
+	  rhs_[i] += W_ (r, i) * delta_[r];
+      }
+  }
+
+  /// \brief Compute the residual W dq - ds for a given offset.
+  ///
+  /// \return residual norm.
+  double updateResidual (const ublas::vector<double>& offset)
+  {
+    double norm = 0.;
+    for (unsigned r = 0; r < W_.size1 (); ++r)
+      {
+	double value = -delta_[r];
+	for (unsigned i = 0; i < CONFIGURATION_SIZE; ++i)
+	  value += W_ (r, i) * offset[i];
+	residualValue_[r] = value;
+	norm += value * value;
+      }
+    return std::sqrt (norm);
+  }
+
+  /// \name Workspaces
+  /// \{
+
+  /// \brief Last values read from the input signals.
+  ublas::matrix<double> JsensorPositionCache_;
+  ublas::matrix<double> JfeatureReferencePositionCache_;
+  ublas::vector<double> weightCache_;
+  ublas::vector<double> correctedDofsCache_;
+
+  /// \brief JfeatureReferencePosition * JsensorPosition.
+  ublas::matrix<double> product_;
+
+  /// \brief Weighted Jacobian block restricted to the considered DoFs.
+  ublas::matrix<double> W_;
+
+  /// \brief W^T W and W^T ds.
+  ublas::matrix<double> normal_;
+  ublas::vector<double> rhs_;
+
+  /// \brief Weighted feature offset ds.
+  ublas::vector<double> delta_;
+
+  /// \brief Last residual W dq - ds.
+  ublas::vector<double> residualValue_;
+
+  /// \brief Weight given by the robust estimator (one if disabled).
+  double robustWeight_;
+  /// \}
 };
 
 namespace command
@@ -142,178 +387,414 @@ namespace command
 
     virtual Value doExecute ();
   };
+
+  struct AddLandmarkObservations : public Command
+  {
+    virtual ~AddLandmarkObservations ()
+    {}
+
+    explicit AddLandmarkObservations
+    (Localizer& entity, const std::string& docstring);
+
+    virtual Value doExecute ();
+  };
+
+  struct SetLandmarkVectors : public Command
+  {
+    virtual ~SetLandmarkVectors ()
+    {}
+
+    explicit SetLandmarkVectors
+    (Localizer& entity, const std::string& docstring);
+
+    virtual Value doExecute ();
+  };
+
+  struct SetLandmarkMatrices : public Command
+  {
+    virtual ~SetLandmarkMatrices ()
+    {}
+
+    explicit SetLandmarkMatrices
+    (Localizer& entity, const std::string& docstring);
+
+    virtual Value doExecute ();
+  };
+
+  struct SetRobustEstimator : public Command
+  {
+    virtual ~SetRobustEstimator ()
+    {}
+
+    explicit SetRobustEstimator
+    (Localizer& entity, const std::string& docstring);
+
+    virtual Value doExecute ();
+  };
 } // end of namespace command.
 
 
-namespace ublas = boost::numeric::ublas;
 class Localizer : public dg::Entity
 {
   DYNAMIC_GRAPH_ENTITY_DECL ();
 public:
   typedef dg::SignalTimeDependent<ml::Vector, int> signalOutVector_t;
 
+  /// \brief Weight function used to discard outliers.
+  enum RobustKernel
+    {
+      /// \brief Plain weighted least squares.
+      ROBUST_NONE,
+      /// \brief Huber weights: w = min (1, c / r).
+      ROBUST_HUBER,
+      /// \brief Tukey biweight: w = (1 - (r / c)^2)^2 if r < c, 0 otherwise.
+      ROBUST_TUKEY
+    };
+
   explicit Localizer (const std::string& name);
 
-  size_t getFinalProblemSize (int t) const
+  /// \brief Factorize the normal matrix W^T W.
+  ///
+  /// Cholesky decomposition of the (small) normal matrix. Columns
+  /// which are not constrained by any observation have a null pivot
+  /// and are discarded, the corresponding offset is zero as it would
+  /// be with a pseudo-inverse.
+  void factorize ()
   {
-    size_t acc = 0;
-    BOOST_FOREACH (const boost::shared_ptr<LandmarkObservation> obs,
-		   this->landmarkObservations_)
-      acc += obs->featureReferencePosition_ (t).size ();
-    return acc;
+    const unsigned n = LandmarkObservation::CONFIGURATION_SIZE;
+
+    double scale = 0.;
+    for (unsigned i = 0; i < n; ++i)
+      scale = std::max (scale, normal_ (i, i));
+    const double threshold = scale * 1e-12;
+
+    cholesky_.clear ();
+    for (unsigned j = 0; j < n; ++j)
+      {
+	double pivot = normal_ (j, j);
+	for (unsigned k = 0; k < j; ++k)
+	  pivot -= cholesky_ (j, k) * cholesky_ (j, k);
+
+	active_[j] = pivot > threshold;
+	if (!active_[j])
+	  continue;
+	cholesky_ (j, j) = std::sqrt (pivot);
+
+	for (unsigned i = j + 1; i < n; ++i)
+	  {
+	    double value = normal_ (i, j);
+	    for (unsigned k = 0; k < j; ++k)
+	      value -= cholesky_ (i, k) * cholesky_ (j, k);
+	    cholesky_ (i, j) = value / cholesky_ (j, j);
+	  }
+      }
   }
 
-  ublas::vector<double> computeFeatureOffset (int t)
+  /// \brief Solve (L L^T) x = rhs_ using the current factorization.
+  void solve (ml::Vector& res)
   {
-    using namespace boost::numeric::ublas;
+    const unsigned n = LandmarkObservation::CONFIGURATION_SIZE;
 
-    size_t size = getFinalProblemSize (t);
-    vector<double> featureDelta (size);
-
-    // Compute im - im0.
-    unsigned i = 0;
-    BOOST_FOREACH (const boost::shared_ptr<LandmarkObservation> obs,
-		   this->landmarkObservations_)
+    // Forward substitution.
+    for (unsigned i = 0; i < n; ++i)
       {
-	const vector<double>& featureObservedPos =
-	  obs->featureObservedPosition_ (t).accessToMotherLib ();
-	const vector<double>& featureReferencePos =
-	  obs->featureReferencePosition_ (t).accessToMotherLib ();
-	const vector<double>& weight =
-	  obs->weight_ (t).accessToMotherLib ();
-
-	range r (i, i + featureReferencePos.size ());
-	vector_range<vector<double> > vr (featureDelta, r);
-	vr = featureObservedPos - featureReferencePos;
+	if (!active_[i])
+	  {
+	    solution_[i] = 0.;
+	    continue;
+	  }
+	double value = rhs_[i];
+	for (unsigned k = 0; k < i; ++k)
+	  value -= cholesky_ (i, k) * solution_[k];
+	solution_[i] = value / cholesky_ (i, i);
+      }
 
-	// Multiply by weight.
-	for (unsigned idx = 0; idx < weight.size (); ++idx)
-	  vr[idx] *= weight[idx];
+    // Backward substitution.
+    for (int i = n - 1; i >= 0; --i)
+      {
+	if (!active_[i])
+	  {
+	    solution_[i] = 0.;
+	    continue;
+	  }
+	double value = solution_[i];
+	for (unsigned k = i + 1; k < n; ++k)
+	  value -= cholesky_ (k, i) * solution_[k];
+	solution_[i] = value / cholesky_ (i, i);
+      }
 
+    if (res.size () != n)
+      res.resize (n);
+    for (unsigned i = 0; i < n; ++i)
+      res (i) = solution_[i];
+  }
 
-	i += featureReferencePos.size ();
+  /// \brief Robust weight associated with a residual norm.
+  double robustWeight (double residual) const
+  {
+    switch (robustKernel_)
+      {
+      case ROBUST_HUBER:
+	if (residual <= robustThreshold_)
+	  return 1.;
+	return robustThreshold_ / residual;
+      case ROBUST_TUKEY:
+	if (residual >= robustThreshold_)
+	  return 0.;
+	{
+	  const double ratio = residual / robustThreshold_;
+	  return (1. - ratio * ratio) * (1. - ratio * ratio);
+	}
+      default:
+	return 1.;
       }
-    std::cout << "Feature delta:" << std::endl
-	      << featureDelta << std::endl;
-    return featureDelta;
   }
 
-  size_t
-  nbConsideredDofs (const boost::shared_ptr<LandmarkObservation> obs, int t)
+  /// \brief Sum the observations normal matrices, using their
+  ///        robust weights.
+  void assembleNormalMatrix ()
   {
-    assert (obs);
-    const ml::Vector& correctedDofs = obs->correctedDofs_ (t);
-    size_t nbDofs = 0;
-    for (size_t i = 0; i < correctedDofs.size (); ++i)
-      if (correctedDofs (i) == 1.)
-	++nbDofs;
-    return nbDofs;
+    normal_.clear ();
+    BOOST_FOREACH (const boost::shared_ptr<LandmarkObservation> obs,
+		   this->landmarkObservations_)
+      ublas::noalias (normal_) += obs->robustWeight_ * obs->normal_;
   }
 
-  ublas::matrix<double>
-  extractConsideredDofs (const boost::shared_ptr<LandmarkObservation> obs,
-			 const ublas::matrix<double>& M, int t)
+  /// \brief Sum the observations W^T ds, using their robust weights.
+  void assembleRightHandSide ()
   {
-    typedef ublas::matrix_column<ublas::matrix<double> > column_t;
-    typedef ublas::matrix_column<const ublas::matrix<double> > constColumn_t;
-
-    const ml::Vector& correctedDofs = obs->correctedDofs_ (t);
-    size_t nbDofs = nbConsideredDofs (obs, t);
-    ublas::matrix<double> res (M.size1 (), nbDofs);
-
-    if (!nbDofs)
-      return res;
-
-    // Search for first considered DoF.
-    size_t j = 0u;
-    while (j < correctedDofs.size () && correctedDofs (j) != 1.)
-      ++j;
+    rhs_.clear ();
+    BOOST_FOREACH (const boost::shared_ptr<LandmarkObservation> obs,
+		   this->landmarkObservations_)
+      ublas::noalias (rhs_) += obs->robustWeight_ * obs->rhs_;
+  }
 
-    for (size_t i = 0; i < nbDofs; ++i)
+  /// \brief Compute the configuration offset.
+  ///
+  /// Solve the weighted least squares problem min || W dq - ds ||
+  /// where ds is the weighted difference between the observed and
+  /// the reference feature positions. As W only has a few columns,
+  /// the problem is solved through the normal equations
+  /// W^T W dq = W^T ds. The factorization of W^T W is reused as long
+  /// as the Jacobians, the weights and the corrected DoFs do not
+  /// change.
+  ///
+  /// In robust mode, the problem is then solved again using
+  /// iteratively reweighted least squares: each observation is
+  /// weighted according to the norm of its residual. The number of
+  /// iterations is bounded so that the computation time stays
+  /// bounded too.
+  ml::Vector& computeConfigurationOffset (ml::Vector& res, int t)
+  {
+    bool jacobianChanged = !factorizationValid_;
+    BOOST_FOREACH (const boost::shared_ptr<LandmarkObservation> obs,
+		   this->landmarkObservations_)
       {
-	assert (correctedDofs (j));
-
-	// Fill the appropriate column.
-	column_t (res, i) = constColumn_t (M, j);
-
-	// Search for next considered DoF.
-	++j;
-	while (j < correctedDofs.size() && correctedDofs (j) != 1.)
-	  ++j;
+	jacobianChanged |= obs->updateJacobian (t);
+	obs->updateFeatureOffset (t);
+	obs->robustWeight_ = 1.;
       }
-    std::cout << "Extract (before):" << std::endl
-	      << M << std::endl
-	      << "Extract (after):" << std::endl
-	      << res << std::endl;
-    return res;
-  }
 
-  ublas::matrix<double> computeW (int t)
-  {
-    using namespace boost::numeric::ublas;
+    if (jacobianChanged)
+      {
+	assembleNormalMatrix ();
+	factorize ();
+	factorizationValid_ = true;
+      }
+    assembleRightHandSide ();
+    solve (res);
 
-    matrix<double> W (getFinalProblemSize (t), 3);
+    if (robustKernel_ != ROBUST_NONE)
+      {
+	for (unsigned iteration = 0;
+	     iteration < robustMaxIterations_; ++iteration)
+	  {
+	    BOOST_FOREACH (const boost::shared_ptr<LandmarkObservation> obs,
+			   this->landmarkObservations_)
+	      obs->robustWeight_ =
+		robustWeight (obs->updateResidual (solution_));
+
+	    previousSolution_ = solution_;
+	    assembleNormalMatrix ();
+	    factorize ();
+	    assembleRightHandSide ();
+	    solve (res);
+
+	    if (ublas::norm_inf (solution_ - previousSolution_) < 1e-9)
+	      break;
+	  }
+	// The factorization now depends on the robust weights.
+	factorizationValid_ = false;
+      }
 
-    unsigned i = 0;
     BOOST_FOREACH (const boost::shared_ptr<LandmarkObservation> obs,
 		   this->landmarkObservations_)
-      {
-	const matrix<double>& JfeatureReferencePosition =
-	  obs->JfeatureReferencePosition_ (t).accessToMotherLib ();
+      obs->updateResidual (solution_);
 
-	const matrix<double>& JsensorPosition =
-	  obs->JsensorPosition_ (t).accessToMotherLib ();
+    sot::motionPlanner::EventLog::instance ().push
+      (t, sot::motionPlanner::EVENT_LOCALIZATION, getName (),
+       "configuration offset", res);
+    return res;
+  }
 
-	const vector<double>& weight =
-	  obs->weight_ (t).accessToMotherLib ();
+  /// \brief Convert the configuration offset into an (x, y, theta)
+  /// error usable by FeetFollowerWithCorrection.
+  ///
+  /// The offset moves the planned position to the estimated one,
+  /// the error is the planned position in the estimated position
+  /// frame: its inverse. Corrected DoFs must be x, y and yaw.
+  ml::Vector& computeError (ml::Vector& res, int t)
+  {
+    const ml::Vector& offset = configurationOffset_ (t);
+    if (offset.size () != 3)
+      throw std::runtime_error ("configuration offset is not (x, y, theta)");
+    if (res.size () != 3)
+      res.resize (3);
+
+    const double c = std::cos (offset (2));
+    const double s = std::sin (offset (2));
+    res (0) = -c * offset (0) - s * offset (1);
+    res (1) = s * offset (0) - c * offset (1);
+    res (2) = -offset (2);
+    return res;
+  }
 
-	range rx (i, i + obs->featureReferencePosition_ (t).size ());
-	range ry (0, nbConsideredDofs (obs, t));
-	matrix_range<matrix<double> > mr (W, rx, ry);
+  void setRobustEstimator (RobustKernel kernel,
+			   double threshold,
+			   unsigned maxIterations)
+  {
+    if (kernel != ROBUST_NONE && threshold <= 0.)
+      throw std::runtime_error ("robust threshold must be positive");
+    robustKernel_ = kernel;
+    robustThreshold_ = threshold;
+    robustMaxIterations_ = maxIterations;
+    factorizationValid_ = false;
+  }
 
-	mr = extractConsideredDofs
-	  (obs, prod (JfeatureReferencePosition, JsensorPosition), t);
+  void addLandmarkObservation (const std::string& name)
+  {
+    LandmarkObservation* lmo = new LandmarkObservation (*this, name);
+    landmarkObservations_.push_back
+      (boost::shared_ptr<LandmarkObservation> (lmo));
+    factorizationValid_ = false;
+  }
 
-	// Multiply by weight.
-	for (unsigned idx = 0; idx < weight.size (); ++idx)
-	  matrix_row<matrix_range<matrix<double> > > (mr, idx)
-	    *= weight[idx];
+  /// \brief Add a group of landmark observations.
+  ///
+  /// Observations are named prefix0, prefix1, ..., prefix(N-1).
+  void addLandmarkObservations (const std::string& prefix, unsigned size)
+  {
+    if (landmarkGroups_.find (prefix) != landmarkGroups_.end ())
+      throw std::runtime_error ("landmark group already exists");
 
-	i += obs->featureReferencePosition_ (t).size ();
+    landmarkObservations_.reserve (landmarkObservations_.size () + size);
+    landmarkGroups_[prefix] =
+      std::make_pair (landmarkObservations_.size (), size);
+    for (unsigned i = 0; i < size; ++i)
+      {
+	std::ostringstream name;
+	name << prefix << i;
+	addLandmarkObservation (name.str ());
       }
-    std::cout << "W:" << std::endl
-	      << W << std::endl;
-    return W;
   }
 
-  ml::Vector& computeConfigurationOffset (ml::Vector& res, int t)
+  /// \brief Set a vector signal of all the observations of a group.
+  ///
+  /// Row i of the matrix is used as the value of the i-th
+  /// observation signal.
+  void setLandmarkVectors (const std::string& prefix,
+			   const std::string& signalName,
+			   const ml::Matrix& values)
   {
-    using namespace boost::numeric::ublas;
-    vector<double> featureDelta = computeFeatureOffset (t);
-    matrix<double> W = computeW (t);
-    matrix<double> Wp = W; //FIXME: pseudoinverse here.
+    const std::pair<size_t, size_t>& group = landmarkGroup (prefix);
+    if (values.nbRows () != group.second)
+      throw std::runtime_error ("one row per observation is expected");
 
-    ml::Matrix Wp_;
-    Wp_.initFromMotherLib (Wp);
-    Wp_ = Wp_.pseudoInverse (Wp_);
+    ml::Vector row (values.nbCols ());
+    for (size_t i = 0; i < group.second; ++i)
+      {
+	for (unsigned j = 0; j < values.nbCols (); ++j)
+	  row (j) = values (i, j);
+	landmarkObservations_[group.first + i]->vectorSignal
+	  (signalName).setConstant (row);
+      }
+  }
 
-    return res.initFromMotherLib
-      (prod (Wp_.accessToMotherLib (), featureDelta));
+  /// \brief Set a matrix signal of all the observations of a group.
+  ///
+  /// The matrix is the vertical concatenation of the N observation
+  /// matrices which must have the same size.
+  void setLandmarkMatrices (const std::string& prefix,
+			    const std::string& signalName,
+			    const ml::Matrix& values)
+  {
+    const std::pair<size_t, size_t>& group = landmarkGroup (prefix);
+    if (!group.second)
+      return;
+    if (values.nbRows () % group.second)
+      throw std::runtime_error
+	("the number of rows is not a multiple of the number of observations");
+
+    const unsigned nbRows = values.nbRows () / group.second;
+    ml::Matrix block (nbRows, values.nbCols ());
+    for (size_t i = 0; i < group.second; ++i)
+      {
+	for (unsigned r = 0; r < nbRows; ++r)
+	  for (unsigned c = 0; c < values.nbCols (); ++c)
+	    block (r, c) = values (i * nbRows + r, c);
+	landmarkObservations_[group.first + i]->matrixSignal
+	  (signalName).setConstant (block);
+      }
   }
 
 private:
-  friend class LandmarkObservation;
+  friend struct LandmarkObservation;
   friend class command::AddLandmarkObservation;
 
+  const std::pair<size_t, size_t>& landmarkGroup (const std::string& prefix)
+  {
+    std::map<std::string, std::pair<size_t, size_t> >::const_iterator it =
+      landmarkGroups_.find (prefix);
+    if (it == landmarkGroups_.end ())
+      throw std::runtime_error ("unknown landmark group " + prefix);
+    return it->second;
+  }
+
   /// Commands
   /// - add_landmark_observation(name)
+  /// - add_landmark_observations(prefix, size)
+  /// - set_landmark_vectors(prefix, signal, values)
+  /// - set_landmark_matrices(prefix, signal, values)
+  /// - set_robust_estimator(kernel, threshold, iterations)
 
   /// \name Output signals
   /// \{
   signalOutVector_t configurationOffset_;
+  signalOutVector_t error_;
   /// \}
 
   std::vector<boost::shared_ptr<LandmarkObservation> > landmarkObservations_;
+
+  /// \brief Landmark groups: prefix -> (first observation, size).
+  std::map<std::string, std::pair<size_t, size_t> > landmarkGroups_;
+
+  /// \name Least squares workspaces
+  /// \{
+  ublas::matrix<double> normal_;
+  ublas::matrix<double> cholesky_;
+  ublas::vector<double> rhs_;
+  ublas::vector<double> solution_;
+  ublas::vector<double> previousSolution_;
+  bool active_[LandmarkObservation::CONFIGURATION_SIZE];
+  bool factorizationValid_;
+  /// \}
+
+  /// \name Robust estimation parameters
+  /// \{
+  RobustKernel robustKernel_;
+  double robustThreshold_;
+  unsigned robustMaxIterations_;
+  /// \}
 };
 
 DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN(Localizer, "Localizer");
@@ -321,7 +802,8 @@ DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN(Localizer, "Localizer");
 
 LandmarkObservation::LandmarkObservation (Localizer& localizer,
 					  const std::string& signalNamePrefix)
-  : JsensorPosition_
+  : localizer_ (localizer),
+    JsensorPosition_
     (dg::nullptr,
      MAKE_SIGNAL_STRING
      (localizer.getName (), true, "Matrix", signalNamePrefix + "_JsensorPosition")),
@@ -344,7 +826,23 @@ LandmarkObservation::LandmarkObservation (Localizer& localizer,
     correctedDofs_
     (dg::nullptr,
      MAKE_SIGNAL_STRING
-     (localizer.getName (), true, "Vector", signalNamePrefix + "_correctedDofs"))
+     (localizer.getName (), true, "Vector", signalNamePrefix + "_correctedDofs")),
+    residual_
+    (boost::bind (&LandmarkObservation::computeResidual, this, _1, _2),
+     localizer.configurationOffset_,
+     MAKE_SIGNAL_STRING
+     (localizer.getName (), false, "Vector", signalNamePrefix + "_residual")),
+    JsensorPositionCache_ (),
+    JfeatureReferencePositionCache_ (),
+    weightCache_ (),
+    correctedDofsCache_ (),
+    product_ (),
+    W_ (),
+    normal_ (CONFIGURATION_SIZE, CONFIGURATION_SIZE),
+    rhs_ (CONFIGURATION_SIZE),
+    delta_ (),
+    residualValue_ (),
+    robustWeight_ (1.)
 {
   localizer.configurationOffset_.addDependency(JsensorPosition_);
   localizer.configurationOffset_.addDependency(featureReferencePosition_);
@@ -359,7 +857,19 @@ LandmarkObservation::LandmarkObservation (Localizer& localizer,
 				<< JfeatureReferencePosition_
 				<< featureObservedPosition_
 				<< weight_
-				<< correctedDofs_);
+				<< correctedDofs_
+				<< residual_);
+}
+
+ml::Vector&
+LandmarkObservation::computeResidual (ml::Vector& res, int t)
+{
+  localizer_.configurationOffset_ (t);
+  if (res.size () != residualValue_.size ())
+    res.resize (residualValue_.size ());
+  for (unsigned i = 0; i < residualValue_.size (); ++i)
+    res (i) = residualValue_[i];
+  return res;
 }
 
 Localizer::Localizer (const std::string& name)
@@ -368,9 +878,27 @@ Localizer::Localizer (const std::string& name)
     (boost::bind (&Localizer::computeConfigurationOffset, this, _1, _2),
      dg::sotNOSIGNAL,
      MAKE_SIGNAL_STRING (name, false, "Vector", "configurationOffset")),
-    landmarkObservations_ ()
+    error_
+    (boost::bind (&Localizer::computeError, this, _1, _2),
+     configurationOffset_,
+     MAKE_SIGNAL_STRING (name, false, "Vector", "error")),
+    landmarkObservations_ (),
+    landmarkGroups_ (),
+    normal_ (LandmarkObservation::CONFIGURATION_SIZE,
+	     LandmarkObservation::CONFIGURATION_SIZE),
+    cholesky_ (LandmarkObservation::CONFIGURATION_SIZE,
+	       LandmarkObservation::CONFIGURATION_SIZE),
+    rhs_ (LandmarkObservation::CONFIGURATION_SIZE),
+    solution_ (LandmarkObservation::CONFIGURATION_SIZE),
+    previousSolution_ (LandmarkObservation::CONFIGURATION_SIZE),
+    factorizationValid_ (false),
+    robustKernel_ (ROBUST_NONE),
+    robustThreshold_ (1.),
+    robustMaxIterations_ (5)
 {
-  signalRegistration (configurationOffset_);
+  std::fill (active_, active_ + LandmarkObservation::CONFIGURATION_SIZE,
+	     false);
+  signalRegistration (configurationOffset_ << error_);
 
   std::string docstring = "    \n"
     "    Add a landmark observation to the localizer.\n"
@@ -388,6 +916,70 @@ Localizer::Localizer (const std::string& name)
   addCommand
     ("add_landmark_observation",
      new command::AddLandmarkObservation (*this, docstring));
+
+  docstring = "    \n"
+    "    Add a group of landmark observations to the localizer.\n"
+    "    \n"
+    "    Observations are named by appending their index to the\n"
+    "    prefix (prefix0, prefix1, ...). Their signals can then be\n"
+    "    set all at once using set_landmark_vectors and\n"
+    "    set_landmark_matrices.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: group prefix,\n"
+    "        - an integer: number of observations.\n"
+    "      Return:\n"
+    "        - nothing\n";
+  addCommand
+    ("add_landmark_observations",
+     new command::AddLandmarkObservations (*this, docstring));
+
+  docstring = "    \n"
+    "    Set a vector signal of all the observations of a group.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: group prefix,\n"
+    "        - a string: signal name (featureReferencePosition,\n"
+    "          featureObservedPosition, weight or correctedDofs),\n"
+    "        - a matrix: one row per observation.\n"
+    "      Return:\n"
+    "        - nothing\n";
+  addCommand
+    ("set_landmark_vectors",
+     new command::SetLandmarkVectors (*this, docstring));
+
+  docstring = "    \n"
+    "    Set a matrix signal of all the observations of a group.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: group prefix,\n"
+    "        - a string: signal name (JsensorPosition or\n"
+    "          JfeatureReferencePosition),\n"
+    "        - a matrix: vertical concatenation of the observation\n"
+    "          matrices.\n"
+    "      Return:\n"
+    "        - nothing\n";
+  addCommand
+    ("set_landmark_matrices",
+     new command::SetLandmarkMatrices (*this, docstring));
+
+  docstring = "    \n"
+    "    Configure outliers rejection.\n"
+    "    \n"
+    "    When enabled, the configuration offset is computed by\n"
+    "    iteratively reweighted least squares: observations whose\n"
+    "    residual norm exceeds the threshold are down-weighted\n"
+    "    (huber) or discarded (tukey).\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: kernel (none, huber or tukey),\n"
+    "        - a double: residual threshold,\n"
+    "        - an integer: maximum number of iterations.\n"
+    "      Return:\n"
+    "        - nothing\n";
+  addCommand
+    ("set_robust_estimator",
+     new command::SetRobustEstimator (*this, docstring));
 }
 
 namespace command
@@ -403,10 +995,97 @@ namespace command
     const std::vector<Value>& values = getParameterValues();
     const std::string& landmarkName = values[0].value();
 
-    LandmarkObservation* lmo =
-      new LandmarkObservation (localizer, landmarkName);
-    localizer.landmarkObservations_.push_back
-      (boost::shared_ptr<LandmarkObservation> (lmo));
+    localizer.addLandmarkObservation (landmarkName);
+    return Value ();
+  }
+
+  AddLandmarkObservations::AddLandmarkObservations
+  (Localizer& entity, const std::string& docstring)
+    : Command (entity,
+	       boost::assign::list_of (Value::STRING) (Value::INT),
+	       docstring)
+  {}
+
+  Value AddLandmarkObservations::doExecute ()
+  {
+    Localizer& localizer = static_cast<Localizer&> (owner ());
+    const std::vector<Value>& values = getParameterValues();
+    const std::string& prefix = values[0].value();
+    int size = values[1].value();
+
+    if (size < 0)
+      throw std::runtime_error ("invalid number of observations");
+    localizer.addLandmarkObservations (prefix, size);
+    return Value ();
+  }
+
+  SetLandmarkVectors::SetLandmarkVectors
+  (Localizer& entity, const std::string& docstring)
+    : Command (entity,
+	       boost::assign::list_of
+	       (Value::STRING) (Value::STRING) (Value::MATRIX),
+	       docstring)
+  {}
+
+  Value SetLandmarkVectors::doExecute ()
+  {
+    Localizer& localizer = static_cast<Localizer&> (owner ());
+    const std::vector<Value>& values = getParameterValues();
+    const std::string& prefix = values[0].value();
+    const std::string& signalName = values[1].value();
+    ml::Matrix matrix = values[2].value();
+
+    localizer.setLandmarkVectors (prefix, signalName, matrix);
+    return Value ();
+  }
+
+  SetLandmarkMatrices::SetLandmarkMatrices
+  (Localizer& entity, const std::string& docstring)
+    : Command (entity,
+	       boost::assign::list_of
+	       (Value::STRING) (Value::STRING) (Value::MATRIX),
+	       docstring)
+  {}
+
+  Value SetLandmarkMatrices::doExecute ()
+  {
+    Localizer& localizer = static_cast<Localizer&> (owner ());
+    const std::vector<Value>& values = getParameterValues();
+    const std::string& prefix = values[0].value();
+    const std::string& signalName = values[1].value();
+    ml::Matrix matrix = values[2].value();
+
+    localizer.setLandmarkMatrices (prefix, signalName, matrix);
+    return Value ();
+  }
+
+  SetRobustEstimator::SetRobustEstimator
+  (Localizer& entity, const std::string& docstring)
+    : Command (entity,
+	       boost::assign::list_of
+	       (Value::STRING) (Value::DOUBLE) (Value::INT),
+	       docstring)
+  {}
+
+  Value SetRobustEstimator::doExecute ()
+  {
+    Localizer& localizer = static_cast<Localizer&> (owner ());
+    const std::vector<Value>& values = getParameterValues();
+    const std::string& kernelName = values[0].value();
+    double threshold = values[1].value();
+    int maxIterations = values[2].value();
+
+    Localizer::RobustKernel kernel = Localizer::ROBUST_NONE;
+    if (kernelName == "huber")
+      kernel = Localizer::ROBUST_HUBER;
+    else if (kernelName == "tukey")
+      kernel = Localizer::ROBUST_TUKEY;
+    else if (kernelName != "none")
+      throw std::runtime_error ("invalid robust kernel " + kernelName);
+
+    if (maxIterations < 0)
+      throw std::runtime_error ("invalid number of iterations");
+    localizer.setRobustEstimator (kernel, threshold, maxIterations);
     return Value ();
   }
 } // end of namespace command.
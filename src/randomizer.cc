@@ -14,91 +14,376 @@
 // received a copy of the GNU Lesser General Public License along with
 // sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
 
+#include <stdexcept>
+
 #include <boost/assign/list_of.hpp>
+#include <boost/bind.hpp>
 #include <boost/make_shared.hpp>
-#include <boost/random/uniform_real.hpp>
-#include <boost/random/normal_distribution.hpp>
-#include <boost/random/variate_generator.hpp>
 
 #include "common.hh"
 #include "randomizer.hh"
 
+namespace command
+{
+  namespace randomizer
+  {
+    AddSignal::AddSignal (Randomizer& entity, const std::string& docstring)
+      : Command (entity,
+		 boost::assign::list_of (Value::STRING) (Value::UNSIGNED),
+		 docstring)
+    {}
+
+    Value
+    AddSignal::doExecute ()
+    {
+      Randomizer& entity = static_cast<Randomizer&> (owner ());
+      const std::vector<Value>& values = getParameterValues ();
+      std::string name = values[0].value ();
+      unsigned size = values[1].value ();
+      entity.addSignal (name, size);
+      return Value ();
+    }
+
+    SetSeed::SetSeed (Randomizer& entity, const std::string& docstring)
+      : Command (entity,
+		 boost::assign::list_of (Value::STRING) (Value::UNSIGNED),
+		 docstring)
+    {}
+
+    Value
+    SetSeed::doExecute ()
+    {
+      Randomizer& entity = static_cast<Randomizer&> (owner ());
+      const std::vector<Value>& values = getParameterValues ();
+      std::string name = values[0].value ();
+      unsigned seed = values[1].value ();
+      entity.setSeed (name, seed);
+      return Value ();
+    }
+
+    SetGaussian::SetGaussian (Randomizer& entity,
+			      const std::string& docstring)
+      : Command (entity,
+		 boost::assign::list_of
+		 (Value::STRING) (Value::DOUBLE) (Value::DOUBLE),
+		 docstring)
+    {}
+
+    Value
+    SetGaussian::doExecute ()
+    {
+      Randomizer& entity = static_cast<Randomizer&> (owner ());
+      const std::vector<Value>& values = getParameterValues ();
+      std::string name = values[0].value ();
+      double mean = values[1].value ();
+      double stddev = values[2].value ();
+      entity.setGaussian (name, mean, stddev);
+      return Value ();
+    }
+
+    SetBias::SetBias (Randomizer& entity, const std::string& docstring)
+      : Command (entity,
+		 boost::assign::list_of (Value::STRING) (Value::VECTOR),
+		 docstring)
+    {}
+
+    Value
+    SetBias::doExecute ()
+    {
+      Randomizer& entity = static_cast<Randomizer&> (owner ());
+      const std::vector<Value>& values = getParameterValues ();
+      std::string name = values[0].value ();
+      ml::Vector bias = values[1].value ();
+      entity.setBias (name, bias);
+      return Value ();
+    }
+
+    SetRandomWalk::SetRandomWalk (Randomizer& entity,
+				  const std::string& docstring)
+      : Command (entity,
+		 boost::assign::list_of (Value::STRING) (Value::DOUBLE),
+		 docstring)
+    {}
+
+    Value
+    SetRandomWalk::doExecute ()
+    {
+      Randomizer& entity = static_cast<Randomizer&> (owner ());
+      const std::vector<Value>& values = getParameterValues ();
+      std::string name = values[0].value ();
+      double stddev = values[1].value ();
+      entity.setRandomWalk (name, stddev);
+      return Value ();
+    }
+
+    SetUniform::SetUniform (Randomizer& entity, const std::string& docstring)
+      : Command (entity,
+		 boost::assign::list_of (Value::STRING) (Value::DOUBLE),
+		 docstring)
+    {}
+
+    Value
+    SetUniform::doExecute ()
+    {
+      Randomizer& entity = static_cast<Randomizer&> (owner ());
+      const std::vector<Value>& values = getParameterValues ();
+      std::string name = values[0].value ();
+      double halfWidth = values[1].value ();
+      entity.setUniform (name, halfWidth);
+      return Value ();
+    }
+
+    SetDropout::SetDropout (Randomizer& entity, const std::string& docstring)
+      : Command (entity,
+		 boost::assign::list_of (Value::STRING) (Value::DOUBLE),
+		 docstring)
+    {}
+
+    Value
+    SetDropout::doExecute ()
+    {
+      Randomizer& entity = static_cast<Randomizer&> (owner ());
+      const std::vector<Value>& values = getParameterValues ();
+      std::string name = values[0].value ();
+      double probability = values[1].value ();
+      entity.setDropout (name, probability);
+      return Value ();
+    }
+  } // end of namespace randomizer.
+} // end of namespace command.
+
+Randomizer::Noise::Noise (const std::string& name, unsigned size)
+  : name (name),
+    signal (),
+    engine (),
+    normal (engine, boost::normal_distribution<> (0., 1.)),
+    uniform (engine, boost::uniform_real<> (0., 1.)),
+    mean (0.),
+    stddev (1.),
+    bias (size),
+    walkStddev (0.),
+    uniformHalfWidth (0.),
+    dropout (0.),
+    walk (size),
+    value (size),
+    lastTime (0),
+    generated (false)
+{
+  bias.setZero ();
+  walk.setZero ();
+  value.setZero ();
+}
+
 Randomizer::Randomizer (const std::string& name)
   : dg::Entity (name),
-    signals_ (),
-    gen_ ()
+    noises_ ()
 {
   std::string docstring;
+
+  docstring =
+    "    \n"
+    "    Add a random signal\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: signal name,\n"
+    "        - an unsigned integer: signal size.\n"
+    "    \n";
   addCommand ("addSignal",
-	      new command::AddSignal (*this, docstring));
+	      new command::randomizer::AddSignal (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Seed the generator of a signal\n"
+    "    \n"
+    "      The random walk and the last value are reset.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: signal name,\n"
+    "        - an unsigned integer: seed.\n"
+    "    \n";
+  addCommand ("setSeed",
+	      new command::randomizer::SetSeed (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the Gaussian noise of a signal\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: signal name,\n"
+    "        - a double: mean,\n"
+    "        - a double: standard deviation.\n"
+    "    \n";
+  addCommand ("setGaussian",
+	      new command::randomizer::SetGaussian (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the constant bias of a signal\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: signal name,\n"
+    "        - a vector: bias.\n"
+    "    \n";
+  addCommand ("setBias",
+	      new command::randomizer::SetBias (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the random walk of a signal\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: signal name,\n"
+    "        - a double: standard deviation of the increments.\n"
+    "    \n";
+  addCommand ("setRandomWalk",
+	      new command::randomizer::SetRandomWalk (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the uniform noise of a signal\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: signal name,\n"
+    "        - a double: half width of the interval.\n"
+    "    \n";
+  addCommand ("setUniform",
+	      new command::randomizer::SetUniform (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the dropout probability of a signal\n"
+    "    \n"
+    "      Dropped samples are replaced by the previous value.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: signal name,\n"
+    "        - a double: probability in [0, 1].\n"
+    "    \n";
+  addCommand ("setDropout",
+	      new command::randomizer::SetDropout (*this, docstring));
 }
 
 Randomizer::~Randomizer ()
 {}
 
+Randomizer::Noise&
+Randomizer::noise (const std::string& name)
+{
+  for (unsigned i = 0; i < noises_.size (); ++i)
+    if (noises_[i]->name == name)
+      return *noises_[i];
+  throw std::runtime_error ("unknown signal " + name);
+}
+
 void
 Randomizer::addSignal (const std::string& name, unsigned size)
 {
-  if (signals_.find (name) != signals_.end ())
-    throw std::runtime_error ("signal already exists");
+  for (unsigned i = 0; i < noises_.size (); ++i)
+    if (noises_[i]->name == name)
+      throw std::runtime_error ("signal already exists");
 
-  signalVector_t* ptr = 0;
-  try
-    {
-      ptr = new signalVector_t
-	(boost::bind (&Randomizer::computeSignal, this, _1, _2, name),
-	 dg::sotNOSIGNAL,
-	 MAKE_SIGNAL_STRING (name, false, "Vector", name));
-    }
-  catch (...)
-    {
-      delete ptr;
-      throw;
-    }
+  const unsigned index = noises_.size ();
+  boost::shared_ptr<Noise> noise = boost::make_shared<Noise> (name, size);
+  noise->signal.reset
+    (new signalVector_t
+     (boost::bind (&Randomizer::computeSignal, this, _1, _2, index),
+      dg::sotNOSIGNAL,
+      MAKE_SIGNAL_STRING (getName (), false, "Vector", name)));
+  noise->signal->setNeedUpdateFromAllChildren (true);
+  noises_.push_back (noise);
+  signalRegistration (*noise->signal);
+}
 
-  signals_[name] =
-    std::make_pair (boost::shared_ptr<signalVector_t> (ptr), size);
+void
+Randomizer::setSeed (const std::string& name, unsigned seed)
+{
+  Noise& n = noise (name);
+  n.engine.seed (seed);
+  n.normal.distribution ().reset ();
+  n.walk.setZero ();
+  n.value.setZero ();
+  n.generated = false;
+}
 
-  signals_[name].first->setNeedUpdateFromAllChildren (true);
-  signalRegistration (*signals_[name].first);
+void
+Randomizer::setGaussian (const std::string& name, double mean, double stddev)
+{
+  if (stddev < 0.)
+    throw std::runtime_error ("standard deviation must be positive");
+  Noise& n = noise (name);
+  n.mean = mean;
+  n.stddev = stddev;
 }
 
-// FIXME:
-// For now, the distribution, generators and seeds are hard-coded
-// but it each signal should have its specific setup.
-ml::Vector&
-Randomizer::computeSignal (ml::Vector& res, int, const std::string& name)
+void
+Randomizer::setBias (const std::string& name, const ml::Vector& bias)
 {
-  static const double mean = 0.;
-  static const double standard_deviation = 1.;
-  boost::normal_distribution<> dist (mean, standard_deviation);
+  Noise& n = noise (name);
+  if (bias.size () != n.bias.size ())
+    throw std::runtime_error ("invalid bias size");
+  n.bias = bias;
+}
 
-  boost::variate_generator<boost::mt19937&, boost::normal_distribution<> >
-    die (gen_, dist);
+void
+Randomizer::setRandomWalk (const std::string& name, double stddev)
+{
+  if (stddev < 0.)
+    throw std::runtime_error ("standard deviation must be positive");
+  noise (name).walkStddev = stddev;
+}
 
-  res.resize (signals_[name].second);
-  for (unsigned i = 0; i < res.size (); ++i)
-    res (i) =  die ();
-  return res;
+void
+Randomizer::setUniform (const std::string& name, double halfWidth)
+{
+  if (halfWidth < 0.)
+    throw std::runtime_error ("half width must be positive");
+  noise (name).uniformHalfWidth = halfWidth;
 }
 
-DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (Randomizer, "Randomizer");
+void
+Randomizer::setDropout (const std::string& name, double probability)
+{
+  if (probability < 0. || probability > 1.)
+    throw std::runtime_error ("probability must be in [0, 1]");
+  noise (name).dropout = probability;
+}
 
-namespace command
+ml::Vector&
+Randomizer::computeSignal (ml::Vector& res, int t, unsigned index)
 {
-  AddSignal::AddSignal (Randomizer& entity, const std::string& docstring)
-    : Command (entity,
-	       boost::assign::list_of(Value::STRING) (Value::UNSIGNED),
-	       docstring)
-  {}
+  Noise& n = *noises_[index];
 
-  Value AddSignal::doExecute ()
-  {
-    Randomizer& entity = static_cast<Randomizer&> (owner ());
-    const std::vector<Value>& values = getParameterValues ();
-    std::string name = values[0].value ();
-    unsigned size = values[1].value ();
-    entity.addSignal (name, size);
-    return Value ();
-  }
-} // end of namespace command.
+  // Generate one sample per iteration.
+  if (!n.generated || t != n.lastTime)
+    {
+      const bool dropped =
+	n.generated && n.dropout > 0. && n.uniform () < n.dropout;
+      n.generated = true;
+      n.lastTime = t;
+
+      const unsigned size = n.value.size ();
+      for (unsigned i = 0; i < size; ++i)
+	{
+	  if (n.walkStddev > 0.)
+	    n.walk (i) += n.walkStddev * n.normal ();
+	  if (dropped)
+	    continue;
+
+	  double v = n.bias (i) + n.walk (i);
+	  if (n.stddev > 0.)
+	    v += n.mean + n.stddev * n.normal ();
+	  else
+	    v += n.mean;
+	  if (n.uniformHalfWidth > 0.)
+	    v += n.uniformHalfWidth * (2. * n.uniform () - 1.);
+	  n.value (i) = v;
+	}
+    }
+
+  if (res.size () != n.value.size ())
+    res.resize (n.value.size ());
+  res = n.value;
+  return res;
+}
+
+DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (Randomizer, "Randomizer");
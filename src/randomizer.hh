@@ -17,10 +17,14 @@
 #ifndef SOT_MOTION_PLANNER_RANDOMIZER_HH
 # define SOT_MOTION_PLANNER_RANDOMIZER_HH
 # include <string>
-# include <utility>
+# include <vector>
 
+# include <boost/noncopyable.hpp>
 # include <boost/shared_ptr.hpp>
 # include <boost/random/mersenne_twister.hpp>
+# include <boost/random/normal_distribution.hpp>
+# include <boost/random/uniform_real.hpp>
+# include <boost/random/variate_generator.hpp>
 
 # include <jrl/mal/boost.hh>
 
@@ -32,49 +36,152 @@
 # include <dynamic-graph/signal-time-dependent.h>
 
 # include "common.hh"
-# include "discretized-trajectory.hh"
-# include "feet-follower.hh"
 
 namespace ml = ::maal::boost;
 namespace dg = ::dynamicgraph;
 
-namespace sot
-{
-  using namespace ::dynamicgraph::sot;
-}
+class Randomizer;
 
+namespace command
+{
+  namespace randomizer
+  {
+    using ::dynamicgraph::command::Command;
+    using ::dynamicgraph::command::Value;
+
+    class AddSignal : public Command
+    {
+    public:
+      AddSignal (Randomizer& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class SetSeed : public Command
+    {
+    public:
+      SetSeed (Randomizer& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class SetGaussian : public Command
+    {
+    public:
+      SetGaussian (Randomizer& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class SetBias : public Command
+    {
+    public:
+      SetBias (Randomizer& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class SetRandomWalk : public Command
+    {
+    public:
+      SetRandomWalk (Randomizer& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class SetUniform : public Command
+    {
+    public:
+      SetUniform (Randomizer& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class SetDropout : public Command
+    {
+    public:
+      SetDropout (Randomizer& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+  } // end of namespace randomizer.
+} // end of namespace command.
 
+/// \brief Generate random vector signals.
+///
+/// Each signal owns its random generator, seeded explicitly by
+/// setSeed, and its noise model. At each iteration, each element of
+/// the signal is the sum of:
+/// - a Gaussian noise N(mean, stddev), N(0, 1) by default,
+/// - a constant bias, zero by default,
+/// - a random walk whose increments follow N(0, walkStddev), disabled
+///   by default,
+/// - a uniform noise drawn in [-halfWidth, halfWidth], disabled by
+///   default.
+///
+/// With the dropout probability, a sample is dropped and the previous
+/// value is kept instead.
+///
+/// For a given seed, the generated values only depend on the number
+/// of iterations, making Monte-Carlo runs reproducible. Samples are
+/// computed without allocating memory.
 class Randomizer : public dg::Entity
 {
   DYNAMIC_GRAPH_ENTITY_DECL ();
 public:
   typedef dg::SignalTimeDependent<ml::Vector, int> signalVector_t;
 
+  struct Noise : private boost::noncopyable
+  {
+    typedef boost::variate_generator<boost::mt19937&,
+				     boost::normal_distribution<> >
+    normalGenerator_t;
+    typedef boost::variate_generator<boost::mt19937&,
+				     boost::uniform_real<> >
+    uniformGenerator_t;
+
+    Noise (const std::string& name, unsigned size);
+
+    std::string name;
+    boost::shared_ptr<signalVector_t> signal;
+
+    boost::mt19937 engine;
+    /// \brief N(0, 1) generator.
+    normalGenerator_t normal;
+    /// \brief U(0, 1) generator.
+    uniformGenerator_t uniform;
+
+    /// \name Noise model.
+    /// \{
+    double mean;
+    double stddev;
+    ml::Vector bias;
+    double walkStddev;
+    double uniformHalfWidth;
+    double dropout;
+    /// \}
+
+    /// \brief Random walk state.
+    ml::Vector walk;
+    /// \brief Last generated value.
+    ml::Vector value;
+    /// \brief Iteration of the last generated value.
+    int lastTime;
+    bool generated;
+  };
+
   explicit Randomizer (const std::string& name);
   virtual ~Randomizer ();
 
   void addSignal (const std::string& name, unsigned size);
 
-  ml::Vector& computeSignal (ml::Vector& res, int, const std::string& name);
-
-protected:
-  std::map<std::string, std::pair<boost::shared_ptr<signalVector_t>, unsigned> >
-  signals_;
-  boost::mt19937 gen_;
-};
+  /// \brief Seed the generator of a signal and reset its state.
+  void setSeed (const std::string& name, unsigned seed);
+  void setGaussian (const std::string& name, double mean, double stddev);
+  void setBias (const std::string& name, const ml::Vector& bias);
+  void setRandomWalk (const std::string& name, double stddev);
+  void setUniform (const std::string& name, double halfWidth);
+  void setDropout (const std::string& name, double probability);
 
-namespace command
-{
-  using ::dynamicgraph::command::Command;
-  using ::dynamicgraph::command::Value;
+  ml::Vector& computeSignal (ml::Vector& res, int t, unsigned index);
 
-  class AddSignal : public Command
-  {
-  public:
-    AddSignal (Randomizer& entity, const std::string& docstring);
-    virtual Value doExecute ();
-  };
-} // end of namespace command.
+protected:
+  Noise& noise (const std::string& name);
 
+  std::vector<boost::shared_ptr<Noise> > noises_;
+};
 
 #endif //! SOT_MOTION_PLANNER_RANDOMIZER_HH
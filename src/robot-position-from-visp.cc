@@ -30,14 +30,39 @@
 #include "robot-position-from-visp.hh"
 #include "time.hh"
 
+namespace
+{
+  /// \brief Inverse of a rigid transformation, i.e. (R^T, -R^T p).
+  void rigidInverse (const sot::MatrixHomogeneous& m,
+		     sot::MatrixHomogeneous& res)
+  {
+    for (unsigned i = 0; i < 3; ++i)
+      {
+	res (i, 3) = 0.;
+	for (unsigned j = 0; j < 3; ++j)
+	  res (i, j) = m (j, i);
+	for (unsigned j = 0; j < 3; ++j)
+	  res (i, 3) -= m (j, i) * m (j, 3);
+      }
+    res (3, 0) = res (3, 1) = res (3, 2) = 0.;
+    res (3, 3) = 1.;
+  }
+} // end of anonymous namespace.
+
 RobotPositionFromVisp::RobotPositionFromVisp (const std::string& name)
   : dg::Entity (name),
     cMc_ (),
+    cMcInverse_ (),
+    debug_ (true),
+    lastUpdate_ (-1),
     position_ (3),
     positionTimestamp_ (3),
     dbgcMo_ (),
     dbgPosition_ (),
     dbgrMc_ (),
+    inverse_ (),
+    product_ (),
+    product2_ (),
 
     cMoIn_
     (dg::nullptr,
@@ -93,30 +118,82 @@ RobotPositionFromVisp::RobotPositionFromVisp (const std::string& name)
   addCommand ("setSensorTransformation",
 	      new dg::command::Setter<RobotPositionFromVisp, ml::Matrix>
 	      (*this, &RobotPositionFromVisp::sensorTransformation, docstring));
+
+  docstring =
+    "    \n"
+    "    Enable or disable the debug outputs\n"
+    "    \n"
+    "      Input:\n"
+    "        - a boolean: if false, the dbg* signals are not computed.\n"
+    "    \n";
+  addCommand ("setDebug",
+	      new dg::command::Setter<RobotPositionFromVisp, bool>
+	      (*this, &RobotPositionFromVisp::setDebug, docstring));
 }
 
 RobotPositionFromVisp::~RobotPositionFromVisp ()
 {}
 
+void
+RobotPositionFromVisp::sensorTransformation (const ml::Matrix& cMc)
+{
+  cMc_ = cMc;
+  rigidInverse (cMc_, cMcInverse_);
+  lastUpdate_ = -1;
+}
 
+void
+RobotPositionFromVisp::setDebug (const bool& debug)
+{
+  debug_ = debug;
+  dbgcMo_.setIdentity ();
+  dbgPosition_.setIdentity ();
+  dbgrMc_.setIdentity ();
+  lastUpdate_ = -1;
+}
 
 void
 RobotPositionFromVisp::update (int t)
 {
+  // Position and timestamp are both read by the error estimator.
+  if (t == lastUpdate_)
+    return;
+  lastUpdate_ = t;
+
   const sot::MatrixHomogeneous& cMo = cMoIn_ (t);
-  sot::MatrixHomogeneous wMo = plannedObjectPositionIn_ (t);
+  const sot::MatrixHomogeneous& wMo = plannedObjectPositionIn_ (t);
 
   const sot::MatrixHomogeneous& wMc = wMcIn_ (t);
   const sot::MatrixHomogeneous& wMr = wMrIn_ (t);
 
-  dbgrMc_ = wMr.inverse () * wMc;
-
-  dbgcMo_ = cMc_ * cMo * cMc_.inverse ();
-
-  // wMrobot = wMo * oMc * cMrobot = wMo * cMo^{-1} * robotMc^{-1}
-  dbgPosition_ = wMo * dbgcMo_.inverse () * dbgrMc_.inverse ();
-
-  position_ = MatrixHomogeneousToXYTheta (dbgPosition_);
+  if (debug_)
+    {
+      rigidInverse (wMr, inverse_);
+      inverse_.multiply (wMc, dbgrMc_);
+
+      cMc_.multiply (cMo, product_);
+      product_.multiply (cMcInverse_, dbgcMo_);
+
+      // wMrobot = wMo * oMc * cMrobot = wMo * cMo^{-1} * robotMc^{-1}
+      rigidInverse (dbgcMo_, inverse_);
+      wMo.multiply (inverse_, product_);
+      rigidInverse (dbgrMc_, inverse_);
+      product_.multiply (inverse_, dbgPosition_);
+    }
+  else
+    {
+      // wMrobot = wMo * (cMc * cMo * cMc^{-1})^{-1} * (wMr^{-1} wMc)^{-1}
+      //         = wMo * cMc * cMo^{-1} * cMc^{-1} * wMc^{-1} * wMr
+      wMo.multiply (cMc_, product_);
+      rigidInverse (cMo, inverse_);
+      product_.multiply (inverse_, product2_);
+      product2_.multiply (cMcInverse_, product_);
+      rigidInverse (wMc, inverse_);
+      product_.multiply (inverse_, product2_);
+      product2_.multiply (wMr, product_);
+    }
+
+  position_ = MatrixHomogeneousToXYTheta (debug_ ? dbgPosition_ : product_);
   positionTimestamp_ = cMoTimestampIn_ (t);
 }
 
@@ -50,7 +50,7 @@ public:
   /// \}
 
 protected:
-  /// \brief Update position and timestamp.
+  /// \brief Update position and timestamp, once per iteration.
   void update (int t);
 
   /// \brief Update the position signal.
@@ -72,20 +72,35 @@ protected:
   /// transformation can be used to fix the frame orientation.
   ///
   /// This is necessary when using the VpMbtEdgeTracker.
-  void sensorTransformation (const ml::Matrix& cMc)
-  {
-    cMc_ = cMc;
-  }
+  void sensorTransformation (const ml::Matrix& cMc);
+
+  /// \brief Enable or disable the debug (dbg*) outputs.
+  ///
+  /// When disabled, the position is computed directly and the debug
+  /// outputs are the identity.
+  void setDebug (const bool& debug);
 
 
 private:
   sot::MatrixHomogeneous cMc_;
+  /// \brief Inverse of the sensor transformation.
+  sot::MatrixHomogeneous cMcInverse_;
+  bool debug_;
+  /// \brief Time of the last update, -1 if none.
+  int lastUpdate_;
   ml::Vector position_;
   ml::Vector positionTimestamp_;
   sot::MatrixHomogeneous dbgcMo_;
   sot::MatrixHomogeneous dbgPosition_;
   sot::MatrixHomogeneous dbgrMc_;
 
+  /// \name Workspaces
+  /// \{
+  sot::MatrixHomogeneous inverse_;
+  sot::MatrixHomogeneous product_;
+  sot::MatrixHomogeneous product2_;
+  /// \}
+
   /// \brief Object position in camera frame (tracking data).
   signalMatrixHomoIn_t cMoIn_;
   /// \brief  Tracking data timestamp.
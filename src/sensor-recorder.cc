@@ -0,0 +1,388 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <algorithm>
+#include <fstream>
+#include <iomanip>
+#include <limits>
+#include <stdexcept>
+
+#include <boost/assign/list_of.hpp>
+#include <boost/bind.hpp>
+
+#include <dynamic-graph/command-setter.h>
+
+#include "sensor-recorder.hh"
+#include "time.hh"
+
+namespace command
+{
+  namespace sensorRecorder
+  {
+    Add::Add (SensorRecorder& entity, const std::string& docstring)
+      : Command
+	(entity,
+	 boost::assign::list_of (Value::STRING) (Value::STRING),
+	 docstring)
+    {}
+
+    Value
+    Add::doExecute ()
+    {
+      SensorRecorder& entity = static_cast<SensorRecorder&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      std::string type = values[0].value ();
+      std::string name = values[1].value ();
+      entity.add (type, name);
+      return Value ();
+    }
+
+    Start::Start (SensorRecorder& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    Start::doExecute ()
+    {
+      SensorRecorder& entity = static_cast<SensorRecorder&> (owner ());
+      entity.start ();
+      return Value ();
+    }
+
+    Stop::Stop (SensorRecorder& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    Stop::doExecute ()
+    {
+      SensorRecorder& entity = static_cast<SensorRecorder&> (owner ());
+      entity.stop ();
+      return Value ();
+    }
+
+    Dump::Dump (SensorRecorder& entity, const std::string& docstring)
+      : Command (entity, boost::assign::list_of (Value::STRING), docstring)
+    {}
+
+    Value
+    Dump::doExecute ()
+    {
+      SensorRecorder& entity = static_cast<SensorRecorder&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      std::string filename = values[0].value ();
+      entity.dump (filename);
+      return Value ();
+    }
+  } // end of namespace sensorRecorder.
+} // end of namespace command.
+
+SensorRecorder::SensorRecorder (const std::string& name)
+  : dg::Entity (name),
+    streams_ (),
+    records_ (),
+    values_ (),
+    capacity_ (0),
+    dropped_ (0),
+    recording_ (false),
+    started_ (false),
+    origin_ (0),
+    trigger_ (INIT_SIGNAL_OUT ("trigger", SensorRecorder::updateTrigger, "int")),
+    now_ (2)
+{
+  signalRegistration (trigger_);
+  trigger_.setNeedUpdateFromAllChildren (true);
+
+  setCapacity (DEFAULT_CAPACITY);
+
+  std::string docstring;
+
+  docstring =
+    "    \n"
+    "    Record a new stream\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: stream type (vector, matrixHomo or timestamp),\n"
+    "        - a string: stream name, also used as input signal name.\n"
+    "    \n";
+  addCommand ("add", new command::sensorRecorder::Add (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Forget previous samples and start recording\n"
+    "    \n";
+  addCommand ("start", new command::sensorRecorder::Start (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Stop recording\n"
+    "    \n";
+  addCommand ("stop", new command::sensorRecorder::Stop (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Write the recorded samples into a file\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: output file name.\n"
+    "    \n";
+  addCommand ("dump", new command::sensorRecorder::Dump (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Allocate the sample buffers\n"
+    "    \n"
+    "      Previous samples are discarded.\n"
+    "    \n"
+    "      Input:\n"
+    "        - an integer: maximum number of stored values.\n"
+    "    \n";
+  addCommand ("setCapacity",
+	      new dg::command::Setter<SensorRecorder, int>
+	      (*this, &SensorRecorder::setCapacity, docstring));
+}
+
+SensorRecorder::~SensorRecorder ()
+{}
+
+const char*
+SensorRecorder::typeToString (StreamType type)
+{
+  switch (type)
+    {
+    case STREAM_VECTOR:
+      return "vector";
+    case STREAM_MATRIX_HOMOGENEOUS:
+      return "matrixHomo";
+    case STREAM_TIMESTAMP:
+      return "timestamp";
+    }
+  return "unknown";
+}
+
+SensorRecorder::StreamType
+SensorRecorder::stringToType (const std::string& type)
+{
+  if (type == "vector")
+    return STREAM_VECTOR;
+  if (type == "matrixHomo")
+    return STREAM_MATRIX_HOMOGENEOUS;
+  if (type == "timestamp")
+    return STREAM_TIMESTAMP;
+  throw std::runtime_error ("invalid stream type '" + type + "'");
+}
+
+void
+SensorRecorder::add (const std::string& type, const std::string& name)
+{
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    if (streams_[i].name == name)
+      throw std::runtime_error ("stream '" + name + "' already exists");
+
+  Stream stream;
+  stream.name = name;
+  stream.type = stringToType (type);
+  stream.hasRecord = false;
+  stream.lastRecord = 0;
+
+  if (stream.type == STREAM_MATRIX_HOMOGENEOUS)
+    {
+      stream.matrix.reset
+	(new signalMatrixHomoIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING (getName (), true, "MatrixHomo", name)));
+      signalRegistration (*stream.matrix);
+      trigger_.addDependency (*stream.matrix);
+    }
+  else
+    {
+      stream.vector.reset
+	(new signalVectorIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING (getName (), true, "Vector", name)));
+      signalRegistration (*stream.vector);
+      trigger_.addDependency (*stream.vector);
+    }
+  streams_.push_back (stream);
+}
+
+void
+SensorRecorder::start ()
+{
+  records_.clear ();
+  values_.clear ();
+  dropped_ = 0;
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    streams_[i].hasRecord = false;
+
+  started_ = false;
+  recording_ = true;
+}
+
+void
+SensorRecorder::stop ()
+{
+  recording_ = false;
+}
+
+void
+SensorRecorder::setCapacity (const int& capacity)
+{
+  if (capacity <= 0)
+    throw std::runtime_error ("capacity must be positive");
+  capacity_ = capacity;
+
+  records_.clear ();
+  values_.clear ();
+  records_.reserve (capacity_);
+  values_.reserve (capacity_);
+  dropped_ = 0;
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    streams_[i].hasRecord = false;
+}
+
+void
+SensorRecorder::dump (const std::string& filename)
+{
+  std::ofstream file (filename.c_str ());
+  if (!file.good ())
+    throw std::runtime_error ("failed to open sensor recording file");
+
+  file << std::setprecision (std::numeric_limits<double>::digits10 + 2);
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    file << "stream " << i << " "
+	 << typeToString (streams_[i].type) << " "
+	 << streams_[i].name << "\n";
+  if (dropped_)
+    file << "# " << dropped_ << " sample(s) dropped\n";
+
+  for (unsigned i = 0; i < records_.size (); ++i)
+    {
+      const Record& r = records_[i];
+      file << r.time << " " << r.stream << " " << r.size;
+      for (unsigned j = 0; j < r.size; ++j)
+	file << " " << values_[r.offset + j];
+      file << "\n";
+    }
+}
+
+void
+SensorRecorder::record (int time, unsigned stream,
+			const double* values, unsigned size)
+{
+  Stream& s = streams_[stream];
+  if (s.hasRecord)
+    {
+      const Record& last = records_[s.lastRecord];
+      bool changed = last.size != size;
+      for (unsigned i = 0; !changed && i < size; ++i)
+	changed = values_[last.offset + i] != values[i];
+      if (!changed)
+	return;
+    }
+
+  if (records_.size () >= capacity_ || values_.size () + size > capacity_)
+    {
+      ++dropped_;
+      return;
+    }
+
+  Record r;
+  r.time = time;
+  r.stream = stream;
+  r.offset = values_.size ();
+  r.size = size;
+  values_.insert (values_.end (), values, values + size);
+
+  s.hasRecord = true;
+  s.lastRecord = records_.size ();
+  records_.push_back (r);
+}
+
+int&
+SensorRecorder::updateTrigger (int& res, int t)
+{
+  res = 0;
+  if (!recording_)
+    return res;
+
+  if (!started_)
+    {
+      started_ = true;
+      origin_ = t;
+    }
+
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    {
+      const Stream& s = streams_[i];
+      switch (s.type)
+	{
+	case STREAM_VECTOR:
+	  {
+	    if (!s.vector->isPlugged ())
+	      break;
+	    const ml::Vector& v = (*s.vector) (t);
+	    const unsigned size =
+	      std::min (static_cast<unsigned> (v.size ()), MAX_SAMPLE_SIZE);
+	    for (unsigned j = 0; j < size; ++j)
+	      buffer_[j] = v (j);
+	    record (t - origin_, i, buffer_, size);
+	    break;
+	  }
+	case STREAM_MATRIX_HOMOGENEOUS:
+	  {
+	    if (!s.matrix->isPlugged ())
+	      break;
+	    const sot::MatrixHomogeneous& m = (*s.matrix) (t);
+	    for (unsigned j = 0; j < 4; ++j)
+	      for (unsigned k = 0; k < 4; ++k)
+		buffer_[j * 4 + k] = m (j, k);
+	    record (t - origin_, i, buffer_, 16);
+	    break;
+	  }
+	case STREAM_TIMESTAMP:
+	  {
+	    if (!s.vector->isPlugged ())
+	      break;
+	    const ml::Vector& v = (*s.vector) (t);
+	    if (v.size () != 2)
+	      {
+		record (t - origin_, i, buffer_, 0);
+		break;
+	      }
+
+	    // Do not store a new sample if only the age changed.
+	    if (s.hasRecord)
+	      {
+		const Record& last = records_[s.lastRecord];
+		if (last.size == 3
+		    && values_[last.offset] == v (0)
+		    && values_[last.offset + 1] == v (1))
+		  break;
+	      }
+
+	    sot::motionPlanner::timestamp (now_, t);
+	    buffer_[0] = v (0);
+	    buffer_[1] = v (1);
+	    buffer_[2] = (now_ (0) - v (0)) + (now_ (1) - v (1)) * 1e-6;
+	    record (t - origin_, i, buffer_, 3);
+	    break;
+	  }
+	}
+    }
+  return res;
+}
+
+DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (SensorRecorder, "SensorRecorder");
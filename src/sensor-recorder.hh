@@ -0,0 +1,193 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef SOT_MOTION_PLANNER_SENSOR_RECORDER_HH
+# define SOT_MOTION_PLANNER_SENSOR_RECORDER_HH
+# include <string>
+# include <vector>
+# include <boost/shared_ptr.hpp>
+
+# include <jrl/mal/boost.hh>
+
+# include <dynamic-graph/command.h>
+# include <dynamic-graph/entity.h>
+# include <dynamic-graph/factory.h>
+# include <dynamic-graph/null-ptr.hh>
+# include <dynamic-graph/signal-time-dependent.h>
+# include <dynamic-graph/signal-ptr.h>
+
+# include <sot/core/matrix-homogeneous.hh>
+
+# include "common.hh"
+
+class SensorRecorder;
+
+namespace command
+{
+  namespace sensorRecorder
+  {
+    using ::dynamicgraph::command::Command;
+    using ::dynamicgraph::command::Value;
+
+    class Add : public Command
+    {
+    public:
+      Add (SensorRecorder& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class Start : public Command
+    {
+    public:
+      Start (SensorRecorder& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class Stop : public Command
+    {
+    public:
+      Stop (SensorRecorder& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class Dump : public Command
+    {
+    public:
+      Dump (SensorRecorder& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+  } // end of namespace sensorRecorder.
+} // end of namespace command.
+
+/// \brief Record sensor input streams during an experiment.
+///
+/// Each stream is plugged into an input signal named after it. Three
+/// kinds of streams are supported:
+/// - vector: any vector (mocap position for instance),
+/// - matrixHomo: an homogeneous matrix (ViSP cMo for instance),
+/// - timestamp: a (seconds, microseconds) acquisition timestamp. The
+///   delay between the acquisition and the recording is stored as
+///   well so that replayed timestamps keep the same age.
+///
+/// Once started, the streams are read each time the trigger signal
+/// is evaluated. A sample is stored only when its value changed, with
+/// the number of control iterations elapsed since the recording
+/// started. Samples are stored into buffers allocated by
+/// setCapacity, samples which do not fit are dropped and counted.
+///
+/// dump writes the recording into a text file read by SensorReplay:
+///
+/// \code
+/// stream <index> <type> <name>
+/// ...
+/// <iteration> <stream index> <size> <values>...
+/// ...
+/// \endcode
+class SensorRecorder : public dg::Entity
+{
+  DYNAMIC_GRAPH_ENTITY_DECL ();
+ public:
+  /// \brief Input vector signal.
+  typedef dg::SignalPtr<ml::Vector, int> signalVectorIn_t;
+  /// \brief Input homogeneous matrix signal.
+  typedef dg::SignalPtr<sot::MatrixHomogeneous, int> signalMatrixHomoIn_t;
+
+  /// \brief Default number of stored values.
+  static const unsigned DEFAULT_CAPACITY = 1 << 20;
+  /// \brief Maximum size of a sample, longer vectors are truncated.
+  static const unsigned MAX_SAMPLE_SIZE = 16;
+
+  enum StreamType
+    {
+      STREAM_VECTOR,
+      STREAM_MATRIX_HOMOGENEOUS,
+      STREAM_TIMESTAMP
+    };
+
+  struct Stream
+  {
+    std::string name;
+    StreamType type;
+    boost::shared_ptr<signalVectorIn_t> vector;
+    boost::shared_ptr<signalMatrixHomoIn_t> matrix;
+    /// \brief Has a sample already been recorded?
+    bool hasRecord;
+    /// \brief Index of the last recorded sample.
+    unsigned lastRecord;
+  };
+
+  /// \brief Recorded sample, values are stored in a shared buffer.
+  struct Record
+  {
+    int time;
+    unsigned stream;
+    unsigned offset;
+    unsigned size;
+  };
+
+  /// \name Constructor and destructor.
+  /// \{
+  explicit SensorRecorder (const std::string& name);
+  virtual ~SensorRecorder ();
+  /// \}
+
+  /// \brief Convert a stream type into a string.
+  static const char* typeToString (StreamType type);
+  /// \brief Convert a string into a stream type.
+  static StreamType stringToType (const std::string& type);
+
+  /// \brief Create the input signal of a new stream.
+  void add (const std::string& type, const std::string& name);
+
+  /// \brief Forget previous samples and record from the next
+  ///        evaluation.
+  void start ();
+  /// \brief Stop recording, samples are kept until dump.
+  void stop ();
+  /// \brief Write the samples into a file.
+  void dump (const std::string& filename);
+
+  void setCapacity (const int& capacity);
+
+protected:
+  /// \brief Read the streams and store the new samples.
+  int& updateTrigger (int& res, int);
+
+private:
+  /// \brief Store a sample if it differs from the previous one.
+  void record (int time, unsigned stream,
+	       const double* values, unsigned size);
+
+  std::vector<Stream> streams_;
+  std::vector<Record> records_;
+  std::vector<double> values_;
+  unsigned capacity_;
+  unsigned dropped_;
+
+  bool recording_;
+  bool started_;
+  /// \brief Time of the first evaluation since start.
+  int origin_;
+
+  dg::SignalTimeDependent<int, int> trigger_;
+
+  /// \name Workspaces
+  /// \{
+  double buffer_[MAX_SAMPLE_SIZE];
+  ml::Vector now_;
+  /// \}
+};
+
+#endif //! SOT_MOTION_PLANNER_SENSOR_RECORDER_HH
@@ -0,0 +1,293 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <cmath>
+#include <fstream>
+#include <sstream>
+#include <stdexcept>
+
+#include <boost/assign/list_of.hpp>
+#include <boost/bind.hpp>
+
+#include "sensor-replay.hh"
+#include "time.hh"
+
+namespace command
+{
+  namespace sensorReplay
+  {
+    Load::Load (SensorReplay& entity, const std::string& docstring)
+      : Command (entity, boost::assign::list_of (Value::STRING), docstring)
+    {}
+
+    Value
+    Load::doExecute ()
+    {
+      SensorReplay& entity = static_cast<SensorReplay&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      std::string filename = values[0].value ();
+      entity.load (filename);
+      return Value ();
+    }
+
+    Start::Start (SensorReplay& entity, const std::string& docstring)
+      : Command (entity, std::vector<Value::Type> (), docstring)
+    {}
+
+    Value
+    Start::doExecute ()
+    {
+      SensorReplay& entity = static_cast<SensorReplay&> (owner ());
+      entity.start ();
+      return Value ();
+    }
+
+    HasStream::HasStream (SensorReplay& entity, const std::string& docstring)
+      : Command (entity, boost::assign::list_of (Value::STRING), docstring)
+    {}
+
+    Value
+    HasStream::doExecute ()
+    {
+      SensorReplay& entity = static_cast<SensorReplay&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      std::string name = values[0].value ();
+      return Value (entity.hasStream (name));
+    }
+  } // end of namespace sensorReplay.
+} // end of namespace command.
+
+SensorReplay::SensorReplay (const std::string& name)
+  : dg::Entity (name),
+    streams_ (),
+    started_ (false),
+    originSet_ (false),
+    origin_ (0),
+    now_ (2)
+{
+  std::string docstring;
+
+  docstring =
+    "    \n"
+    "    Load a sensor recording\n"
+    "    \n"
+    "      One output signal is created per recorded stream.\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: file written by SensorRecorder.dump.\n"
+    "    \n";
+  addCommand ("load", new command::sensorReplay::Load (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Start replaying the recording\n"
+    "    \n";
+  addCommand ("start", new command::sensorReplay::Start (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Check if a stream has been recorded\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: stream name.\n"
+    "      Return:\n"
+    "        - a boolean.\n"
+    "    \n";
+  addCommand ("hasStream",
+	      new command::sensorReplay::HasStream (*this, docstring));
+}
+
+SensorReplay::~SensorReplay ()
+{}
+
+void
+SensorReplay::load (const std::string& filename)
+{
+  if (!streams_.empty ())
+    throw std::runtime_error ("a recording has already been loaded");
+
+  std::ifstream file (filename.c_str ());
+  if (!file.good ())
+    throw std::runtime_error ("failed to open sensor recording file");
+
+  std::string line;
+  while (std::getline (file, line))
+    {
+      if (line.empty () || line[0] == '#')
+	continue;
+
+      std::istringstream stream (line);
+      if (line.compare (0, 7, "stream ") == 0)
+	{
+	  std::string keyword;
+	  std::string type;
+	  unsigned index = 0;
+	  Stream s;
+	  stream >> keyword >> index >> type >> s.name;
+	  if (!stream || index != streams_.size ())
+	    throw std::runtime_error ("invalid stream declaration: " + line);
+	  s.type = SensorRecorder::stringToType (type);
+	  s.cursor = 0;
+	  s.shiftedSample = -1;
+	  streams_.push_back (s);
+	  continue;
+	}
+
+      Sample sample;
+      unsigned index = 0;
+      unsigned size = 0;
+      stream >> sample.time >> index >> size;
+      if (!stream || index >= streams_.size ())
+	throw std::runtime_error ("invalid sample: " + line);
+      sample.values.resize (size);
+      for (unsigned i = 0; i < size; ++i)
+	stream >> sample.values[i];
+      if (!stream)
+	throw std::runtime_error ("invalid sample: " + line);
+
+      std::vector<Sample>& samples = streams_[index].samples;
+      if (!samples.empty () && samples.back ().time > sample.time)
+	throw std::runtime_error ("samples are not sorted: " + line);
+      samples.push_back (sample);
+    }
+
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    {
+      Stream& s = streams_[i];
+      if (s.type == SensorRecorder::STREAM_MATRIX_HOMOGENEOUS)
+	{
+	  s.matrix.reset
+	    (new signalMatrixHomoOut_t
+	     (boost::bind (&SensorReplay::updateMatrixHomogeneous,
+			   this, i, _1, _2),
+	      dg::sotNOSIGNAL,
+	      MAKE_SIGNAL_STRING (getName (), false, "MatrixHomo", s.name)));
+	  signalRegistration (*s.matrix);
+	}
+      else
+	{
+	  s.vector.reset
+	    (new signalVectorOut_t
+	     (boost::bind (&SensorReplay::updateVector, this, i, _1, _2),
+	      dg::sotNOSIGNAL,
+	      MAKE_SIGNAL_STRING (getName (), false, "Vector", s.name)));
+	  signalRegistration (*s.vector);
+	}
+    }
+}
+
+void
+SensorReplay::start ()
+{
+  started_ = true;
+  originSet_ = false;
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    {
+      streams_[i].cursor = 0;
+      streams_[i].shiftedSample = -1;
+    }
+}
+
+bool
+SensorReplay::hasStream (const std::string& name) const
+{
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    if (streams_[i].name == name)
+      return true;
+  return false;
+}
+
+const SensorReplay::Sample*
+SensorReplay::currentSample (Stream& stream, int t)
+{
+  if (stream.samples.empty ())
+    return 0;
+  if (!started_)
+    return &stream.samples[0];
+
+  if (!originSet_)
+    {
+      originSet_ = true;
+      origin_ = t;
+    }
+  const int time = t - origin_;
+
+  // Time went backward: search again from the beginning.
+  if (stream.samples[stream.cursor].time > time)
+    stream.cursor = 0;
+  while (stream.cursor + 1 < stream.samples.size ()
+	 && stream.samples[stream.cursor + 1].time <= time)
+    ++stream.cursor;
+  return &stream.samples[stream.cursor];
+}
+
+ml::Vector&
+SensorReplay::updateVector (unsigned stream, ml::Vector& res, int t)
+{
+  Stream& s = streams_[stream];
+  const Sample* sample = currentSample (s, t);
+  if (!sample)
+    {
+      res.resize (0);
+      return res;
+    }
+
+  const std::vector<double>& values = sample->values;
+  if (s.type == SensorRecorder::STREAM_TIMESTAMP && values.size () == 3)
+    {
+      // Shift the timestamp to keep the recorded age.
+      const int index = sample - &s.samples[0];
+      if (s.shiftedSample != index)
+	{
+	  sot::motionPlanner::timestamp (now_, t);
+	  sot::motionPlanner::shiftTimestamp
+	    (now_, values[2], s.shiftedTimestamp);
+	  s.shiftedSample = index;
+	}
+
+      if (res.size () != 2)
+	res.resize (2);
+      res (0) = s.shiftedTimestamp[0];
+      res (1) = s.shiftedTimestamp[1];
+      return res;
+    }
+
+  const unsigned size = values.size ();
+  if (res.size () != size)
+    res.resize (size);
+  for (unsigned i = 0; i < size; ++i)
+    res (i) = values[i];
+  return res;
+}
+
+sot::MatrixHomogeneous&
+SensorReplay::updateMatrixHomogeneous (unsigned stream,
+				       sot::MatrixHomogeneous& res, int t)
+{
+  Stream& s = streams_[stream];
+  const Sample* sample = currentSample (s, t);
+  if (!sample || sample->values.size () != 16)
+    {
+      res.setIdentity ();
+      return res;
+    }
+
+  for (unsigned i = 0; i < 4; ++i)
+    for (unsigned j = 0; j < 4; ++j)
+      res (i, j) = sample->values[i * 4 + j];
+  return res;
+}
+
+DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (SensorReplay, "SensorReplay");
@@ -0,0 +1,147 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef SOT_MOTION_PLANNER_SENSOR_REPLAY_HH
+# define SOT_MOTION_PLANNER_SENSOR_REPLAY_HH
+# include <string>
+# include <vector>
+# include <boost/shared_ptr.hpp>
+
+# include <jrl/mal/boost.hh>
+
+# include <dynamic-graph/command.h>
+# include <dynamic-graph/entity.h>
+# include <dynamic-graph/factory.h>
+# include <dynamic-graph/signal-time-dependent.h>
+
+# include <sot/core/matrix-homogeneous.hh>
+
+# include "common.hh"
+# include "sensor-recorder.hh"
+
+class SensorReplay;
+
+namespace command
+{
+  namespace sensorReplay
+  {
+    using ::dynamicgraph::command::Command;
+    using ::dynamicgraph::command::Value;
+
+    class Load : public Command
+    {
+    public:
+      Load (SensorReplay& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class Start : public Command
+    {
+    public:
+      Start (SensorReplay& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class HasStream : public Command
+    {
+    public:
+      HasStream (SensorReplay& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+  } // end of namespace sensorReplay.
+} // end of namespace command.
+
+/// \brief Replay the sensor streams recorded by SensorRecorder.
+///
+/// Loading a recording creates one output signal per stream, named
+/// after it and of the same type. Before start is called, the signals
+/// provide the first sample of each stream. Afterwards, the signals
+/// provide at iteration t the last sample recorded at most t - t0
+/// iterations after the recording started, t0 being the first
+/// evaluation following start.
+///
+/// Replay only depends on the control iterations, hence it is
+/// deterministic and runs as fast as the control loop. Timestamps
+/// are shifted to the current time when their sample is replayed so
+/// that the measurements keep their recorded age.
+class SensorReplay : public dg::Entity
+{
+  DYNAMIC_GRAPH_ENTITY_DECL ();
+ public:
+  /// \brief Output vector signal.
+  typedef dg::SignalTimeDependent<ml::Vector, int> signalVectorOut_t;
+  /// \brief Output homogeneous matrix signal.
+  typedef dg::SignalTimeDependent<sot::MatrixHomogeneous, int>
+  signalMatrixHomoOut_t;
+
+  struct Sample
+  {
+    int time;
+    std::vector<double> values;
+  };
+
+  struct Stream
+  {
+    std::string name;
+    SensorRecorder::StreamType type;
+    std::vector<Sample> samples;
+    /// \brief Index of the current sample.
+    unsigned cursor;
+    /// \brief Sample whose timestamp has been shifted (timestamp
+    ///        streams only), -1 if none.
+    int shiftedSample;
+    /// \brief Shifted timestamp, computed once per sample.
+    double shiftedTimestamp[2];
+    boost::shared_ptr<signalVectorOut_t> vector;
+    boost::shared_ptr<signalMatrixHomoOut_t> matrix;
+  };
+
+  /// \name Constructor and destructor.
+  /// \{
+  explicit SensorReplay (const std::string& name);
+  virtual ~SensorReplay ();
+  /// \}
+
+  /// \brief Read a recording and create the output signals.
+  void load (const std::string& filename);
+
+  /// \brief Replay from the next evaluation.
+  void start ();
+
+  bool hasStream (const std::string& name) const;
+
+protected:
+  ml::Vector& updateVector (unsigned stream, ml::Vector& res, int);
+  sot::MatrixHomogeneous& updateMatrixHomogeneous
+  (unsigned stream, sot::MatrixHomogeneous& res, int);
+
+private:
+  /// \brief Select the sample to be replayed at iteration t.
+  const Sample* currentSample (Stream& stream, int t);
+
+  std::vector<Stream> streams_;
+
+  bool started_;
+  bool originSet_;
+  /// \brief Time of the first evaluation since start.
+  int origin_;
+
+  /// \name Workspaces
+  /// \{
+  ml::Vector now_;
+  /// \}
+};
+
+#endif //! SOT_MOTION_PLANNER_SENSOR_REPLAY_HH
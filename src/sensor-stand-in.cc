@@ -0,0 +1,449 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <algorithm>
+#include <cmath>
+#include <stdexcept>
+
+#include <boost/assign/list_of.hpp>
+#include <boost/bind.hpp>
+#include <boost/random/uniform_real.hpp>
+#include <boost/random/variate_generator.hpp>
+
+#include <dynamic-graph/command-setter.h>
+
+#include "sensor-stand-in.hh"
+#include "time.hh"
+
+namespace command
+{
+  namespace sensorStandIn
+  {
+    AddStream::AddStream (SensorStandIn& entity, const std::string& docstring)
+      : Command
+	(entity,
+	 boost::assign::list_of
+	 (Value::STRING) (Value::STRING)
+	 (Value::DOUBLE) (Value::DOUBLE) (Value::DOUBLE) (Value::DOUBLE),
+	 docstring)
+    {}
+
+    Value
+    AddStream::doExecute ()
+    {
+      SensorStandIn& entity = static_cast<SensorStandIn&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      std::string type = values[0].value ();
+      std::string name = values[1].value ();
+      double period = values[2].value ();
+      double jitter = values[3].value ();
+      double latency = values[4].value ();
+      double dropout = values[5].value ();
+      entity.addStream (type, name, period, jitter, latency, dropout);
+      return Value ();
+    }
+
+    HasStream::HasStream (SensorStandIn& entity, const std::string& docstring)
+      : Command (entity, boost::assign::list_of (Value::STRING), docstring)
+    {}
+
+    Value
+    HasStream::doExecute ()
+    {
+      SensorStandIn& entity = static_cast<SensorStandIn&> (owner ());
+      std::vector<Value> values = getParameterValues ();
+      std::string name = values[0].value ();
+      return Value (entity.hasStream (name));
+    }
+  } // end of namespace sensorStandIn.
+} // end of namespace command.
+
+SensorStandIn::SensorStandIn (const std::string& name)
+  : dg::Entity (name),
+    streams_ (),
+    trigger_ (INIT_SIGNAL_OUT ("trigger", SensorStandIn::updateTrigger, "int")),
+    timeStep_ (0.005),
+    generator_ (),
+    started_ (false),
+    origin_ (0),
+    lastStep_ (0),
+    now_ (2),
+    matrix_ ()
+{
+  signalRegistration (trigger_);
+
+  std::string docstring;
+
+  docstring =
+    "    \n"
+    "    Add a stream\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: stream type (vector, xytheta or matrixHomo),\n"
+    "        - a string: stream name,\n"
+    "        - a double: acquisition period (s),\n"
+    "        - a double: acquisition jitter (s),\n"
+    "        - a double: latency between acquisition and publication (s),\n"
+    "        - a double: probability to drop a measurement.\n"
+    "    \n";
+  addCommand ("addStream",
+	      new command::sensorStandIn::AddStream (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Check if a stream is provided\n"
+    "    \n"
+    "      Input:\n"
+    "        - a string: stream name.\n"
+    "      Return:\n"
+    "        - a boolean.\n"
+    "    \n";
+  addCommand ("hasStream",
+	      new command::sensorStandIn::HasStream (*this, docstring));
+
+  docstring =
+    "    \n"
+    "    Set the control loop period\n"
+    "    \n"
+    "      Input:\n"
+    "        - a double: period in seconds.\n"
+    "    \n";
+  addCommand ("setTimeStep",
+	      new dg::command::Setter<SensorStandIn, double>
+	      (*this, &SensorStandIn::setTimeStep, docstring));
+
+  docstring =
+    "    \n"
+    "    Seed the random generator (jitter and dropout)\n"
+    "    \n"
+    "      Input:\n"
+    "        - an integer: seed.\n"
+    "    \n";
+  addCommand ("setSeed",
+	      new dg::command::Setter<SensorStandIn, int>
+	      (*this, &SensorStandIn::setSeed, docstring));
+}
+
+SensorStandIn::~SensorStandIn ()
+{}
+
+void
+SensorStandIn::addStream (const std::string& type, const std::string& name,
+			  double period, double jitter, double latency,
+			  double dropout)
+{
+  if (hasStream (name))
+    throw std::runtime_error ("stream '" + name + "' already exists");
+  if (period <= 0.)
+    throw std::runtime_error ("period must be strictly positive");
+  if (jitter < 0. || jitter >= period)
+    throw std::runtime_error ("jitter must be in [0, period)");
+  if (latency < 0.)
+    throw std::runtime_error ("latency must be positive");
+  if (dropout < 0. || dropout >= 1.)
+    throw std::runtime_error ("dropout must be in [0, 1)");
+
+  streams_.push_back (Stream ());
+  Stream& s = streams_.back ();
+  const unsigned index = streams_.size () - 1;
+
+  s.name = name;
+  if (type == "vector")
+    s.type = STREAM_VECTOR;
+  else if (type == "xytheta")
+    s.type = STREAM_XYTHETA;
+  else if (type == "matrixHomo")
+    s.type = STREAM_MATRIX_HOMOGENEOUS;
+  else
+    {
+      streams_.pop_back ();
+      throw std::runtime_error ("invalid stream type '" + type + "'");
+    }
+  s.period = period;
+  s.jitter = jitter;
+  s.latency = latency;
+  s.dropout = dropout;
+  s.nextAcquisition = 0.;
+  s.pending.set_capacity (pendingCapacity (s));
+  s.published = false;
+
+  if (s.type == STREAM_VECTOR)
+    {
+      s.vectorSource.reset
+	(new signalVectorIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING (getName (), true, "Vector", name + "Source")));
+      signalRegistration (*s.vectorSource);
+    }
+  else
+    {
+      s.matrixSource.reset
+	(new signalMatrixHomoIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING
+	  (getName (), true, "MatrixHomo", name + "Source")));
+      signalRegistration (*s.matrixSource);
+    }
+
+  if (s.type == STREAM_MATRIX_HOMOGENEOUS)
+    {
+      s.reference.reset
+	(new signalMatrixHomoIn_t
+	 (dg::nullptr,
+	  MAKE_SIGNAL_STRING
+	  (getName (), true, "MatrixHomo", name + "Reference")));
+      signalRegistration (*s.reference);
+
+      s.matrixOut.reset
+	(new signalMatrixHomoOut_t
+	 (boost::bind (&SensorStandIn::updateMatrixHomogeneous,
+		       this, index, _1, _2),
+	  dg::sotNOSIGNAL,
+	  MAKE_SIGNAL_STRING (getName (), false, "MatrixHomo", name)));
+      signalRegistration (*s.matrixOut);
+    }
+  else
+    {
+      s.vectorOut.reset
+	(new signalVectorOut_t
+	 (boost::bind (&SensorStandIn::updateVector, this, index, _1, _2),
+	  dg::sotNOSIGNAL,
+	  MAKE_SIGNAL_STRING (getName (), false, "Vector", name)));
+      signalRegistration (*s.vectorOut);
+    }
+
+  s.timestampOut.reset
+    (new signalVectorOut_t
+     (boost::bind (&SensorStandIn::updateTimestamp, this, index, _1, _2),
+      dg::sotNOSIGNAL,
+      MAKE_SIGNAL_STRING (getName (), false, "Vector", name + "Timestamp")));
+  signalRegistration (*s.timestampOut);
+}
+
+bool
+SensorStandIn::hasStream (const std::string& name) const
+{
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    if (streams_[i].name == name)
+      return true;
+  return false;
+}
+
+void
+SensorStandIn::setTimeStep (const double& timeStep)
+{
+  if (timeStep <= 0.)
+    throw std::runtime_error ("time step must be strictly positive");
+  timeStep_ = timeStep;
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    streams_[i].pending.set_capacity (pendingCapacity (streams_[i]));
+}
+
+std::size_t
+SensorStandIn::pendingCapacity (const Stream& s) const
+{
+  // Measurements acquired during the latency, plus the ones acquired
+  // in one iteration before being published.
+  const double period = s.period - s.jitter;
+  return static_cast<std::size_t>
+    (std::ceil ((s.latency + timeStep_) / period)) + 1;
+}
+
+void
+SensorStandIn::setSeed (const int& seed)
+{
+  generator_.seed (static_cast<boost::uint32_t> (seed));
+}
+
+double
+SensorStandIn::uniform (double min, double max)
+{
+  if (min >= max)
+    return min;
+  boost::uniform_real<> distribution (min, max);
+  boost::variate_generator<boost::mt19937&, boost::uniform_real<> >
+    variate (generator_, distribution);
+  return variate ();
+}
+
+void
+SensorStandIn::acquire (Stream& s, int t, Measurement& measurement)
+{
+  switch (s.type)
+    {
+    case STREAM_VECTOR:
+      {
+	if (!s.vectorSource->isPlugged ())
+	  {
+	    measurement.size = 0;
+	    return;
+	  }
+	const ml::Vector& v = (*s.vectorSource) (t);
+	measurement.size =
+	  std::min (static_cast<unsigned> (v.size ()), MAX_MEASUREMENT_SIZE);
+	for (unsigned i = 0; i < measurement.size; ++i)
+	  measurement.values[i] = v (i);
+	return;
+      }
+    case STREAM_XYTHETA:
+      {
+	if (!s.matrixSource->isPlugged ())
+	  {
+	    measurement.size = 0;
+	    return;
+	  }
+	const sot::MatrixHomogeneous& m = (*s.matrixSource) (t);
+	measurement.size = 3;
+	measurement.values[0] = m (0, 3);
+	measurement.values[1] = m (1, 3);
+	measurement.values[2] = std::atan2 (m (1, 0), m (0, 0));
+	return;
+      }
+    case STREAM_MATRIX_HOMOGENEOUS:
+      {
+	if (!s.matrixSource->isPlugged ())
+	  {
+	    measurement.size = 0;
+	    return;
+	  }
+	if (s.reference->isPlugged ())
+	  matrix_ = (*s.reference) (t).inverse () * (*s.matrixSource) (t);
+	else
+	  matrix_ = (*s.matrixSource) (t);
+	measurement.size = 16;
+	for (unsigned i = 0; i < 4; ++i)
+	  for (unsigned j = 0; j < 4; ++j)
+	    measurement.values[i * 4 + j] = matrix_ (i, j);
+	return;
+      }
+    }
+}
+
+void
+SensorStandIn::step (int t)
+{
+  if (!started_)
+    {
+      started_ = true;
+      origin_ = t;
+      lastStep_ = t - 1;
+    }
+  if (t <= lastStep_)
+    return;
+  lastStep_ = t;
+
+  const double time = (t - origin_) * timeStep_;
+  bool hasNow = false;
+
+  for (unsigned i = 0; i < streams_.size (); ++i)
+    {
+      Stream& s = streams_[i];
+
+      while (s.nextAcquisition <= time)
+	{
+	  const double acquisitionTime = s.nextAcquisition;
+	  s.nextAcquisition += s.period + uniform (-s.jitter, s.jitter);
+
+	  if (s.dropout > 0. && uniform (0., 1.) < s.dropout)
+	    continue;
+
+	  if (!hasNow)
+	    {
+	      sot::motionPlanner::timestamp (now_, t);
+	      hasNow = true;
+	    }
+
+	  // The ring is sized by pendingCapacity, publish the oldest
+	  // measurement early rather than overwriting it.
+	  if (s.pending.full ())
+	    {
+	      s.current = s.pending.front ();
+	      s.pending.pop_front ();
+	      s.published = true;
+	    }
+	  s.pending.push_back (Measurement ());
+	  Measurement& measurement = s.pending.back ();
+	  measurement.publicationTime = acquisitionTime + s.latency;
+	  sot::motionPlanner::shiftTimestamp
+	    (now_, time - acquisitionTime, measurement.timestamp);
+	  acquire (s, t, measurement);
+	}
+
+      while (!s.pending.empty ()
+	     && s.pending.front ().publicationTime <= time)
+	{
+	  s.current = s.pending.front ();
+	  s.pending.pop_front ();
+	  s.published = true;
+	}
+    }
+}
+
+ml::Vector&
+SensorStandIn::updateVector (unsigned stream, ml::Vector& res, int t)
+{
+  step (t);
+  const Stream& s = streams_[stream];
+  const unsigned size = s.published ? s.current.size : 0;
+  if (res.size () != size)
+    res.resize (size);
+  for (unsigned i = 0; i < size; ++i)
+    res (i) = s.current.values[i];
+  return res;
+}
+
+sot::MatrixHomogeneous&
+SensorStandIn::updateMatrixHomogeneous (unsigned stream,
+					sot::MatrixHomogeneous& res, int t)
+{
+  step (t);
+  const Stream& s = streams_[stream];
+  if (!s.published || s.current.size != 16)
+    {
+      res.setIdentity ();
+      return res;
+    }
+  for (unsigned i = 0; i < 4; ++i)
+    for (unsigned j = 0; j < 4; ++j)
+      res (i, j) = s.current.values[i * 4 + j];
+  return res;
+}
+
+ml::Vector&
+SensorStandIn::updateTimestamp (unsigned stream, ml::Vector& res, int t)
+{
+  step (t);
+  const Stream& s = streams_[stream];
+  if (!s.published)
+    {
+      res.resize (0);
+      return res;
+    }
+  if (res.size () != 2)
+    res.resize (2);
+  res (0) = s.current.timestamp[0];
+  res (1) = s.current.timestamp[1];
+  return res;
+}
+
+int&
+SensorStandIn::updateTrigger (int& res, int t)
+{
+  step (t);
+  res = 0;
+  return res;
+}
+
+DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (SensorStandIn, "SensorStandIn");
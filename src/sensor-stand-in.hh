@@ -0,0 +1,207 @@
+// Copyright 2011, Thomas Moulard, CNRS.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef SOT_MOTION_PLANNER_SENSOR_STAND_IN_HH
+# define SOT_MOTION_PLANNER_SENSOR_STAND_IN_HH
+# include <string>
+# include <vector>
+# include <boost/circular_buffer.hpp>
+# include <boost/random/mersenne_twister.hpp>
+# include <boost/shared_ptr.hpp>
+
+# include <jrl/mal/boost.hh>
+
+# include <dynamic-graph/command.h>
+# include <dynamic-graph/entity.h>
+# include <dynamic-graph/factory.h>
+# include <dynamic-graph/null-ptr.hh>
+# include <dynamic-graph/signal-time-dependent.h>
+# include <dynamic-graph/signal-ptr.h>
+
+# include <sot/core/matrix-homogeneous.hh>
+
+# include "common.hh"
+
+class SensorStandIn;
+
+namespace command
+{
+  namespace sensorStandIn
+  {
+    using ::dynamicgraph::command::Command;
+    using ::dynamicgraph::command::Value;
+
+    class AddStream : public Command
+    {
+    public:
+      AddStream (SensorStandIn& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+
+    class HasStream : public Command
+    {
+    public:
+      HasStream (SensorStandIn& entity, const std::string& docstring);
+      virtual Value doExecute ();
+    };
+  } // end of namespace sensorStandIn.
+} // end of namespace command.
+
+/// \brief Stand-in for the motion capture and the visual trackers.
+///
+/// Each stream reads a ground truth from the <name>Source input
+/// signal and publishes the <name> and <name>Timestamp output
+/// signals, i.e. the signals exported by the CORBA server (mocap) or
+/// by the ROS bridge (ViSP).
+///
+/// Three kinds of streams are supported:
+/// - vector: the source vector is published unchanged,
+/// - xytheta: the source is an homogeneous matrix, its planar
+///   position (x, y, yaw) is published as the motion capture does,
+/// - matrixHomo: the source homogeneous matrix is published. If the
+///   <name>Reference input signal is plugged, the source is expressed
+///   in this frame, i.e. inv (reference) * source, which provides the
+///   object position in the camera frame.
+///
+/// Measurements are acquired every period seconds, plus a random
+/// jitter uniformly drawn in [-jitter, jitter]. Each measurement is
+/// dropped with the dropout probability, otherwise it is published
+/// latency seconds after its acquisition, with the acquisition
+/// timestamp read from the shared clock. Before the first
+/// publication, vector streams are empty and matrix streams are the
+/// identity.
+///
+/// Time is counted in control iterations (see setTimeStep) so that
+/// runs are reproducible for a given seed. The trigger signal must
+/// be evaluated at each iteration so that measurements are acquired
+/// even when nobody reads the streams.
+class SensorStandIn : public dg::Entity
+{
+  DYNAMIC_GRAPH_ENTITY_DECL ();
+ public:
+  /// \brief Input vector signal.
+  typedef dg::SignalPtr<ml::Vector, int> signalVectorIn_t;
+  /// \brief Input homogeneous matrix signal.
+  typedef dg::SignalPtr<sot::MatrixHomogeneous, int> signalMatrixHomoIn_t;
+  /// \brief Output vector signal.
+  typedef dg::SignalTimeDependent<ml::Vector, int> signalVectorOut_t;
+  /// \brief Output homogeneous matrix signal.
+  typedef dg::SignalTimeDependent<sot::MatrixHomogeneous, int>
+  signalMatrixHomoOut_t;
+
+  /// \brief Maximum size of a measurement, longer vectors are
+  ///        truncated.
+  static const unsigned MAX_MEASUREMENT_SIZE = 16;
+
+  enum StreamType
+    {
+      STREAM_VECTOR,
+      STREAM_XYTHETA,
+      STREAM_MATRIX_HOMOGENEOUS
+    };
+
+  struct Measurement
+  {
+    /// \brief Time (in seconds) at which the measurement is published.
+    double publicationTime;
+    double timestamp[2];
+    unsigned size;
+    double values[MAX_MEASUREMENT_SIZE];
+  };
+
+  struct Stream
+  {
+    std::string name;
+    StreamType type;
+
+    double period;
+    double jitter;
+    double latency;
+    double dropout;
+
+    boost::shared_ptr<signalVectorIn_t> vectorSource;
+    boost::shared_ptr<signalMatrixHomoIn_t> matrixSource;
+    boost::shared_ptr<signalMatrixHomoIn_t> reference;
+
+    boost::shared_ptr<signalVectorOut_t> vectorOut;
+    boost::shared_ptr<signalMatrixHomoOut_t> matrixOut;
+    boost::shared_ptr<signalVectorOut_t> timestampOut;
+
+    /// \brief Time (in seconds) of the next acquisition.
+    double nextAcquisition;
+    /// \brief Acquired measurements waiting for their publication.
+    ///
+    /// Preallocated (see pendingCapacity): acquiring a measurement
+    /// in the control loop never allocates.
+    boost::circular_buffer<Measurement> pending;
+    /// \brief Last published measurement.
+    Measurement current;
+    bool published;
+  };
+
+  /// \name Constructor and destructor.
+  /// \{
+  explicit SensorStandIn (const std::string& name);
+  virtual ~SensorStandIn ();
+  /// \}
+
+  /// \brief Create the signals of a new stream.
+  void addStream (const std::string& type, const std::string& name,
+		  double period, double jitter, double latency,
+		  double dropout);
+
+  bool hasStream (const std::string& name) const;
+
+  void setTimeStep (const double& timeStep);
+  void setSeed (const int& seed);
+
+protected:
+  ml::Vector& updateVector (unsigned stream, ml::Vector& res, int);
+  sot::MatrixHomogeneous& updateMatrixHomogeneous
+  (unsigned stream, sot::MatrixHomogeneous& res, int);
+  ml::Vector& updateTimestamp (unsigned stream, ml::Vector& res, int);
+  int& updateTrigger (int& res, int);
+
+private:
+  /// \brief Acquire and publish the measurements up to iteration t.
+  void step (int t);
+  /// \brief Read the ground truth of a stream.
+  void acquire (Stream& stream, int t, Measurement& measurement);
+  /// \brief Maximum number of measurements waiting for their
+  ///        publication.
+  std::size_t pendingCapacity (const Stream& stream) const;
+  /// \brief Draw a number uniformly in [min, max].
+  double uniform (double min, double max);
+
+  std::vector<Stream> streams_;
+  dg::SignalTimeDependent<int, int> trigger_;
+
+  double timeStep_;
+  boost::mt19937 generator_;
+
+  bool started_;
+  /// \brief First iteration.
+  int origin_;
+  /// \brief Last iteration handled by step.
+  int lastStep_;
+
+  /// \name Workspaces
+  /// \{
+  ml::Vector now_;
+  sot::MatrixHomogeneous matrix_;
+  /// \}
+};
+
+#endif //! SOT_MOTION_PLANNER_SENSOR_STAND_IN_HH
@@ -27,6 +27,7 @@
 #include <dynamic-graph/pool.h>
 
 #include "common.hh"
+#include "event-log.hh"
 #include "supervisor.hh"
 #include "time.hh"
 
@@ -230,7 +231,9 @@ Supervisor::update (int& dummy, int t)
 	  if (sot_->exist (*task))
 	    {
 	      sot_->remove (*task);
-	      std::cout << "Removing " << task->getName () << std::endl;
+	      sot::motionPlanner::EventLog::instance ().push
+		(t, sot::motionPlanner::EVENT_TASK_REMOVED,
+		 task->getName (), "");
 	    }
 	}
       else
@@ -238,8 +241,10 @@ Supervisor::update (int& dummy, int t)
 	  {
 	    sot_->push (*task);
 
-	    std::cout << "Adding " << task->getName ()
-		      << ", level = " << level << std::endl;
+	    const double levelValue = level;
+	    sot::motionPlanner::EventLog::instance ().push
+	      (t, sot::motionPlanner::EVENT_TASK_ADDED,
+	       task->getName (), "", &levelValue, 1);
 
 	    // Free dofs.
 	    for (unsigned i = 0; i < unlockedDofs.size (); ++i)
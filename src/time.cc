@@ -14,6 +14,10 @@
 // received a copy of the GNU Lesser General Public License along with
 // sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
 
+#include <algorithm>
+#include <cmath>
+#include <stdexcept>
+
 #include <boost/numeric/conversion/converter.hpp>
 #include <boost/date_time/date.hpp>
 #include <boost/date_time/posix_time/posix_time.hpp>
@@ -25,31 +29,128 @@ namespace sot
   namespace motionPlanner
   {
 
-    void timestamp (ml::Vector& res)
+    SharedClock&
+    SharedClock::instance ()
+    {
+      static SharedClock clock;
+      return clock;
+    }
+
+    SharedClock::SharedClock ()
+      : simulated_ (false),
+	timeStep_ (0),
+	origin_ (0),
+	originTick_ (-1),
+	sampled_ (false),
+	lastTick_ (0),
+	last_ (0)
+    {}
+
+    nanoseconds_t
+    SharedClock::wallClock ()
     {
       using namespace boost::gregorian;
       using namespace boost::posix_time;
 
-      typedef boost::posix_time::ptime ptime_t;
+      static const ptime epoch (date (1970, 1, 1));
+      const time_duration diff = microsec_clock::universal_time () - epoch;
+      return diff.total_microseconds () * 1000;
+    }
 
-      if (res.size () != 2)
-	res.resize (2);
+    nanoseconds_t
+    SharedClock::now (int t)
+    {
+      if (sampled_ && t == lastTick_)
+	return last_;
+
+      nanoseconds_t time = 0;
+      if (simulated_)
+	{
+	  if (originTick_ < 0)
+	    {
+	      origin_ = std::max (wallClock (), last_);
+	      originTick_ = t;
+	    }
+	  time = origin_ + (t - originTick_) * timeStep_;
+	}
+      else
+	time = wallClock ();
+
+      if (sampled_ && time < last_)
+	time = last_;
+
+      sampled_ = true;
+      lastTick_ = t;
+      last_ = time;
+      return last_;
+    }
 
-      ptime_t time =
-	boost::posix_time::microsec_clock::universal_time ();
+    nanoseconds_t
+    SharedClock::now ()
+    {
+      if (simulated_)
+	return sampled_ ? last_ : wallClock ();
+      return std::max (wallClock (), last_);
+    }
 
-      ptime_t timet_start(date(1970,1,1));
+    void
+    SharedClock::setWallClock ()
+    {
+      simulated_ = false;
+      sampled_ = false;
+    }
 
-      time_duration diff = time - timet_start;
+    void
+    SharedClock::setSimulated (double timeStep)
+    {
+      typedef boost::numeric::converter<nanoseconds_t, double> Double2Int64;
+
+      if (timeStep <= 0.)
+	throw std::runtime_error ("time step must be positive");
+      simulated_ = true;
+      timeStep_ = Double2Int64::convert (timeStep * 1e9);
+      originTick_ = -1;
+      sampled_ = false;
+    }
 
-      int64_t sec = diff.ticks() / time_duration::rep_type::res_adjust ();
-      int64_t usec =
-	diff.fractional_seconds();
+    void timestamp (ml::Vector& res)
+    {
+      nanosecondsToTimestamp (SharedClock::instance ().now (), res);
+    }
+
+    void timestamp (ml::Vector& res, int t)
+    {
+      nanosecondsToTimestamp (SharedClock::instance ().now (t), res);
+    }
+
+    void
+    shiftTimestamp (const ml::Vector& timestamp, double delay, double res[2])
+    {
+      double usec = timestamp (1) - delay * 1e6;
+      const double carry = std::floor (usec * 1e-6);
+      usec -= carry * 1e6;
+      res[0] = timestamp (0) + carry;
+      res[1] = std::floor (usec);
+    }
+
+    nanoseconds_t
+    timestampToNanoseconds (const ml::Vector& timestamp)
+    {
+      typedef boost::numeric::converter<nanoseconds_t, double> Double2Int64;
+
+      return Double2Int64::convert (timestamp (0)) * 1000000000
+	+ Double2Int64::convert (timestamp (1)) * 1000;
+    }
 
-      typedef boost::numeric::converter<double, int64_t> Int64_t2Double;
+    void
+    nanosecondsToTimestamp (nanoseconds_t time, ml::Vector& res)
+    {
+      typedef boost::numeric::converter<double, nanoseconds_t> Int64ToDouble;
 
-      res (0) = Int64_t2Double::convert (sec);
-      res (1) = Int64_t2Double::convert (usec);
+      if (res.size () != 2)
+	res.resize (2);
+      res (0) = Int64ToDouble::convert (time / 1000000000);
+      res (1) = Int64ToDouble::convert ((time % 1000000000) / 1000);
     }
 
     boost::posix_time::ptime
@@ -14,7 +14,9 @@
 // sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
 #ifndef SOT_MOTION_PLANNER_TIME_HH
 # define SOT_MOTION_PLANNER_TIME_HH
+# include <boost/cstdint.hpp>
 # include <boost/date_time/posix_time/posix_time.hpp>
+# include <boost/noncopyable.hpp>
 
 # include <jrl/mal/boost.hh>
 
@@ -24,8 +26,83 @@ namespace sot
 {
   namespace motionPlanner
   {
+    /// \brief Time in nanoseconds since the Unix epoch.
+    typedef boost::int64_t nanoseconds_t;
 
+    /// \brief Clock shared by all the entities of the plugin.
+    ///
+    /// The time is sampled once per control iteration: all the
+    /// calls made during an iteration return the same time.
+    ///
+    /// By default, the wall-clock time is used. In simulated mode,
+    /// the time starts from the wall-clock time at the first
+    /// iteration and increases by a fixed step at each iteration, so
+    /// that timestamps stay consistent when the control loop runs
+    /// faster (or slower) than real time.
+    ///
+    /// The returned time never decreases.
+    class SharedClock : private boost::noncopyable
+    {
+    public:
+      static SharedClock& instance ();
+
+      /// \brief Time at control iteration t.
+      nanoseconds_t now (int t);
+
+      /// \brief Time outside of the control loop.
+      ///
+      /// In simulated mode, this is the time of the last iteration.
+      nanoseconds_t now ();
+
+      /// \brief Use the wall-clock time.
+      void setWallClock ();
+
+      /// \brief Use a simulated time.
+      ///
+      /// \param timeStep control period in seconds.
+      void setSimulated (double timeStep);
+
+      bool isSimulated () const
+      {
+	return simulated_;
+      }
+
+      /// \brief Read the wall clock.
+      static nanoseconds_t wallClock ();
+
+    private:
+      SharedClock ();
+
+      bool simulated_;
+      /// \brief Control period (simulated mode).
+      nanoseconds_t timeStep_;
+      /// \brief Time of the first iteration (simulated mode).
+      nanoseconds_t origin_;
+      /// \brief First iteration (simulated mode), -1 if none.
+      int originTick_;
+
+      bool sampled_;
+      /// \brief Iteration of the last sample.
+      int lastTick_;
+      /// \brief Last sampled time.
+      nanoseconds_t last_;
+    };
+
+    /// \brief Current time as a (sec, usec) vector.
     void timestamp (ml::Vector& res);
+    /// \brief Time of iteration t as a (sec, usec) vector.
+    void timestamp (ml::Vector& res, int t);
+
+    /// \brief Subtract a duration from a (sec, usec) timestamp.
+    ///
+    /// \param delay duration in seconds.
+    /// \param res shifted timestamp, the microseconds are in [0, 1e6).
+    void shiftTimestamp (const ml::Vector& timestamp, double delay,
+			 double res[2]);
+
+    nanoseconds_t timestampToNanoseconds (const ml::Vector& timestamp);
+    void nanosecondsToTimestamp (nanoseconds_t time, ml::Vector& res);
+
     boost::posix_time::ptime timestampToDateTime (const ml::Vector& timestamp);
 
   } // end of namespace motionPlanner.
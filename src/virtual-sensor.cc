@@ -15,6 +15,8 @@
 // sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
 
 #include <cmath>
+#include <limits>
+#include <stdexcept>
 
 #include <boost/date_time/posix_time/posix_time_types.hpp>
 #include <boost/date_time/date.hpp>
@@ -24,6 +26,9 @@
 
 #include <jrl/mathtools/angle.hh>
 
+#include <dynamic-graph/command-getter.h>
+#include <dynamic-graph/command-setter.h>
+
 #include "common.hh"
 #include "virtual-sensor.hh"
 #include "time.hh"
@@ -48,7 +53,9 @@ VirtualSensor::VirtualSensor (const std::string& name)
 		  ("position", VirtualSensor::updatePosition, "Vector")),
     positionTimestampOut_
     (INIT_SIGNAL_OUT
-     ("positionTimestamp", VirtualSensor::updatePositionTimestamp, "Vector"))
+     ("positionTimestamp", VirtualSensor::updatePositionTimestamp, "Vector")),
+    history_ (1),
+    lastUpdate_ (std::numeric_limits<int>::min ())
 {
   signalRegistration (expectedRobotPositionIn_
 		      << robotPositionIn_
@@ -58,17 +65,48 @@ VirtualSensor::VirtualSensor (const std::string& name)
 		      << positionTimestampOut_);
   positionOut_.setNeedUpdateFromAllChildren (true);
   positionTimestampOut_.setNeedUpdateFromAllChildren (true);
+
+  std::string docstring =
+    "    \n"
+    "    Set the measurement delay\n"
+    "    \n"
+    "      Input:\n"
+    "        - an integer: delay in control iterations.\n"
+    "    \n";
+  addCommand ("setDelay",
+	      new dg::command::Setter<VirtualSensor, int>
+	      (*this, &VirtualSensor::setDelay, docstring));
+  docstring =
+    "    \n"
+    "    Get the measurement delay\n"
+    "    \n"
+    "      Return:\n"
+    "        - an integer: delay in control iterations.\n"
+    "    \n";
+  addCommand ("getDelay",
+	      new dg::command::Getter<VirtualSensor, int>
+	      (*this, &VirtualSensor::getDelay, docstring));
 }
 
 VirtualSensor::~VirtualSensor ()
 {}
 
-ml::Vector&
-VirtualSensor::updatePosition (ml::Vector& res, int t)
+void
+VirtualSensor::setDelay (const int& delay)
 {
-  if (res.size () != 3)
-    res.resize (3);
-  res.setZero ();
+  if (delay < 0)
+    throw std::runtime_error ("delay must be positive");
+  history_.set_capacity (delay + 1);
+  history_.clear ();
+  lastUpdate_ = std::numeric_limits<int>::min ();
+}
+
+void
+VirtualSensor::update (int t)
+{
+  if (t == lastUpdate_)
+    return;
+  lastUpdate_ = t;
 
   const sot::MatrixHomogeneous& expectedRobotPosition =
     expectedRobotPositionIn_ (t);
@@ -83,14 +121,33 @@ VirtualSensor::updatePosition (ml::Vector& res, int t)
     * obstaclePosition.inverse ()
     * expectedObstaclePosition;
 
-  res = MatrixHomogeneousToXYTheta (estimatedPosition);
+  const ml::Vector position = MatrixHomogeneousToXYTheta (estimatedPosition);
+
+  // Until delay iterations have elapsed, the oldest measurement
+  // is used.
+  Measurement measurement;
+  for (unsigned i = 0; i < 3; ++i)
+    measurement.position[i] = position (i);
+  measurement.time = sot::motionPlanner::SharedClock::instance ().now (t);
+  history_.push_back (measurement);
+}
+
+ml::Vector&
+VirtualSensor::updatePosition (ml::Vector& res, int t)
+{
+  update (t);
+  if (res.size () != 3)
+    res.resize (3);
+  for (unsigned i = 0; i < 3; ++i)
+    res (i) = history_.front ().position[i];
   return res;
 }
 
 ml::Vector&
-VirtualSensor::updatePositionTimestamp (ml::Vector& res, int)
+VirtualSensor::updatePositionTimestamp (ml::Vector& res, int t)
 {
-  sot::motionPlanner::timestamp (res);
+  update (t);
+  sot::motionPlanner::nanosecondsToTimestamp (history_.front ().time, res);
   return res;
 }
 
@@ -16,6 +16,8 @@
 
 #ifndef SOT_MOTION_PLANNER_VIRTUAL_SENSOR_HH
 # define SOT_MOTION_PLANNER_VIRTUAL_SENSOR_HH
+# include <boost/circular_buffer.hpp>
+
 # include <dynamic-graph/command.h>
 # include <dynamic-graph/entity.h>
 # include <dynamic-graph/factory.h>
@@ -25,9 +27,19 @@
 
 # include <sot/core/matrix-homogeneous.hh>
 
+# include "time.hh"
+
 namespace ml = ::maal::boost;
 namespace dg = ::dynamicgraph;
 
+/// \brief Simulate a localization sensor observing an obstacle.
+///
+/// The robot position is deduced from the difference between the
+/// planned and the real obstacle positions.
+///
+/// The measurements can be delayed by a number of control iterations
+/// (see setDelay) to simulate the sensor latency: the position and
+/// its timestamp are then the ones computed delay iterations before.
 class VirtualSensor : public dg::Entity
 {
   DYNAMIC_GRAPH_ENTITY_DECL ();
@@ -49,6 +61,13 @@ public:
   virtual ~VirtualSensor ();
   /// \}
 
+  void setDelay (const int& delay);
+
+  int getDelay () const
+  {
+    return history_.capacity () - 1;
+  }
+
 protected:
   /// \brief Update the position signal.
   ml::Vector& updatePosition (ml::Vector& res, int);
@@ -56,6 +75,15 @@ protected:
   ml::Vector& updatePositionTimestamp (ml::Vector& res, int);
 
 private:
+  struct Measurement
+  {
+    double position[3];
+    sot::motionPlanner::nanoseconds_t time;
+  };
+
+  /// \brief Compute the measurement of iteration t.
+  void update (int t);
+
   signalMatrixHomoIn_t expectedRobotPositionIn_;
   signalMatrixHomoIn_t robotPositionIn_;
 
@@ -64,6 +92,11 @@ private:
 
   signalVectorOut_t positionOut_;
   signalVectorOut_t positionTimestampOut_;
+
+  /// \brief Last delay + 1 measurements.
+  boost::circular_buffer<Measurement> history_;
+  /// \brief Last updated iteration.
+  int lastUpdate_;
 };
 
 #endif //! SOT_MOTION_PLANNER_VIRTUAL_SENSOR_HH
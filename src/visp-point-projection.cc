@@ -67,16 +67,16 @@ VispPointProjection::update (int t)
   const double& Y = cMo (1, 3);
   const double& Z = cMo (2, 3);
 
-  using boost::posix_time::seconds;
+  static const sot::motionPlanner::nanoseconds_t maxAge = 1000000000;
 
-  boost::posix_time::ptime now =
-    boost::posix_time::microsec_clock::universal_time ();
-  boost::posix_time::ptime cMoTime =
-    sot::motionPlanner::timestampToDateTime (cMoTimestampIn_ (t));
+  const sot::motionPlanner::nanoseconds_t now =
+    sot::motionPlanner::SharedClock::instance ().now (t);
+  const sot::motionPlanner::nanoseconds_t cMoTime =
+    sot::motionPlanner::timestampToNanoseconds (cMoTimestampIn_ (t));
 
   // If z is near zero or cMo too old (tracking may have been
   // lost), set to zero to stop the movement.
-  if (now - cMoTime > seconds (1) || std::fabs (Z) < 1e-6)
+  if (now - cMoTime > maxAge || std::fabs (Z) < 1e-6)
     {
       xy_ (0) = 0.;
       xy_ (1) = 0.;
@@ -0,0 +1,176 @@
+// Copyright 2011, François Bleibel, Thomas Moulard, Olivier Stasse,
+// JRL, CNRS/AIST.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <cmath>
+#include <limits>
+#include <stdexcept>
+
+#include <dynamic-graph/command-setter.h>
+
+#include "visp-points-projection.hh"
+#include "time.hh"
+
+VispPointsProjection::VispPointsProjection (const std::string& name)
+  : dg::Entity (name),
+    points_ (0, 3),
+    lastUpdate_ (std::numeric_limits<int>::min ()),
+    xy_ (0),
+    error_ (0),
+    jacobian_ (0, 0),
+
+    cMoIn_
+    (dg::nullptr,
+     MAKE_SIGNAL_STRING (name, true, "MatrixHomo", "cMo")),
+    cMoTimestampIn_
+    (dg::nullptr,
+     MAKE_SIGNAL_STRING (name, true, "Vector", "cMoTimestamp")),
+    xyDesIn_
+    (dg::nullptr,
+     MAKE_SIGNAL_STRING (name, true, "Vector", "xyDes")),
+    JqIn_
+    (dg::nullptr,
+     MAKE_SIGNAL_STRING (name, true, "Matrix", "Jq")),
+
+    xyOut_ (INIT_SIGNAL_OUT
+	    ("xy", VispPointsProjection::updateXy, "Vector")),
+    errorOut_ (INIT_SIGNAL_OUT
+	       ("error", VispPointsProjection::updateError, "Vector")),
+    jacobianOut_ (INIT_SIGNAL_OUT
+		  ("jacobian", VispPointsProjection::updateJacobian, "Matrix"))
+{
+  signalRegistration (cMoIn_ << cMoTimestampIn_ << xyDesIn_ << JqIn_
+		      << xyOut_ << errorOut_ << jacobianOut_);
+  xyOut_.setNeedUpdateFromAllChildren (true);
+  errorOut_.setNeedUpdateFromAllChildren (true);
+  jacobianOut_.setNeedUpdateFromAllChildren (true);
+
+  std::string docstring =
+    "    \n"
+    "    Set the points to be projected\n"
+    "    \n"
+    "      Input:\n"
+    "        - a matrix: one point (x, y, z) per row, in the object frame.\n"
+    "    \n";
+  addCommand ("setPoints",
+	      new dg::command::Setter<VispPointsProjection, ml::Matrix>
+	      (*this, &VispPointsProjection::setPoints, docstring));
+}
+
+VispPointsProjection::~VispPointsProjection ()
+{}
+
+void
+VispPointsProjection::setPoints (const ml::Matrix& points)
+{
+  if (points.nbCols () != 3)
+    throw std::runtime_error ("points must be given as a N x 3 matrix");
+  points_ = points;
+  xy_.resize (2 * points.nbRows ());
+  xy_.setZero ();
+  error_.resize (2 * points.nbRows ());
+  error_.setZero ();
+  lastUpdate_ = std::numeric_limits<int>::min ();
+}
+
+void
+VispPointsProjection::update (int t)
+{
+  if (t == lastUpdate_)
+    return;
+  lastUpdate_ = t;
+
+  static const sot::motionPlanner::nanoseconds_t maxAge = 1000000000;
+
+  const unsigned n = points_.nbRows ();
+  const sot::MatrixHomogeneous& cMo = cMoIn_ (t);
+  const ml::Matrix& Jq = JqIn_ (t);
+
+  const sot::motionPlanner::nanoseconds_t now =
+    sot::motionPlanner::SharedClock::instance ().now (t);
+  const sot::motionPlanner::nanoseconds_t cMoTime =
+    sot::motionPlanner::timestampToNanoseconds (cMoTimestampIn_ (t));
+  const bool outdated = now - cMoTime > maxAge;
+
+  const ml::Vector* xyDes = 0;
+  if (xyDesIn_.isPlugged ())
+    {
+      xyDes = &xyDesIn_ (t);
+      if (xyDes->size () != 2 * n)
+	throw std::runtime_error ("invalid desired points size");
+    }
+
+  if (Jq.nbRows () != 6)
+    throw std::runtime_error ("invalid camera Jacobian size");
+  const unsigned nq = Jq.nbCols ();
+  if (jacobian_.nbRows () != 2 * n || jacobian_.nbCols () != nq)
+    jacobian_.resize (2 * n, nq);
+
+  for (unsigned i = 0; i < n; ++i)
+    {
+      // Point in the camera frame.
+      double p[3];
+      for (unsigned j = 0; j < 3; ++j)
+	p[j] = cMo (j, 0) * points_ (i, 0)
+	  + cMo (j, 1) * points_ (i, 1)
+	  + cMo (j, 2) * points_ (i, 2)
+	  + cMo (j, 3);
+
+      // If z is near zero or cMo too old, ignore this point (null
+      // error).
+      double x = 0.;
+      double y = 0.;
+      double Z = 1.;
+      const bool valid = !outdated && std::fabs (p[2]) >= 1e-6;
+      if (valid)
+	{
+	  x = p[0] / p[2];
+	  y = p[1] / p[2];
+	  Z = p[2];
+	}
+
+      xy_ (2 * i) = x;
+      xy_ (2 * i + 1) = y;
+      if (valid)
+	{
+	  error_ (2 * i) = x - (xyDes ? (*xyDes) (2 * i) : 0.);
+	  error_ (2 * i + 1) = y - (xyDes ? (*xyDes) (2 * i + 1) : 0.);
+	}
+      else
+	{
+	  error_ (2 * i) = 0.;
+	  error_ (2 * i + 1) = 0.;
+	}
+
+      // Interaction matrix of the image point.
+      const double L[2][6] =
+	{
+	  {-1. / Z, 0., x / Z, x * y, -(1. + x * x), y},
+	  {0., -1. / Z, y / Z, 1. + y * y, -x * y, -x}
+	};
+
+      for (unsigned row = 0; row < 2; ++row)
+	for (unsigned col = 0; col < nq; ++col)
+	  {
+	    double v = 0.;
+	    for (unsigned k = 0; k < 6; ++k)
+	      v += L[row][k] * Jq (k, col);
+	    jacobian_ (2 * i + row, col) = v;
+	  }
+    }
+}
+
+DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN (VispPointsProjection,
+				    "VispPointsProjection");
@@ -0,0 +1,131 @@
+// Copyright 2011, François Bleibel, Thomas Moulard, Olivier Stasse,
+// JRL, CNRS/AIST.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#ifndef SOT_MOTION_PLANNER_VISP_POINTS_PROJECTION_HH
+# define SOT_MOTION_PLANNER_VISP_POINTS_PROJECTION_HH
+# include <jrl/mal/boost.hh>
+
+# include <dynamic-graph/command.h>
+# include <dynamic-graph/entity.h>
+# include <dynamic-graph/factory.h>
+# include <dynamic-graph/null-ptr.hh>
+# include <dynamic-graph/signal-ptr.h>
+# include <dynamic-graph/signal-time-dependent.h>
+
+# include <sot/core/matrix-homogeneous.hh>
+
+# include "common.hh"
+
+/// \brief Project several object points into the image.
+///
+/// This entity computes a single visual feature stacking N image
+/// points: the points (one per row of the matrix given to setPoints)
+/// are expressed in the object frame, projected using the cMo
+/// input signal and compared to the desired positions (xyDes, 2N
+/// vector, zero by default).
+///
+/// The error output is the stacked (x - x*, y - y*) difference and
+/// the jacobian output is the product of the point interaction
+/// matrices by the camera Jacobian (Jq input). Both are meant to be
+/// plugged into a FeatureGeneric so that all the points are
+/// controlled by one task.
+///
+/// As VispPointProjection, if cMo is more than one second old
+/// (tracking may have been lost) the error is set to zero; points
+/// whose depth is near zero are also ignored.
+class VispPointsProjection : public dg::Entity
+{
+  DYNAMIC_GRAPH_ENTITY_DECL ();
+public:
+  /// \brief Input homogeneous matrix signal.
+  typedef dg::SignalPtr<sot::MatrixHomogeneous, int> signalMatrixHomoIn_t;
+  /// \brief Input vector signal.
+  typedef dg::SignalPtr<ml::Vector, int> signalVectorIn_t;
+  /// \brief Input matrix signal.
+  typedef dg::SignalPtr<ml::Matrix, int> signalMatrixIn_t;
+  /// \brief Output vector signal.
+  typedef dg::SignalTimeDependent<ml::Vector, int> signalVectorOut_t;
+  /// \brief Output matrix signal.
+  typedef dg::SignalTimeDependent<ml::Matrix, int> signalMatrixOut_t;
+
+  /// \name Constructor and destructor.
+  /// \{
+  explicit VispPointsProjection (const std::string& name);
+  virtual ~VispPointsProjection ();
+  /// \}
+
+  /// \brief Set the points coordinates in the object frame (N x 3).
+  void setPoints (const ml::Matrix& points);
+
+  unsigned pointsCount () const
+  {
+    return points_.nbRows ();
+  }
+
+protected:
+  /// \brief Update the projections, once per iteration.
+  void update (int t);
+
+  ml::Vector& updateXy (ml::Vector& res, int t)
+  {
+    update (t);
+    res = xy_;
+    return res;
+  }
+
+  ml::Vector& updateError (ml::Vector& res, int t)
+  {
+    update (t);
+    res = error_;
+    return res;
+  }
+
+  ml::Matrix& updateJacobian (ml::Matrix& res, int t)
+  {
+    update (t);
+    res = jacobian_;
+    return res;
+  }
+
+private:
+  /// \brief Points in the object frame.
+  ml::Matrix points_;
+
+  /// \brief Last updated iteration.
+  int lastUpdate_;
+
+  ml::Vector xy_;
+  ml::Vector error_;
+  ml::Matrix jacobian_;
+
+  /// \brief Object position in camera frame.
+  signalMatrixHomoIn_t cMoIn_;
+  /// \brief cMo timestamp.
+  signalVectorIn_t cMoTimestampIn_;
+  /// \brief Desired points positions in the image.
+  signalVectorIn_t xyDesIn_;
+  /// \brief Camera Jacobian.
+  signalMatrixIn_t JqIn_;
+
+  /// \brief Stacked points positions in the image.
+  signalVectorOut_t xyOut_;
+  /// \brief Stacked error.
+  signalVectorOut_t errorOut_;
+  /// \brief Stacked Jacobian.
+  signalMatrixOut_t jacobianOut_;
+};
+
+#endif //! SOT_MOTION_PLANNER_VISP_POINTS_PROJECTION_HH
@@ -0,0 +1,77 @@
+// Copyright 2011, François Bleibel, Thomas Moulard, Olivier Stasse,
+// JRL, CNRS/AIST.
+//
+// This file is part of sot-motion-planner.
+// sot-motion-planner is free software: you can redistribute it and/or
+// modify it under the terms of the GNU Lesser General Public License
+// as published by the Free Software Foundation, either version 3 of
+// the License, or (at your option) any later version.
+//
+// sot-motion-planner is distributed in the hope that it will be useful, but
+// WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+// General Lesser Public License for more details.  You should have
+// received a copy of the GNU Lesser General Public License along with
+// sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+#include <cmath>
+#include <iostream>
+
+#include "discretized-trajectory.hh"
+
+typedef sot::DiscretizedTrajectory::vector_t vector_t;
+
+// Piecewise linear trajectory: a ramp until t = 0.5, then constant.
+vector_t sample (double t)
+{
+  vector_t res (2);
+  res[0] = t < .5 ? t : .5;
+  res[1] = 1. - res[0];
+  return res;
+}
+
+bool check (const sot::DiscretizedTrajectory& trajectory,
+	    double t, double tolerance)
+{
+  vector_t value = trajectory (t);
+  vector_t expected = sample (t);
+  std::cout << "t = " << t << ": " << value[0] << ", " << value[1]
+	    << " (expected " << expected[0] << ", " << expected[1] << ")"
+	    << std::endl;
+  return std::fabs (value[0] - expected[0]) <= tolerance
+    && std::fabs (value[1] - expected[1]) <= tolerance;
+}
+
+int main()
+{
+  const double step = 0.01;
+  const unsigned size = 100;
+
+  std::vector<vector_t> data;
+  for (unsigned i = 0; i < size; ++i)
+    data.push_back (sample (i * step));
+
+  sot::DiscretizedTrajectory::discreteInterval_t
+    range (0., size * step, step);
+  sot::DiscretizedTrajectory trajectory (range, data, "trajectory");
+  trajectory.setInterpolation (sot::DiscretizedTrajectory::INTERPOLATION_LINEAR);
+
+  const double times[] = {0., 0.255, 0.5, 0.505, 0.75, 0.99};
+  const unsigned nTimes = sizeof (times) / sizeof (times[0]);
+
+  for (unsigned i = 0; i < nTimes; ++i)
+    if (!check (trajectory, times[i], 1e-9))
+      return 1;
+
+  // Only the end points and the kink of the ramp are kept.
+  trajectory.compress (1e-6);
+  std::cout << trajectory.sampleCount () << " sample(s) kept" << std::endl;
+  if (trajectory.sampleCount () != 3
+      || trajectory.trajectorySize () != size)
+    return 1;
+
+  for (unsigned i = 0; i < nTimes; ++i)
+    if (!check (trajectory, times[i], 1e-6))
+      return 1;
+  return 0;
+}
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of sot-motion-planner.
+# sot-motion-planner is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# sot-motion-planner is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+# Fusion of two error estimations.
+
+from dynamic_graph.sot.motion_planner import ErrorMerger
+
+errors = {'a': (1., 2., 0.1), 'b': (3., -2., 0.3)}
+weights = {'a': 1., 'b': 3.}
+
+def makeMerger(name, covariances = None):
+    m = ErrorMerger(name)
+    for source in sorted(errors.keys()):
+        m.addErrorEstimation(source)
+        m.signal('error_' + source).value = errors[source]
+        m.signal('weight_' + source).value = (weights[source],)
+        if covariances:
+            m.signal('covariance_' + source).value = covariances[source]
+    m.resolvePlugging()
+    return m
+
+def merge(m):
+    m.error.recompute(m.error.time + 1)
+    return m.error.value
+
+def check(name, value, expected):
+    print '{0}: {1} (expected {2})'.format(name, value, expected)
+    for (v, e) in zip(value, expected):
+        assert abs(v - e) < 1e-9
+
+# Without covariance: weighted mean.
+total = sum(weights.values())
+mean = tuple([sum([weights[s] * errors[s][i] for s in errors]) / total
+              for i in xrange(3)])
+check('weighted mean', merge(makeMerger('merger_mean')), mean)
+
+# With diagonal covariances: per-component weighted mean, using
+# weight / variance.
+variances = {'a': (1., 4., 0.01), 'b': (4., 1., 0.04)}
+covariances = dict(
+    [(s, ((v[0], 0., 0.), (0., v[1], 0.), (0., 0., v[2])))
+     for (s, v) in variances.items()])
+expected = []
+for i in xrange(3):
+    information = sum([weights[s] / variances[s][i] for s in errors])
+    expected.append(sum([weights[s] / variances[s][i] * errors[s][i]
+                         for s in errors]) / information)
+check('information form', merge(makeMerger('merger_covariance', covariances)),
+      expected)
+
+# A null weight discards the source.
+m = makeMerger('merger_discard')
+m.signal('weight_b').value = (0.,)
+check('discarded source', merge(m), errors['a'])
+m.activeSources.recompute(m.activeSources.time + 1)
+assert m.activeSources.value[0] == 1
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of sot-motion-planner.
+# sot-motion-planner is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# sot-motion-planner is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+# Footstep compilation and feasibility checks.
+
+import numpy as np
+
+from dynamic_graph.sot.motion_planner.motion_plan.footstep_compiler import *
+
+def check(name, value, expected):
+    print '{0}: {1} (expected {2})'.format(name, value, expected)
+    assert np.allclose(value, expected)
+
+def errors(footsteps):
+    report = checkFootsteps(compileFootsteps(footsteps))
+    print report
+    return [message for (step, message) in report.errors]
+
+# Default values: the first slide1 is null, the other missing slides
+# are set to their minimum.
+steps = compileFootsteps([{'x': 0.15, 'y': -0.19},
+                          {'x': 0.15, 'y': 0.19, 'slide1': -1.}])
+check('slide1', steps['slide1'], (0., -1.))
+check('slide2', steps['slide2'], (minSlides[1], minSlides[1]))
+check('horizontal distance', steps['horizontalDistance'], (0.24, 0.24))
+check('height', steps['height'], (0.25, 0.25))
+check('theta', steps['theta'], (0., 0.))
+assert compileFootsteps(steps) is steps
+
+# Walks start with the right foot, generated steps alternate from
+# the right side, whatever the previous walk.
+steps = compileFootsteps([{'straight': {'steps': 3, 'length': 0.1}}])
+check('straight x', steps['x'], (0.1, 0.1, 0.1))
+check('straight y', steps['y'], (-0.19, 0.19, -0.19))
+
+# Generators follow the side of the hand-written steps.
+steps = compileFootsteps([{'x': 0.15, 'y': -0.19},
+                          {'turn-in-place': {'steps': 2, 'theta': 0.2}}])
+check('turn in place y', steps['y'], (-0.19, 0.19, -0.19))
+check('turn in place theta', steps['theta'], (0., 0.2, 0.2))
+
+# Sidestep: the leading foot opens the feet, the other one follows.
+steps = compileFootsteps([{'sidestep': {'steps': 4, 'distance': 0.1}}])
+check('sidestep y', steps['y'], (-0.19, 0.29, -0.19, 0.29))
+
+# Repeat: generators are expanded count times.
+steps = compileFootsteps(
+    [{'repeat': {'count': 2,
+                 'footsteps': [{'x': 0.1, 'y': -0.19},
+                               {'x': 0.1, 'y': 0.19}]}}])
+check('repeat y', steps['y'], (-0.19, 0.19, -0.19, 0.19))
+
+# Feasibility.
+straight = [{'straight': {'steps': 4, 'length': 0.15}}]
+assert errors(straight) == []
+assert errors([{'x': 0.15, 'y': -0.19}]) == []
+assert 'feet too close' in errors([{'x': 0.15, 'y': 0.19}])
+assert 'footstep out of reach' in errors([{'x': 0.5, 'y': -0.19}])
+assert 'feet too far apart' in errors([{'x': 0., 'y': -0.4}])
+assert 'rotation too large' in errors([{'x': 0., 'y': -0.19, 'theta': 0.8}])
+assert 'feet collide' in errors([{'x': 0.1, 'y': -0.05}])
+assert not 'feet collide' in errors([{'x': 0., 'y': -0.19, 'theta': 0.3}])
+assert 'slide2 out of [-0.76, 0]' in \
+    errors([{'x': 0.15, 'y': -0.19, 'slide2': -1.}])
+
+# Displacement of the walk.
+report = checkFootsteps(compileFootsteps(straight))
+check('final position', report.poses[-1],
+      report.poses[1] + (0.6, 0., 0.))
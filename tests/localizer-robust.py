@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of sot-motion-planner.
+# sot-motion-planner is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# sot-motion-planner is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+# Robust estimation: nine observations see the robot where it is
+# planned, one outlier sees it 10m further along x.
+
+from dynamic_graph.sot.motion_planner import Localizer
+
+inliers = 9
+outlier = 10.
+
+def makeLocalizer(name):
+    l = Localizer(name)
+    l.add_landmark_observations('obs', inliers + 1)
+    for i in xrange(inliers + 1):
+        prefix = 'obs{0}_'.format(i)
+        # The feature is the x position of the robot.
+        l.signal(prefix + 'JfeatureReferencePosition').value = ((1., 0., 0.),)
+        l.signal(prefix + 'JsensorPosition').value = \
+            ((1., 0., 0.), (0., 1., 0.), (0., 0., 1.))
+        l.signal(prefix + 'weight').value = (1.,)
+        l.signal(prefix + 'correctedDofs').value = (1., 0., 0.)
+        l.signal(prefix + 'featureReferencePosition').value = (0.,)
+        l.signal(prefix + 'featureObservedPosition').value = (0.,)
+    l.signal('obs{0}_featureObservedPosition'.format(inliers)).value = \
+        (outlier,)
+    return l
+
+def offset(l):
+    l.configurationOffset.recompute(l.configurationOffset.time + 1)
+    return l.configurationOffset.value[0]
+
+def check(name, value, expected):
+    print '{0}: {1} (expected {2})'.format(name, value, expected)
+    assert abs(value - expected) < 1e-6
+
+# Least squares: mean of the observations.
+l = makeLocalizer('localizer_none')
+check('none', offset(l), outlier / (inliers + 1))
+
+# Huber: the outlier weight c / r converges to the fixed point
+# 9 x = c, x being the offset.
+l = makeLocalizer('localizer_huber')
+l.set_robust_estimator('huber', 1., 50)
+check('huber', offset(l), 1. / inliers)
+
+# Tukey: the outlier is beyond the threshold and discarded.
+l = makeLocalizer('localizer_tukey')
+l.set_robust_estimator('tukey', 3., 50)
+check('tukey', offset(l), 0.)
+
+# Residuals are computed with the robust offset.
+residual = l.signal('obs{0}_residual'.format(inliers))
+residual.recompute(residual.time + 1)
+check('tukey outlier residual', residual.value[0], -outlier)
+residual = l.signal('obs0_residual')
+residual.recompute(residual.time + 1)
+check('tukey inlier residual', residual.value[0], 0.)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of sot-motion-planner.
+# sot-motion-planner is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# sot-motion-planner is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+# Reload of a plan which does not walk.
+
+import logging
+import os
+import tempfile
+import yaml
+
+from dynamic_graph.sot.motion_planner.motion_plan import MotionPlan
+
+def writePlan(plan):
+    (fd, filename) = tempfile.mkstemp(suffix = '.yaml')
+    os.write(fd, yaml.dump(plan))
+    os.close(fd)
+    return filename
+
+# The plan is built by hand: loading it requires a robot and a solver,
+# which reload does not use when no element changes.
+plan = {'duration': 5., 'motion': [], 'control': [],
+        'footstep-limits': {'max-reach': 0.3}}
+motionPlan = MotionPlan.__new__(MotionPlan)
+motionPlan.plan = plan
+motionPlan.motion = []
+motionPlan.control = []
+motionPlan.environment = {}
+motionPlan.defaultDirectories = []
+motionPlan.logger = logging.getLogger('motion-plan-reload')
+
+# Footstep limits can change even if the plan does not walk.
+newPlan = dict(plan)
+newPlan['duration'] = 6.
+newPlan['footstep-limits'] = {'max-reach': 0.25}
+filename = writePlan(newPlan)
+try:
+    motionPlan.reload(filename)
+finally:
+    os.remove(filename)
+assert motionPlan.duration == 6.
+assert motionPlan.plan['footstep-limits'] == {'max-reach': 0.25}
+
+# Other keys are still rejected.
+newPlan['environment'] = []
+filename = writePlan(newPlan)
+try:
+    motionPlan.reload(filename)
+    assert False
+except RuntimeError as e:
+    print e
+finally:
+    os.remove(filename)
+assert not 'environment' in motionPlan.plan
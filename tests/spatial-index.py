@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# Copyright 2011, Florent Lamiraux, Thomas Moulard, JRL, CNRS/AIST
+#
+# This file is part of sot-motion-planner.
+# sot-motion-planner is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public License
+# as published by the Free Software Foundation, either version 3 of
+# the License, or (at your option) any later version.
+#
+# sot-motion-planner is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Lesser Public License for more details.  You should have
+# received a copy of the GNU Lesser General Public License along with
+# sot-motion-planner. If not, see <http://www.gnu.org/licenses/>.
+
+# Clearance queries of the environment spatial index.
+
+import numpy as np
+
+from dynamic_graph.sot.motion_planner.motion_plan.spatial_index import *
+
+# A 0.4x0.2 box at (1, 0), rotated by 90 degrees, and a disk of radius
+# 0.1 at (0, 1).
+shapes = [(1., 0., np.pi / 2., 0.2, 0.1, 0.),
+          (0., 1., 0., 0., 0., 0.1)]
+clearance = 0.05
+index = SpatialIndex(['box', 'disk'], shapes, [0, 1], clearance,
+                     cellSize = 0.1)
+
+def bruteForce(points):
+    res = []
+    for (x, y) in points:
+        hit = -1
+        for (k, (sx, sy, theta, hx, hy, r)) in enumerate(shapes):
+            c = np.cos(theta)
+            s = np.sin(theta)
+            px = c * (x - sx) + s * (y - sy)
+            py = -s * (x - sx) + c * (y - sy)
+            dx = px - np.clip(px, -hx, hx)
+            dy = py - np.clip(py, -hy, hy)
+            if np.hypot(dx, dy) - r < clearance:
+                hit = k
+                break
+        res.append(hit)
+    return res
+
+# Points on both sides of the inflated shapes boundaries.
+points = [(1., 0.), (1.14, 0.), (1.16, 0.), (1., 0.24), (1., 0.26),
+          (0., 1.), (0., 1.14), (0.11, 1.11), (0., 1.16), (-2., -2.)]
+expected = [0, 0, -1, 0, -1, 1, 1, -1, -1, -1]
+result = index.query(points).tolist()
+print result
+assert result == expected
+
+# Random points agree with a brute force search.
+points = np.random.RandomState(0).uniform(-0.5, 1.5, (1000, 2))
+assert index.query(points).tolist() == bruteForce(points)
+
+# Footsteps: the left foot is placed next to the disk when walking
+# along it, walking far from the objects is safe.
+steps = [(0.3, -0.19, 0.), (0.3, 0.19, 0.)] * 2
+collisions = index.checkFootsteps(steps, (-0.6, 0.905, 0.))
+print collisions
+assert (3, 'disk', 'footstep') in collisions
+assert index.checkFootsteps(steps, (-0.6, -1., 0.)) == []
+
+# Empty environment.
+empty = SpatialIndex([], [], [], clearance)
+assert empty.query(points).tolist() == [-1] * len(points)